@@ -1,20 +1,38 @@
 #!/usr/bin/python3
 import asyncio
+import base64
 import random
 import traceback
 import aiomas
 import hashlib
 import logging
 import errno
+import time
+from collections import Counter, deque
 
 from helpers.validator import *
 from helpers.chordInterval import *
 from helpers.storage import Storage
+from helpers.bloomFilter import BloomFilter
+from helpers.rateLimiter import TokenBucket
 from helpers.replica import Replica
+from helpers.fingerIndex import FingerIndex
+from helpers.lookupCache import LookupCache
+from helpers.routingCache import RoutingCache
+from helpers.peerSuspicion import PeerSuspicion
+from helpers.connectionPool import ConnectionPool
+from helpers.aiomasTools import aiomas_parse_url
 from helpers.messageDefinitions import *
 from jsonschema import validate, Draft3Validator
 from jsonschema.exceptions import ValidationError, SchemaError
 
+# RPCs answered by the remote node itself without contacting further nodes. Their duration is a
+# sample of the round trip time to this node.
+RTT_SAMPLE_RPCS = {"rpc_get_node_info", "rpc_get_closest_preceding_fingers", "rpc_dht_get_data"}
+# Anti-entropy: sub-ranges per differing key range and max. ranges or keys per request
+SYNC_FANOUT = 16
+SYNC_MAX_REQUEST = 4096
+
 
 def filter_node_response(data, immediate_neighbors=False, trace_log=False):
     if data is None:
@@ -30,6 +48,8 @@ def filter_node_response(data, immediate_neighbors=False, trace_log=False):
         output["predecessor"] = filter_node_response(data["predecessor"])
     if trace_log:
         output["trace"] = data["trace"]
+    if "key_present" in data:
+        output["key_present"] = data["key_present"]
 
     return output
 
@@ -45,12 +65,13 @@ class Node(aiomas.Agent):
 
         It is responsible that entries in the successor list and first finger are consistent.
         """
-        def __init__(self, finger_table_ref):
+        def __init__(self, finger_table_ref, on_finger_change=None):
             self.list = []
             self._backup = None     # List backup before ``update_others``
             self.max_entries = 3
 
             self._fingertable = finger_table_ref
+            self._on_finger_change = on_finger_change
 
         def set(self, new_successor, replace_old=False):
             if len(self.list) == 0:
@@ -88,6 +109,8 @@ class Node(aiomas.Agent):
         def _correct_finger_table(self, new_successor, replace_old=False, offset=0):
             old_peer = self._fingertable[offset].get("successor")
             self._fingertable[offset]["successor"] = new_successor
+            if self._on_finger_change:
+                self._on_finger_change()
 
             if old_peer is None or not replace_old:
                 return
@@ -121,13 +144,89 @@ class Node(aiomas.Agent):
         self.bootup_finished = False
         self.activated = True
         self.network_timeout = 7
+        self.connections = ConnectionPool()     # Remote agent proxies reused by consecutive RPCs
+        self.channels = {}      # Our connections of the pooled proxies: node_address -> aiomas RpcClient
+        self.connecting = {}    # Connection attempts in progress: node_address -> Task
+        self.rpc_codec = aiomas.codecs.JSON     # Codec of our connections, must be the one of the container
+        # Connections opened right after joining: "none", "successors" or "fingers" (including successors)
+        self.connection_prewarm = "none"
+        # Values are transferred as raw bytes if the container uses a binary codec (see helpers.rpcCodec).
+        # Otherwise, they are base64 encoded for JSON.
+        self.binary_values = False
         self.storage = Storage()
+        self.replica = Replica(CHORD_RING_SIZE)  # Shared by all requests to reuse cached replica keys
+        # Placement of replicas: "rehash" stores them under rehashed keys, "successors" on the successors of the
+        # node responsible for the key
+        self.replication_mode = "rehash"
+        self.replica_holders = set()    # Successors holding a copy of our key range (successor replication)
+        self.predecessor_list = []      # Our predecessors, nearest first. Keys we hold copies of (successor replication)
+        self.copy_range_start = None    # Items outside of (copy_range_start, this node] were dropped
+        # The immediate successor keeps a copy of our key range, reconciled by anti-entropy (rehash replication).
+        # This doubles the stored data. Successor replication keeps copies anyway.
+        self.successor_copy = False
+        self.write_quorum = 1       # Replica writes to wait for before a PUT succeeds
+        self.read_mode = "sequential"   # How a GET asks the replicas: sequential, hedged or quorum
+        self.hedge_delay = "p95"    # Seconds before a hedged GET asks the next replica or p95 of recent reads
+        self.read_quorum = 2        # Replica answers merged by a quorum GET
+        self.read_latencies = deque(maxlen=200)
+        # Values found by a GET are copied to replica holders that missed them. None disables read repair.
+        self.repair_limiter = TokenBucket(10)   # Max. repairs per second
+        self.writes_in_flight = Counter()   # (replica key, value) of PUTs still being written, skipped by read repair
+        self.expiry_slice = 500     # Max. expired storage items evicted before yielding to the event loop
+        # Anti-entropy: differing key ranges followed per level, keys compared by digest per range and
+        # bytes of values exchanged per round
+        self.sync_max_ranges = 8
+        self.sync_max_keys = 64
+        self.sync_max_bytes = 64 * 1024
+        # Bloom filters of the keys stored by our successors: node_address -> (filter, time received)
+        self.peer_filters = {}
+        self.filter_max_age = 30    # Seconds a received filter is used for skipping GET requests
+        self.stats = {
+            "bloom_positives": 0,         # GET requests sent because the holder's filter might contain the key
+            "bloom_false_positives": 0,   # ...and the holder did not have any data
+            "bloom_negatives": 0,         # GET requests deferred because the holder's filter excluded the key
+            "bloom_skipped": 0,           # GET requests saved because the holder's filter excluded the key
+            "bloom_stale": 0,             # Deferred GET requests that found data (filter was outdated)
+            "bloom_bytes_saved": 0,       # Estimated RPC traffic saved by the skipped requests
+            "hedged_reads": 0,            # Additional replica requests of hedged GETs
+            "learned_hops": 0,            # Next hops taken from the routing cache instead of the fingers
+            "proximity_fingers": 0,       # Fingers set to a closer node than the first one of their interval
+            "suspect_skips": 0,           # Next hops skipped because the peer is suspected to be dead
+            "suspects_cleared": 0,        # Suspected peers that answered again
+            "finger_fixes": 0,            # Finger lookups during stabilization
+            "finger_changes": 0,          # ...which changed the finger
+            "read_repairs": 0,            # Replica holders repaired after a GET
+            "read_repairs_failed": 0,
+            "read_repairs_dropped": 0     # Repairs skipped due to the rate limit
+        }
         # Wide-range Overlay network
         self.fingertable = []
+        self.finger_index = FingerIndex()   # Rebuilt on the next lookup after fingers changed
+        self.finger_index_dirty = True
+        # Lookups are either forwarded hop by hop ("recursive") or driven by the requesting node ("iterative")
+        self.lookup_mode = "recursive"
+        self.lookup_alpha = 3           # Parallel queries of an iterative lookup
+        self.lookup_hop_timeout = 1.0   # Seconds until an iterative lookup routes around a slow hop
+        self.lookup_cache = LookupCache()   # Responsible nodes of key ranges for data requests
+        self.routing_cache = RoutingCache()     # Live nodes seen in the traffic, used as additional fingers
+        # Addresses of peers accepting the sender argument of lookup RPCs. Older nodes reject it.
+        self.sender_peers = set()
+        # Peers that recently timed out or refused connections. Lookups route around them.
+        self.suspicion = PeerSuspicion()
+        # Smoothed round trip times of peers: node_address -> seconds
+        self.peer_rtt = {}
+        self.rtt_alpha = 0.125          # Weight of a new RTT sample
+        # Fingers are the lowest latency nodes of their interval instead of the first one (proximity selection)
+        self.proximity_fingers = False
+        self.update_fanout = 8          # Concurrent finger table notifications when joining
         self.fix_interval = 4 + random.randint(0, 5)
         self.fix_next = 0
+        # Distinct finger groups refreshed per stabilization cycle. Grows to all groups when fixes change
+        # fingers (churn) and shrinks to fix_batch_min while the fingers are stable.
+        self.fix_batch_min = 2
+        self.fix_batch = self.fix_batch_min
         # Short-range Successor list (manages finger[0] in fingertable)
-        self.successor = Node.Successor(self.fingertable)
+        self.successor = Node.Successor(self.fingertable, on_finger_change=self.invalidate_finger_index)
 
     @asyncio.coroutine
     def _check_running_state(self):
@@ -154,6 +253,87 @@ class Node(aiomas.Agent):
 
         return dict_node
 
+    def get_statistics(self):
+        """Counters of this node for monitoring and capacity planning.
+
+        :return:
+            Dict with the counters grouped by component.
+        :rtype: dict
+        """
+        storage_stats = dict(self.storage.stats)
+        storage_stats.update({
+            "keys": len(self.storage.data),
+            "bytes": self.storage.size,
+            "max_bytes": self.storage.maxBytes
+        })
+
+        lookup_stats = dict(self.stats)
+        # Share of holders without the key whose filter still matched. Excluded holders are assumed to
+        # not have the key, unless a deferred request found it.
+        false_positives = self.stats["bloom_false_positives"]
+        true_negatives = self.stats["bloom_negatives"] - self.stats["bloom_stale"]
+        lookup_stats["bloom_false_positive_rate"] = \
+            false_positives / (false_positives + true_negatives) if false_positives + true_negatives > 0 else 0.0
+
+        cache_stats = dict(self.lookup_cache.stats)
+        cache_stats["entries"] = len(self.lookup_cache)
+        lookup_stats["learned_nodes"] = len(self.routing_cache)
+        lookup_stats["suspects"] = len(self.suspicion)
+        if self.peer_rtt:
+            lookup_stats["mean_peer_rtt"] = sum(self.peer_rtt.values()) / len(self.peer_rtt)
+
+        return {
+            "storage": storage_stats,
+            "lookup": lookup_stats,
+            "lookup_cache": cache_stats,
+            "connections": self.connections.get_statistics()
+        }
+
+    def export_key_filter(self):
+        """Bloom filter of our keys to be sent to other nodes.
+
+        :return:
+            Dict with the bit array (raw bytes or base64 depending on the codec) and the number of hashes.
+        :rtype: dict
+        """
+        key_filter = self.storage.key_filter.export()
+        bits = key_filter.bits if self.binary_values else base64.b64encode(key_filter.bits).decode("ascii")
+        return {"bits": bits, "hashes": key_filter.hashes}
+
+    def store_peer_filter(self, node, key_filter):
+        """Remembers the Bloom filter received from a peer.
+
+        :param node: node dict of the peer
+        :param key_filter: filter as exported by :func:`export_key_filter`
+        """
+        try:
+            bits = key_filter["bits"]
+            if isinstance(bits, str):
+                bits = base64.b64decode(bits)
+            self.peer_filters[node["node_address"]] = (BloomFilter(bits, key_filter["hashes"]), time.monotonic())
+        except (KeyError, TypeError, ValueError) as ex:
+            self.log.warn("Ignoring invalid key filter of %s: %s", node["node_address"], ex)
+
+    def peer_might_contain(self, node, key):
+        """Checks if a peer might store the given key.
+
+        :return:
+            ``False`` if the peer's filter excludes the key, ``True`` if it might contain it and
+            ``None`` if no recent filter is known.
+        """
+        if node["node_id"] == self.id:
+            return self.storage.key_filter.might_contain(key)
+
+        cached = self.peer_filters.get(node["node_address"])
+        if cached is None or time.monotonic() - cached[1] > self.filter_max_age:
+            return None
+
+        return cached[0].might_contain(key)
+
+    def filter_refresh_due(self, node):
+        cached = self.peer_filters.get(node["node_address"])
+        return cached is None or time.monotonic() - cached[1] > self.filter_max_age / 2
+
     @staticmethod
     def generate_key(address):
         """
@@ -228,6 +408,8 @@ class Node(aiomas.Agent):
             yield from self.init_finger_table()
             self.bootup_finished = True
             yield from self.update_others()
+            if self.connection_prewarm != "none":
+                yield from self.prewarm_connections()
 
         else:
             # This is the bootstrap node
@@ -254,33 +436,108 @@ class Node(aiomas.Agent):
         # This is necessary that find_successor works correctly.
         yield from self.update_neighbors(initialization=True)
 
+        # Key ranges with a known responsible node, learned from our successor
+        known_ranges, contacts = yield from self.get_finger_hints()
+        lookups = 0
+
         # Retrieve successor node for each finger 0 -> m-1 (finger 0 is already retrieved from bootstrap node)
         for k in range(CHORD_FINGER_TABLE_SIZE - 1):
             finger = self.fingertable[k]
             finger_next = self.fingertable[k + 1]
 
-            if in_interval(finger_next["start"], self.id, finger["successor"]["node_id"], inclusive_left=True):
+            if finger["successor"] is not None and \
+                    in_interval(finger_next["start"], self.id, finger["successor"]["node_id"], inclusive_left=True):
                 self.log.info("Copy previous finger: %d in between [%d, %d)",
                               finger_next["start"],
                               self.id,
                               finger["successor"]["node_id"])
                 # Reuse previous finger
-                finger_next["successor"] = finger["successor"]
-            else:
-                self.log.info("Exceeding our successor, need a RPC.")
-                # TODO: validate data
-                # BUG: if only 2 nodes in network, the node being responsible for the requested start ID
-                #      is wrong because bootstrap node does not updated its table yet
-                finger_successor, status = yield from self.run_rpc_safe(self.bootstrap_address, "rpc_find_successor_rec",
-                                                                        finger_next["start"])
-                self.log.info("Node for %d: %s", finger_next["start"], finger_successor)
-                finger_next["successor"] = filter_node_response(finger_successor)
-
-        # Optimization for joining node (if not bootstrap node)
-        # - Find close node to myself (e.g., successor)
-        # - Request finger table and store temporary_entries
-        # - for each of my needed finger table starts, use closest entries and directly ask this node.
-        # - Fallback to node asked previously (or bootstrap node as last fallback) if node is not responding
+                self.set_finger(k + 1, finger["successor"])
+                continue
+
+            if self.predecessor is not None and \
+                    in_interval(finger_next["start"], self.predecessor["node_id"], self.id, inclusive_right=True):
+                # We are responsible ourselves. Other nodes might not know about us yet.
+                self.set_finger(k + 1, self.as_dict())
+                continue
+
+            finger_successor = known_ranges.get(finger_next["start"])
+            if finger_successor is None:
+                self.log.info("Exceeding known key ranges, need a RPC.")
+                lookups += 1
+                finger_successor = yield from self.lookup_finger_start(finger_next["start"], contacts)
+                if finger_successor is not None:
+                    known_ranges.put(finger_next["start"], finger_successor)
+                    contacts.append(finger_successor)
+            self.log.info("Node for %d: %s", finger_next["start"], finger_successor)
+            self.set_finger(k + 1, finger_successor)
+
+        self.log.info("Finger table initialized with %d lookups.", lookups)
+
+    @asyncio.coroutine
+    def get_finger_hints(self):
+        """Collects the key ranges whose responsible node is known from our successor and its tables.
+
+        Nothing lies between two consecutive nodes of the successor list. Likewise, no node lies in
+        ``[start, successor)`` of a finger of our successor. Only we could have joined in such a range
+        meanwhile, so ranges containing our ID are cut behind us.
+
+        :return: known ranges as :class:`LookupCache` and all nodes seen, to be contacted for lookups
+        """
+        known_ranges = LookupCache(maxEntries=2 * CHORD_FINGER_TABLE_SIZE, ttl=float("inf"))
+        successor = self.successor.get()
+        contacts = [successor]
+
+        # The successor list can contain the same node several times in small rings. Only the first
+        # occurrence is a consecutive node, so stop there.
+        seen = set()
+        low = (self.id + 1) % CHORD_RING_SIZE
+        for node in self.successor.list or [successor]:
+            if node["node_id"] == self.id or node["node_id"] in seen:
+                break
+            seen.add(node["node_id"])
+            known_ranges.put(node["node_id"], node, low=low)
+            low = (node["node_id"] + 1) % CHORD_RING_SIZE
+            contacts.append(node)
+
+        fingertable, status = yield from self.run_rpc_safe(successor["node_address"], "rpc_get_fingertable")
+        if status != 0:
+            self.log.warn("Finger table of our successor not available. Looking up all fingers.")
+            return known_ranges, contacts
+
+        for entry in fingertable:
+            node = filter_node_response(entry["successor"])
+            if node["node_id"] == self.id:
+                continue
+            low = entry["start"]
+            if self.id == low or (low != node["node_id"] and
+                                  in_interval(self.id, low, node["node_id"], inclusive_left=True)):
+                low = (self.id + 1) % CHORD_RING_SIZE
+            known_ranges.put(node["node_id"], node, low=low)
+            contacts.append(node)
+
+        return known_ranges, contacts
+
+    @asyncio.coroutine
+    def lookup_finger_start(self, start, contacts):
+        """Looks up the node responsible for a finger start, starting at the closest known node preceding it.
+
+        Falls back to the bootstrap node if the contacted node does not answer.
+
+        :param start: start of the finger
+        :param contacts: nodes known so far
+        :return: the responsible node or None
+        """
+        # Starts in (predecessor, us] are resolved before, as other nodes might not know about us yet
+        preceding = [node for node in contacts if in_interval(node["node_id"], self.id, start)]
+        closest = max(preceding, key=lambda node: (node["node_id"] - self.id) % CHORD_RING_SIZE, default=None)
+
+        for address in ([closest["node_address"]] if closest else []) + [self.bootstrap_address]:
+            finger_successor, status = yield from self.run_rpc_safe(address, "rpc_find_successor_rec", start)
+            if status == 0 and finger_successor.get("status", 0) == 0:
+                return filter_node_response(finger_successor)
+
+        return None
 
     def __generate_fingers(self, successor_reference):
         for k in range(0, CHORD_FINGER_TABLE_SIZE):
@@ -290,6 +547,7 @@ class Node(aiomas.Agent):
             }
             # TODO: add successor if not bootstrap node
             self.fingertable.append(entry)
+        self.invalidate_finger_index()
 
         self.log.debug("Default finger table: %s", str(self.fingertable)+"\n\n")
 
@@ -329,12 +587,34 @@ class Node(aiomas.Agent):
             self.log.info("For finger %d: origin_node is %s; successor was %s",
                           i, origin_node, self.fingertable[i]["successor"]["node_id"])
 
-            self.fingertable[i]["successor"] = origin_node
+            self.set_finger(i, origin_node)
+            self.note_ring_change(joined=origin_node)
             # Only forward to predecessor if it is not the peer that started this update cascade
             if self.predecessor["node_id"] != origin_node["node_id"]:
                 yield from self.run_rpc_safe(self.predecessor["node_address"],
                                              "rpc_update_finger_table", origin_node, i)
 
+    @asyncio.coroutine
+    def update_finger_table_batch(self, origin_node, indices):
+        """Like :func:`update_finger_table` for several fingers. Our predecessor is notified once
+        about all fingers that changed.
+        """
+        changed = []
+        for i in indices:
+            if in_interval(origin_node["node_id"], self.id, self.fingertable[i]["successor"]["node_id"]):
+                self.log.info("For finger %d: origin_node is %s; successor was %s",
+                              i, origin_node, self.fingertable[i]["successor"]["node_id"])
+                self.set_finger(i, origin_node)
+                changed.append(i)
+
+        if not changed:
+            return
+        self.note_ring_change(joined=origin_node)
+        # Only forward to predecessor if it is not the peer that started this update cascade
+        if self.predecessor is not None and self.predecessor["node_id"] != origin_node["node_id"]:
+            yield from self.run_rpc_safe(self.predecessor["node_address"],
+                                         "rpc_update_finger_table_batch", origin_node, changed)
+
     @asyncio.coroutine
     def update_neighbors(self, initialization=False):
         """ Update immediate neighbors.
@@ -452,30 +732,48 @@ class Node(aiomas.Agent):
     @asyncio.coroutine
     def update_others(self):
         """Update peers' finger table that should refer to our node and notify them.
+
+        Most fingers share the same few predecessors. Each distinct predecessor is notified once
+        with all its finger indices, up to ``self.update_fanout`` of them concurrently.
         """
-        for k in range(0, CHORD_FINGER_TABLE_SIZE):
-            id = (self.id - 2**k) % CHORD_RING_SIZE
-            # Find predecessor
-            successor = yield from self.find_successor(id, with_neighbors=True)
+        # Find predecessors of all fingers in one batched lookup
+        ids = [(self.id - 2**k) % CHORD_RING_SIZE for k in range(0, CHORD_FINGER_TABLE_SIZE)]
+        successors = yield from self.find_successors(ids, with_neighbors=True)
+        targets = {}    # node_address -> (node, finger indices)
+        for k, successor in enumerate(successors):
+            if successor is None or "predecessor" not in successor:
+                continue
             p = successor["predecessor"]
             # In rare cases with id exactly matching the node's key, successor is more correct to reduce hops.
             # Ex: 116 is looking for node 114 (finger 2), predecessor would be node 249 with successor 114
             #     In this case, finger in node 114 should be changed, too.
             # if p["successor"]["node_id"] == id:
             #     p = p["successor"]
-            self.log.info("Update peer: %s", p)
             if self.id != p["node_id"]:
-                yield from self.run_rpc_safe(p["node_address"], "rpc_update_finger_table",
-                                             self.as_dict(), k)
+                targets.setdefault(p["node_address"], (p, []))[1].append(k)
+
+        this_node = self.as_dict()
+        pending = set()
+        for address, (p, indices) in targets.items():
+            self.log.info("Update peer: %s (fingers %s)", p, indices)
+            if len(pending) >= self.update_fanout:
+                _, pending = yield from asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.Task(self.run_rpc_safe(address, "rpc_update_finger_table_batch",
+                                                       this_node, indices)))
+        if pending:
+            yield from asyncio.wait(pending)
 
     @asyncio.coroutine
     def fix_finger(self, finger_id=-1):
         """
         Resolves the responsible node for the given finger and updates it accordingly.
 
+        Following fingers whose start lies in ``(start, successor]`` are updated, too.
+
         :param finger_id:
             index of the finger table to update.
             The value should be between 0 and length of the finger table.
+        :return: True if the finger changed
         """
         if not (0 <= finger_id < len(self.fingertable)):
             raise IndexError("No valid finger ID.")
@@ -483,6 +781,8 @@ class Node(aiomas.Agent):
         cur_finger = self.fingertable[finger_id]
         successor = yield from self.find_successor(cur_finger["start"])
         print("For start %d, successor is '%s'" % (cur_finger["start"], successor))
+        if successor is not None and self.proximity_fingers and finger_id > 0:
+            successor = yield from self.select_proximate_finger(finger_id, successor)
 
         if successor is None:
             self.log.warn("No suitable node found for start %d. Do not update finger.", cur_finger["start"])
@@ -490,11 +790,130 @@ class Node(aiomas.Agent):
         elif successor != cur_finger["successor"]:
             self.log.info("Finger %d updated: successor is now %s (old: %s)",
                           finger_id, successor, cur_finger["successor"])
-            cur_finger["successor"] = filter_node_response(successor)
+            successor = filter_node_response(successor)
+            self.set_finger(finger_id, successor)
+            self.note_ring_change(joined=successor)
+
+            # No node lies in [start, successor), so it is the successor of these fingers as well
+            if successor["node_id"] != cur_finger["start"]:
+                for k in range(finger_id + 1, len(self.fingertable)):
+                    if not in_interval(self.fingertable[k]["start"], cur_finger["start"], successor["node_id"],
+                                       inclusive_right=True):
+                        break
+                    self.set_finger(k, successor)
+            return True
         # else:
         #     self.log.warn("Received successor for finger %d not fitting to ID ranges in finger table: %d not in [%d, %d)",
         #                   finger_id, successor["node_id"], cur_finger["start"], next_finger["start"])
 
+        return False
+
+    def get_finger_groups(self):
+        """First finger of each run of fingers with the same successor (finger 0 is managed by the successor list).
+
+        A new node in ``[start, successor)`` of a run changes its first finger. Nodes joining between runs
+        do not change any finger. So looking up the first finger of each run, O(log N) fingers,
+        keeps the whole table up to date.
+
+        :return: finger indices
+        """
+        groups = []
+        previous = None
+        for k in range(1, len(self.fingertable)):
+            successor = self.fingertable[k]["successor"]
+            if successor is None or previous is None or successor["node_id"] != previous["node_id"]:
+                groups.append(k)
+            previous = successor
+
+        return groups
+
+    @asyncio.coroutine
+    def fix_fingers(self):
+        """Refreshes the next ``self.fix_batch`` finger groups concurrently and adapts the batch size to the churn.
+        """
+        groups = self.get_finger_groups()
+        if not groups:
+            return
+
+        # Continue behind the last group fixed
+        first = next((i for i, k in enumerate(groups) if k > self.fix_next), 0)
+        batch = [groups[(first + i) % len(groups)] for i in range(min(self.fix_batch, len(groups)))]
+        self.fix_next = batch[-1]
+
+        tasks = [asyncio.Task(self.fix_finger(k)) for k in batch]
+        yield from asyncio.wait(tasks)
+        changes = 0
+        for k, task in zip(batch, tasks):
+            if task.exception():
+                self.log.error("Could not fix finger %d: %s", k, task.exception())
+            elif task.result():
+                changes += 1
+        self.stats["finger_fixes"] += len(tasks)
+        self.stats["finger_changes"] += changes
+
+        if changes > 0:
+            self.fix_batch = len(groups)
+        else:
+            self.fix_batch = max(self.fix_batch_min, self.fix_batch // 2)
+        self.log.info("Fixed fingers %s: %d changed, %d groups next time", batch, changes, self.fix_batch)
+
+    @asyncio.coroutine
+    def select_proximate_finger(self, finger_id, successor):
+        """
+        Chooses the node with the lowest round trip time among the nodes valid for a finger.
+
+        Any node in ``[start, next start)`` of the finger keeps the lookup correct and within
+        O(log N) hops. The candidates are the successor of the finger start and the nodes of its
+        successor list falling into this interval. Candidates without a known RTT are probed.
+
+        :param finger_id: index of the finger table to update
+        :param successor: the node responsible for the start of the finger
+        :return: the selected node
+        """
+        start = self.fingertable[finger_id]["start"]
+        end = self.fingertable[finger_id + 1]["start"] if finger_id + 1 < len(self.fingertable) else self.id
+
+        details, status = yield from self.run_rpc_safe(successor["node_address"], "rpc_get_node_info",
+                                                       successor_list=True)
+        if status != 0:
+            return successor
+
+        candidates = {successor["node_id"]: filter_node_response(successor)}
+        for node in details.get("successor_list", []):
+            if node["node_id"] != self.id and in_interval(node["node_id"], start, end, inclusive_left=True):
+                candidates.setdefault(node["node_id"], filter_node_response(node))
+        if len(candidates) == 1:
+            return successor
+
+        # Probe candidates we never talked to; unreachable ones are not selected
+        probes = {node_id: asyncio.Task(self.run_rpc_safe(node["node_address"], "rpc_get_node_info"))
+                  for node_id, node in candidates.items() if node["node_address"] not in self.peer_rtt}
+        if probes:
+            yield from asyncio.wait(probes.values())
+        for node_id, task in probes.items():
+            if task.result()[1] != 0:
+                del candidates[node_id]
+        if not candidates:
+            return successor
+
+        best = min(candidates.values(), key=lambda node: self.peer_rtt.get(node["node_address"], float("inf")))
+        current = self.fingertable[finger_id]["successor"]
+        if current["node_id"] in candidates and current["node_address"] in self.peer_rtt and \
+                self.peer_rtt[current["node_address"]] <= 1.2 * self.peer_rtt[best["node_address"]]:
+            # Avoid flapping between nodes of similar latency
+            best = current
+        if best["node_id"] != successor["node_id"]:
+            self.stats["proximity_fingers"] += 1
+            self.log.info("Finger %d: %s is closer than %s", finger_id, best, successor)
+
+        return best
+
+    def observe_rtt(self, remote_address, rtt):
+        """Adds a round trip time sample to the moving average of a peer.
+        """
+        average = self.peer_rtt.get(remote_address)
+        self.peer_rtt[remote_address] = rtt if average is None else average + self.rtt_alpha * (rtt - average)
+
     @asyncio.coroutine
     def update_successor_list(self):
         """Periodically checks availability of our successor peer, maintains a list of possible successors
@@ -506,10 +925,14 @@ class Node(aiomas.Agent):
         while len(self.successor.list) > 0:
             cur_successor = self.successor.get()
 
-            # Query our successor about its current successor list
+            # Query our successor about its current successor list.
+            # Its key filter is refreshed as well, before the cached one gets too old.
+            key_filter = self.filter_refresh_due(cur_successor)
             successor_details, status = yield from self.run_rpc_safe(cur_successor["node_address"], "rpc_get_node_info",
-                                                                     successor_list=True)
+                                                                     successor_list=True, key_filter=key_filter)
             if status == 0:
+                if "key_filter" in successor_details:
+                    self.store_peer_filter(cur_successor, successor_details["key_filter"])
                 # TODO: filter successor_details
                 self.successor.print_list()
 
@@ -527,6 +950,7 @@ class Node(aiomas.Agent):
                         # Linking to the new peer being our successor now.
                         print("update_successor_list] SPECIAL CASE: moved to new successor")
                         self.successor.set(filter_node_response(new_successor))
+                        self.note_ring_change(joined=new_successor)
                         self.successor.update_others(new_successor["successor_list"], ignore_key=self.id)
                         # Successor view must contain at least our previous successor in its list.
                         # Otherwise, this peer seems to behave strange
@@ -537,12 +961,14 @@ class Node(aiomas.Agent):
 
                 # Notify our successor here to accelerate the stabilization
                 yield from self.update_neighbors()
+                yield from self.replicate_to_successors()
 
                 break
 
             else:
                 # Try next successor as current one does not respond appropriate
                 self.log.info("Successor ID %d not responding. Trying next.", self.successor.get()["node_id"])
+                self.note_ring_change(failed=self.successor.get())
                 if len(self.successor.list) > 1:
                     self.successor.delete_first()
                 else:
@@ -566,12 +992,86 @@ class Node(aiomas.Agent):
         if status != 0 or \
                 (status == 0 and predecessor["successor"]["node_address"] != self.node_address):
             # Predecessor not reachable anymore or our predecessor does not reference us -> Clean up.
+            if status != 0:
+                self.note_ring_change(failed=self.predecessor)
             self.predecessor = None
+            self.predecessor_list = []
             self.log.warn("Removing invalid predecessor reference.")
+        elif self.replication_mode == "successors":
+            self.update_predecessor_list(predecessor.get("predecessor_list", []))
+            self.drop_stale_copies(self.get_replica_range_start())
+        elif self.successor_copy:
+            # We keep a copy of our predecessor's range, see :func:`synchronize_storage`
+            range_start = (predecessor.get("predecessor") or {}).get("node_id")
+            if isinstance(range_start, int):
+                self.drop_stale_copies(range_start)
+
+    def drop_stale_copies(self, range_start):
+        """Deletes the items outside of (range_start, this node] after the range moved.
+
+        Items of these keys are copies for nodes we are not a successor of anymore, e.g. after
+        a node joined between us and our predecessor.
+
+        :param range_start: start of the range (excluded) this node keeps items of
+        """
+        if range_start == self.id or range_start == self.copy_range_start:
+            return
+
+        self.copy_range_start = range_start
+        dropped = self.storage.split_storage_data_between(self.id, range_start)
+        if dropped:
+            self.log.info("Dropped copies of %d keys outside of our range.", len(dropped))
+
+    def update_predecessor_list(self, remote_list):
+        """Extends our predecessor by the predecessor list it published (successor replication).
+
+        The list holds ``replicationCount`` nodes, so that the ranges of all nodes we keep copies
+        for are known (see :func:`get_replica_range_start`).
+        """
+        try:
+            validate_rpc(remote_list, SCHEMA_PREDECESSOR_LIST)
+        except ValidationError as ex:
+            self.log.warn("Invalid predecessor list of %s: %s", self.predecessor["node_address"], str(ex))
+            remote_list = []
+
+        self.predecessor_list = [filter_node_response(self.predecessor)] + \
+            [filter_node_response(node) for node in remote_list[:self.replica.replicationCount - 1]]
+
+    def get_replica_range_start(self):
+        """Start of the key range (excluded) we store copies for (successor replication).
+
+        The copies belong to the ``replicationCount - 1`` nodes preceding us, so the range ends
+        at our predecessor and starts at the predecessor of the farthest of them. If this node
+        is not known yet (or the ring is small), copies of all keys except our own are accepted.
+
+        :return: node ID
+        :rtype: int
+        """
+        chain = self.predecessor_list
+        count = self.replica.replicationCount
+        if len(chain) < count or chain[0]["node_id"] != self.predecessor["node_id"] or \
+                any(node["node_id"] == self.id for node in chain[1:count]):
+            return self.id
+        return chain[count - 1]["node_id"]
+
+    def get_copy_range_start(self):
+        """Start of the key range (excluded) other nodes may push items of (see :func:`rpc_merkle_push`).
+
+        Besides our own range, this is the range we hold copies for in successor replication mode
+        or, if ``successor_copy`` is set, the range of our predecessor once its predecessor is known.
+
+        :return: node ID
+        :rtype: int
+        """
+        if self.replication_mode == "successors":
+            return self.get_replica_range_start()
+        if self.successor_copy and self.copy_range_start is not None:
+            return self.copy_range_start
+        return self.predecessor["node_id"]
 
     @asyncio.coroutine
-    def find_successor(self, node_id, with_neighbors=False):
-        """Wrapper for :func:`find_successor_rec` to clean responses.
+    def find_successor(self, node_id, with_neighbors=False, check_key=False, iterative=None, use_cache=False):
+        """Wrapper for :func:`find_successor_rec` and :func:`find_successor_iterative` to clean responses.
 
         :param node_id:
             Key ``node_id`` whose responsible successor is interesting.
@@ -580,19 +1080,113 @@ class Node(aiomas.Agent):
             If ``True``, the immediate successor and predecessor nodes augment the result of
             the responsible successor.
 
+        :param check_key:
+            If ``True``, the result contains ``key_present`` if the last hop knows a recent
+            Bloom filter of the responsible node. Only supported by recursive lookups.
+
+        :param iterative:
+            If ``True``, this node drives the lookup itself (see :func:`find_successor_iterative`).
+            Defaults to ``self.lookup_mode``.
+
+        :param use_cache:
+            If ``True``, a cached result is returned if available. It is marked with ``cached``.
+
         :return:
             Responsible successor node for given key ``node_id``.
         :rtype: dict or None
         """
-        result = yield from self.find_successor_rec(node_id, with_neighbors=with_neighbors)
+        if use_cache and not with_neighbors:
+            cached = self.lookup_cache.get(node_id)
+            if cached is not None:
+                result = cached.copy()
+                result["cached"] = True
+                return result
+
+        if self.use_iterative_lookup(iterative):
+            result = yield from self.find_successor_iterative(node_id, with_neighbors=with_neighbors)
+        else:
+            result = yield from self.find_successor_rec(node_id, with_neighbors=with_neighbors, check_key=check_key)
         # Check for problems during lookup
         if "status" in result and result["status"] != 0:
             self.log.warn("Could not resolve responsible peer. Err: %s", result)
             result = None
 
         result = filter_node_response(result, immediate_neighbors=with_neighbors)
+        self.cache_lookup_result(node_id, result)
+        if result is not None:
+            self.learn_node(result)
         return result
 
+    def cache_lookup_result(self, node_id, result):
+        """Remembers the responsible node of a successful lookup.
+
+        :param node_id: the key looked up
+        :param result: cleaned lookup result or None
+        """
+        if result is None:
+            return
+
+        low = None
+        if result.get("predecessor"):
+            # The node is responsible for the whole range after its predecessor
+            low = (result["predecessor"]["node_id"] + 1) % CHORD_RING_SIZE
+        self.lookup_cache.put(node_id, filter_node_response({"node_id": result["node_id"],
+                                                             "node_address": result["node_address"]}), low=low)
+
+    def invalidate_lookup(self, storage_node, response):
+        """Drops the cached lookup result of a node that answered "not responsible" or did not respond.
+
+        :param storage_node: the node used for a data request
+        :param response: its response (or the error of the request)
+        :return:
+            ``True`` if the node was taken from the cache, so the request should be repeated with
+            a fresh lookup.
+        :rtype: bool
+        """
+        if storage_node is None or response.get("message") not in ("not responsible", "storage node not responding"):
+            return False
+
+        cached = storage_node.get("cached", False)
+        self.lookup_cache.invalidate(storage_node["node_id"], stale=cached)
+        return cached
+
+    def note_ring_change(self, joined=None, failed=None):
+        """Invalidates cached lookup results affected by a node joining or failing.
+
+        :param joined: node dict of a new node taking over a part of a range
+        :param failed: node dict of a node that is gone
+        """
+        if joined is not None:
+            self.lookup_cache.invalidate_containing(joined["node_id"])
+        if failed is not None:
+            self.lookup_cache.invalidate(failed["node_id"])
+
+    def learn_node(self, node):
+        """Adds a node seen alive in the traffic to the routing cache.
+
+        :param node: node dict received from another node (not validated yet)
+        """
+        if isinstance(node, dict) and isinstance(node.get("node_id"), int) and \
+                isinstance(node.get("node_address"), str) and node["node_id"] != self.id:
+            self.routing_cache.add(node)
+
+    def learn_sender(self, sender):
+        """Validates the sender announced in a lookup RPC and learns it (see :func:`learn_node`).
+
+        :param sender: node dict of the requesting node or None
+        """
+        if sender is None:
+            return
+        validate_rpc(sender, SCHEMA_INCOMING_RPC["sender"])
+        # The sender supports the argument itself
+        self.sender_peers.add(sender["node_address"])
+        self.learn_node(sender)
+
+    def sender_args(self, address):
+        """Keyword arguments announcing us to a peer in lookup RPCs, if the peer accepts them.
+        """
+        return {"sender": self.as_dict()} if address in self.sender_peers else {}
+
     @asyncio.coroutine
     def find_successor_trace(self, node_id):
         """Wrapper for :func:`find_successor_rec` with trace log enabled for intermediate hops.
@@ -605,11 +1199,15 @@ class Node(aiomas.Agent):
         :rtype: dict or None
         """
         result = yield from self.find_successor_rec(node_id, tracing=True)
+        if result.get("status", 0) == 0:
+            self.cache_lookup_result(node_id, filter_node_response(result))
+            for hop in result.get("trace", []):
+                self.learn_node(hop)
         result = filter_node_response(result, trace_log=True)
         return result
 
     @asyncio.coroutine
-    def find_successor_rec(self, node_id, with_neighbors=False, tracing=False):
+    def find_successor_rec(self, node_id, with_neighbors=False, tracing=False, check_key=False):
         """Recursively locate the responsible node for a given ``node_id`` (key).
 
         This function is the heart of the Chord DHT.
@@ -624,6 +1222,9 @@ class Node(aiomas.Agent):
 
             This is useful if the predecessor of the responsible node is needed.
 
+        :param check_key:
+            If ``True``, the Bloom filter of the responsible node is checked for the key if known.
+
         :return:
             Responsible successor node for given key ``node_id``.
         """
@@ -640,6 +1241,10 @@ class Node(aiomas.Agent):
                     successor_details.update(filter_node_response(successor_neighborhood, immediate_neighbors=True))
 
                 successor_details["status"] = 0
+                if check_key:
+                    key_present = self.peer_might_contain(successor, node_id)
+                    if key_present is not None:
+                        successor_details["key_present"] = key_present
             else:
                 # Successor node is dead
                 successor_details.update({"status": 1, "message": "last hop not responding"})
@@ -661,13 +1266,18 @@ class Node(aiomas.Agent):
             this_node = self.as_dict()
             i = 1
 
+            # Only ask for the key check if needed, so that nodes without Bloom filters can still be part of the path
+            extra_args = {"check_key": True} if check_key else {}
+
             next_hop = self.get_closest_preceding_finger(node_id, fall_back=0)
             while next_hop != this_node:
                 print("[find_successor_rec] Closest finger node for %d: %s" % (node_id, next_hop))
 
                 # TODO: validate and check for None
+                extra_args.update(self.sender_args(next_hop["node_address"]))
                 peer_data, status = yield from self.run_rpc_safe(next_hop["node_address"], "rpc_find_successor_rec",
-                                                                 node_id, with_neighbors=with_neighbors, tracing=tracing)
+                                                                 node_id, with_neighbors=with_neighbors, tracing=tracing,
+                                                                 **extra_args)
                 if status == 0:
                     print("[find_successor_rec] Remote result for id %d: %s" % (node_id, peer_data))
 
@@ -755,10 +1365,253 @@ class Node(aiomas.Agent):
     #
     #     return selected_node
 
-    def get_closest_preceding_finger(self, node_id, fall_back=0, start_offset=CHORD_FINGER_TABLE_SIZE-1):
+    def use_iterative_lookup(self, iterative=None):
+        return self.lookup_mode == "iterative" if iterative is None else iterative
+
+    @asyncio.coroutine
+    def find_successor_iterative(self, node_id, with_neighbors=False):
+        """Locates the responsible node for ``node_id`` by querying the hops from this node.
+
+        In contrast to :func:`find_successor_rec`, each hop only returns its closest preceding fingers
+        for the key. Up to ``self.lookup_alpha`` of the known nodes closest to the key are queried in
+        parallel. A hop not answering within ``self.lookup_hop_timeout`` does not block the lookup:
+        another query is started in addition.
+
+        :param node_id:
+            Key ``node_id`` whose responsible successor is interesting.
+
+        :param with_neighbors:
+            If ``True``, the immediate successor and predecessor nodes augment the result of
+            the responsible successor.
+
+        :return:
+            Responsible successor node for given key ``node_id`` like :func:`find_successor_rec`.
+        :rtype: dict
+        """
+        successor = self.successor.get()
+        if in_interval(node_id, self.id, successor["node_id"], inclusive_right=True):
+            result = yield from self.find_successor_rec(node_id, with_neighbors=with_neighbors)
+            return result
+
+        def distance(node):
+            return (node_id - node["node_id"]) % CHORD_RING_SIZE
+
+        candidates = {}
+        for fall_back in range(self.lookup_alpha):
+            finger = self.get_closest_preceding_finger(node_id, fall_back=fall_back, count_stats=False)
+            if finger["node_id"] != self.id:
+                candidates[finger["node_id"]] = finger
+
+        queried = set()
+        pending = {}
+        stalled = set()
+        responsible = None
+        try:
+            while responsible is None and len(queried) < 2 * CHORD_FINGER_TABLE_SIZE:
+                # Query the closest unqueried candidates, slow queries do not occupy a slot
+                for node in sorted(candidates.values(), key=distance):
+                    if len(pending) - len(stalled) >= self.lookup_alpha:
+                        break
+                    if node["node_id"] not in queried:
+                        queried.add(node["node_id"])
+                        task = asyncio.Task(self.run_rpc_safe(node["node_address"], "rpc_get_closest_preceding_fingers",
+                                                              node_id, self.lookup_alpha,
+                                                              **self.sender_args(node["node_address"])))
+                        pending[task] = node
+
+                if not pending:
+                    break
+
+                done, _ = yield from asyncio.wait(pending.keys(), timeout=self.lookup_hop_timeout,
+                                                  return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    stalled.update(pending.keys())
+
+                for task in done:
+                    hop = pending.pop(task)
+                    stalled.discard(task)
+                    peer_data, status = task.result()
+                    if status != 0 or peer_data["status"] != 0:
+                        continue
+                    self.learn_node(hop)
+                    if "successor" in peer_data:
+                        responsible = peer_data["successor"]
+                        break
+                    for node in peer_data["nodes"]:
+                        # Only nodes closer to the key make progress
+                        if node["node_id"] != self.id and distance(node) < distance(hop):
+                            candidates.setdefault(node["node_id"], filter_node_response(node))
+        finally:
+            # Slower hops are not needed anymore, but cancelling them would break their connections
+            self.abandon_tasks(pending)
+
+        if responsible is None:
+            self.log.info("No suitable alternatives as next hop.")
+            return {"status": 1, "message": "no suitable alternatives found, giving up."}
+
+        # Check live of the responsible node like the last hop of a recursive lookup
+        successor_details = filter_node_response(responsible)
+        successor_neighborhood, status = yield from self.run_rpc_safe(successor_details["node_address"],
+                                                                      "rpc_get_node_info")
+        if status == 0:
+            if with_neighbors:
+                successor_details.update(filter_node_response(successor_neighborhood, immediate_neighbors=True))
+            successor_details["status"] = 0
+        else:
+            successor_details.update({"status": 1, "message": "last hop not responding"})
+
+        return successor_details
+
+    @asyncio.coroutine
+    def find_successors(self, node_ids, with_neighbors=False, iterative=None, use_cache=False):
+        """Wrapper for :func:`find_successors_batch_rec` to clean responses.
+
+        :param node_ids:
+            List of keys whose responsible successors are interesting.
+
+        :param with_neighbors:
+            If ``True``, the immediate successor and predecessor nodes augment the results.
+
+        :param iterative:
+            If ``True``, the keys are looked up by concurrent iterative lookups instead of a batch.
+            Defaults to ``self.lookup_mode``.
+
+        :param use_cache:
+            If ``True``, only keys without cached result are looked up (see :func:`find_successor`).
+
+        :return:
+            List of the responsible successor nodes in the order of ``node_ids``. Keys whose lookup
+            failed have the entry None.
+        :rtype: list
+        """
+        successors = [None] * len(node_ids)
+        missing = []
+        for index, node_id in enumerate(node_ids):
+            cached = self.lookup_cache.get(node_id) if use_cache and not with_neighbors else None
+            if cached is not None:
+                successors[index] = cached.copy()
+                successors[index]["cached"] = True
+            else:
+                missing.append(index)
+
+        missing_ids = [node_ids[index] for index in missing]
+        if not missing_ids:
+            results = []
+        elif self.use_iterative_lookup(iterative):
+            tasks = [asyncio.Task(self.find_successor_iterative(node_id, with_neighbors=with_neighbors))
+                     for node_id in missing_ids]
+            yield from asyncio.wait(tasks)
+            results = [task.result() for task in tasks]
+        else:
+            results = yield from self.find_successors_batch_rec(missing_ids, with_neighbors=with_neighbors)
+
+        for index, node_id, result in zip(missing, missing_ids, results):
+            if result.get("status", 0) != 0:
+                self.log.warn("Could not resolve responsible peer for %d. Err: %s", node_id, result)
+            else:
+                successors[index] = filter_node_response(result, immediate_neighbors=with_neighbors)
+                self.cache_lookup_result(node_id, successors[index])
+
+        return successors
+
+    @asyncio.coroutine
+    def find_successors_batch_rec(self, node_ids, with_neighbors=False):
+        """Locates the responsible nodes for several keys at once.
+
+        Keys our successor is responsible for are answered directly. The other keys are grouped by
+        their closest preceding finger and each group is forwarded in a single RPC. If a finger does
+        not respond, its keys are grouped again using less optimal fingers.
+
+        :param node_ids:
+            List of keys whose responsible successors are interesting.
+
+        :param with_neighbors:
+            If ``True``, the immediate successor and predecessor nodes augment the results.
+
+        :return:
+            List of results like :func:`find_successor_rec` in the order of ``node_ids``.
+        :rtype: list
+        """
+        results = [None] * len(node_ids)
+        successor = self.successor.get()
+
+        fall_backs = {}
+        local = []
+        for index, node_id in enumerate(node_ids):
+            if in_interval(node_id, self.id, successor["node_id"], inclusive_right=True):
+                local.append(index)
+            else:
+                fall_backs[index] = 0
+
+        if local:
+            # Check live of successor node once for all of its keys
+            successor_details = successor.copy()
+            successor_neighborhood, status = yield from self.run_rpc_safe(successor["node_address"], "rpc_get_node_info")
+            if status == 0:
+                if with_neighbors:
+                    successor_details.update(filter_node_response(successor_neighborhood, immediate_neighbors=True))
+                successor_details["status"] = 0
+            else:
+                successor_details.update({"status": 1, "message": "last hop not responding"})
+
+            for index in local:
+                results[index] = successor_details.copy()
+
+        this_node = self.as_dict()
+        while fall_backs:
+            # Group the keys by next hop
+            groups = {}
+            for index, fall_back in fall_backs.items():
+                next_hop = self.get_closest_preceding_finger(node_ids[index], fall_back=fall_back)
+                if next_hop == this_node:
+                    results[index] = {"status": 1, "message": "no suitable alternatives found, giving up."}
+                    continue
+                groups.setdefault(next_hop["node_address"], []).append(index)
+
+            tasks = {}
+            for address, indices in groups.items():
+                tasks[address] = asyncio.Task(self.run_rpc_safe(address, "rpc_find_successors_batch",
+                                                                [node_ids[index] for index in indices],
+                                                                with_neighbors=with_neighbors,
+                                                                **self.sender_args(address)))
+            if tasks:
+                yield from asyncio.wait(tasks.values())
+
+            retries = {}
+            for address, indices in groups.items():
+                peer_data, status = tasks[address].result()
+                if status == 0 and len(peer_data) == len(indices):
+                    for index, result in zip(indices, peer_data):
+                        results[index] = result
+                else:
+                    print("[find_successors_batch_rec] Remote '%s' failed for %d keys. Try next." %
+                          (address, len(indices)))
+                    for index in indices:
+                        retries[index] = fall_backs[index] + 1
+
+            fall_backs = retries
+
+        return results
+
+    def set_finger(self, finger_id, node):
+        """Sets the successor of a finger. All changes of fingers must go through here (or notify
+        :func:`invalidate_finger_index`) to keep the finger index consistent.
+        """
+        self.fingertable[finger_id]["successor"] = node
+        self.finger_index_dirty = True
+
+    def invalidate_finger_index(self):
+        self.finger_index_dirty = True
+
+    def get_closest_preceding_finger(self, node_id, fall_back=0, count_stats=True):
         """
         Find closest preceding finger within m -> 0 fingers.
 
+        The distinct finger nodes are kept sorted by their distance to this node in
+        :class:`FingerIndex`, so the lookup is a bisection instead of a scan of all fingers.
+        A node of the routing cache is preferred if it is closer to ``node_id`` than all fingers.
+        Peers suspected to be dead are skipped as long as an unsuspected alternative exists.
+
         :param node_id:
             node ID as an integer.
 
@@ -766,37 +1619,135 @@ class Node(aiomas.Agent):
             chooses less optimal finger nodes if value increases.
 
             This allows to find a slower, but still working lookup although the best matching finger
-            is not responding anymore.
+            is not responding anymore. The value i selects the i-th next distinct finger node.
             In the worst case, this function falls back to this node itself. For example, this is the
             case if our immediate successor is responsible for all of our fingers, but does not respond
             to requests done previously.
 
+        :param count_stats:
+            ``False`` if the node is only one of several candidates and not necessarily the next hop.
+
         :return:
             returns the interesting node descriptor as a dictionary with successor and predecessor.
         :rtype: dict
         """
-        prev_successor = None
-
-        for k in range(start_offset, -1, -1):
-            finger = self.fingertable[k]
-            finger_successor = self.fingertable[k]["successor"]
-            self.log.debug("Iterate finger %d: %d in %s", k, node_id, self.fingertable[k])
-
-            # Alternative: find entry with node_id > finger["start"] and already contact this node.
-            # In all cases, it will fall back to a less optimal predecessor if this node does not respond.
-            # Advantage: can reduce hops to a destination and is more stable in our 8-bit fingers test environment.
-            # if in_interval(finger["start"], self.id, node_id, inclusive_right=True):
-            if in_interval(finger_successor["node_id"], self.id, node_id):
+        if self.finger_index_dirty:
+            self.finger_index.rebuild(self.id, self.fingertable)
+            self.finger_index_dirty = False
+
+        # A learned node closer to the key than all fingers is the best choice
+        learned = self.routing_cache.closest_preceding(self.id, node_id)
+        if learned is not None and learned["node_address"] not in self.suspicion:
+            best_finger = self.finger_index.closest_preceding(self.id, node_id)
+            if best_finger is None or \
+                    (learned["node_id"] - self.id) % CHORD_RING_SIZE > (best_finger["node_id"] - self.id) % CHORD_RING_SIZE:
                 if fall_back == 0:
-                    return finger_successor
-                else:
-                    if prev_successor is not None and prev_successor != finger_successor["node_address"]:
-                        fall_back -= 1
+                    if count_stats:
+                        self.stats["learned_hops"] += 1
+                    return learned
+                fall_back -= 1
+
+        finger_successor = self.finger_index.closest_preceding(self.id, node_id, fall_back=fall_back)
+        # Skip suspected peers instead of waiting for their timeout. If all remaining ones are suspected,
+        # the suspicion might be wrong and the original choice is tried.
+        skipped = 0
+        candidate = finger_successor
+        while candidate is not None and candidate["node_address"] in self.suspicion:
+            skipped += 1
+            candidate = self.finger_index.closest_preceding(self.id, node_id, fall_back=fall_back + skipped)
+        if candidate is not None:
+            if count_stats:
+                self.stats["suspect_skips"] += skipped
+            finger_successor = candidate
+
+        return finger_successor or self.as_dict()
 
-                    prev_successor = finger_successor["node_address"]
-                    continue
+    @asyncio.coroutine
+    def prewarm_connections(self):
+        """Connects to our successors (and fingers) in advance, so that the first requests do not pay for it.
+        """
+        nodes = list(self.successor.list)
+        if self.connection_prewarm == "fingers":
+            nodes += [finger["successor"] for finger in self.fingertable if finger["successor"] is not None]
+        addresses = {node["node_address"] for node in nodes if node["node_id"] != self.id}
+        addresses = [address for address in addresses if address not in self.connections]
+        if not addresses:
+            return
+
+        tasks = [asyncio.Task(self.get_peer(address)) for address in addresses]
+        yield from asyncio.wait(tasks)
+        failed = sum(1 for task in tasks if task.exception())
+        self.log.info("Prewarmed %d connections (%d failed).", len(tasks) - failed, failed)
+
+    @asyncio.coroutine
+    def get_peer(self, remote_address):
+        """Remote agent proxy of a peer, from the connection pool if possible.
+
+        Concurrent requests to a peer that is not pooled yet wait for the same connection attempt.
+        """
+        remote_peer = self.connections.get(remote_address)
+        if remote_peer is None:
+            if remote_address in self.connections:
+                # Idle for too long: the connection might have been closed by the peer meanwhile
+                self.drop_connection(remote_address)
+            connecting = self.connecting.get(remote_address)
+            if connecting is None:
+                connecting = asyncio.Task(self.open_connection(remote_address))
+                self.connecting[remote_address] = connecting
+                connecting.add_done_callback(lambda task: self.connecting.pop(remote_address, None))
+            remote_peer = yield from asyncio.wait_for(asyncio.shield(connecting), timeout=self.network_timeout)
+
+        return remote_peer
+
+    @asyncio.coroutine
+    def open_connection(self, remote_address):
+        """Connects to a peer and adds the connection to the pool.
+
+        The connection belongs to this node and is not shared with other agents of the container,
+        so that it can be closed once it is evicted from the pool.
+
+        :return: remote agent proxy
+        """
+        addr, agent_id = aiomas_parse_url(remote_address)
+        started = time.monotonic()
+        rpc_con = yield from aiomas.rpc.open_connection(addr, codec=self.rpc_codec)
+        try:
+            if (yield from rpc_con.remote.validate_aid(agent_id)) is None:
+                raise ConnectionError("Agent %s does not exist." % remote_address)
+        except Exception:
+            rpc_con.close()
+            raise
+        remote_peer = getattr(rpc_con.remote.agents, agent_id)
+
+        # Only replaced if the pool is disabled
+        self.drop_connection(remote_address, evict=False)
+        self.channels[remote_address] = rpc_con
+        for address in self.connections.add(remote_address, remote_peer, time.monotonic() - started):
+            self.drop_connection(address, evict=False)
+
+        return remote_peer
 
-        return self.as_dict()
+    def drop_connection(self, remote_address, evict=True):
+        """Closes the connection to a peer, so that the next RPC opens a new one.
+
+        :param evict: remove the peer from the connection pool (False if already done)
+        """
+        if evict:
+            self.connections.evict(remote_address)
+
+        rpc_con = self.channels.pop(remote_address, None)
+        if rpc_con is not None:
+            try:
+                rpc_con.close()
+            except Exception as ex:
+                # Usually already broken
+                self.log.debug("Error closing connection: %s", ex)
+
+    def close_connections(self):
+        """Closes all connections of the pool, e.g. on shutdown.
+        """
+        for address in list(self.channels):
+            self.drop_connection(address)
 
     @asyncio.coroutine
     def stabilize(self):
@@ -813,85 +1764,715 @@ class Node(aiomas.Agent):
             self.print_finger_table()
             self.log.info("[This node] %s", self.as_dict())
             print("Stored entries: ", len(self.storage.data))
+            self.log.debug("Statistics: %s", self.get_statistics())
 
             # Assure that successor still references us as immediate predecessor
             yield from self.update_successor_list()
             # yield from self.update_neighbors()  # called in update_successor_list
-            # Update fingers 1 -> m one after each other (finger[0] managed by update_successor)
-            self.fix_next = max(1, (self.fix_next + 1) % CHORD_FINGER_TABLE_SIZE)
-            yield from self.fix_finger(self.fix_next)
+            # Update distinct groups of fingers 1 -> m (finger[0] managed by update_successor)
+            yield from self.fix_fingers()
+            # Close connections that were not used for a while
+            for address in self.connections.expired():
+                self.drop_connection(address)
+            # Probe suspected peers without delaying the stabilization
+            for address in self.suspicion.due_probes():
+                asyncio.Task(self.run_rpc_safe(address, "rpc_get_node_info"))
             # Check predecessor and remove reference if wrong
             yield from self.check_predecessor()
+            # Drop storage items whose time to live has expired
+            yield from self.expire_storage()
+            # Reconcile the data of our key range with our successor
+            yield from self.synchronize_storage()
+            # Sync the storage journal and write a snapshot if due. The file operations run in a thread.
+            if self.storage.journal:
+                work = self.storage.journal.begin_maintenance(self.storage)
+                if work is not None:
+                    yield from asyncio.get_event_loop().run_in_executor(None, work)
 
+    @asyncio.coroutine
+    def expire_storage(self):
+        """Evicts expired items from the storage in bounded slices.
+
+        After each slice of ``expiry_slice`` items, control is handed back to the event loop.
+        Like this, a large number of items expiring at the same time does not delay pending requests.
+        """
+        while self.storage.clean_old(maxItems=self.expiry_slice) >= self.expiry_slice:
+            yield from asyncio.sleep(0)
 
     @asyncio.coroutine
-    def put_data(self, key, data, ttl, replication_count=-1):
-        replica = Replica(CHORD_RING_SIZE)
+    def synchronize_storage(self):
+        """Anti-entropy for the key range this node is responsible for.
+
+        Our immediate successor takes over our keys if we fail. Therefore, it keeps a copy of them
+        in successor replication mode or if ``successor_copy`` is set. Otherwise, there is nothing to reconcile.
+        Copies are dropped again once the successor has another predecessor (see :func:`drop_stale_copies`).
+
+        Both nodes compare the Merkle tree hashes of the range (predecessor, this node] top-down.
+        Differing partitions are split into ``SYNC_FANOUT`` sub-ranges until a range holds at most
+        ``sync_max_keys`` keys. The digests of these keys are compared and only the values of differing
+        keys are exchanged. At most ``sync_max_ranges`` differing ranges are followed per level and
+        at most ``sync_max_bytes`` of values are exchanged per call to bound the used bandwidth.
+        """
+        successor = self.successor.get()
+        if self.predecessor is None or successor["node_id"] == self.id or \
+                not (self.replication_mode == "successors" or self.successor_copy):
+            return
 
-        keys = replica.get_key_list(key, replicationCount=replication_count)
+        key_left, key_right = self.predecessor["node_id"], self.id
+        merkle = self.storage.merkle
 
-        print("\n\n\n\nPUT KEYS ARE ", keys)  # [197, 210, 70]
-        successes = 0
-        for keyWithReplicaIndex in keys:
-            storage_node = yield from self.find_successor(keyWithReplicaIndex)
-            print("Found successor for storage: ", storage_node)
+        # Descend the tree level by level and follow only differing subtrees
+        nodes = [1]
+        ranges = []
+        while nodes:
+            remote, status = yield from self.run_rpc_safe(successor["node_address"], "rpc_get_merkle_hashes",
+                                                          key_left, key_right, nodes)
+            if status != 0 or remote["status"] != 0:
+                return
 
-            if storage_node["node_id"] == self.id:
-                self.storage.put(keyWithReplicaIndex, data, ttl=ttl)
-                successes += 1
-            else:
-                # Directly connect to remote peer and store it there
-                # TODO: validate
-                result, status = yield from self.run_rpc_safe(storage_node["node_address"],
-                                                              "rpc_dht_put_data", keyWithReplicaIndex, data, ttl)
-                if result["status"] == 0:
+            local_hashes = self.storage.merkle_hashes(key_left, key_right, nodes)
+            next_nodes = []
+            for node, local_hash, remote_hash in zip(nodes, local_hashes, remote["hashes"]):
+                if local_hash == remote_hash:
+                    continue
+                if merkle.is_leaf(node):
+                    ranges.extend(self.storage.leaf_ranges(key_left, key_right, node - merkle.leafCount))
+                else:
+                    next_nodes.extend([2 * node, 2 * node + 1])
+
+            nodes = next_nodes[:2 * self.sync_max_ranges]
+
+        # Split differing ranges until their keys can be compared one by one
+        fetch, push = [], []
+        ranges = ranges[:self.sync_max_ranges]
+        while ranges:
+            remote, status = yield from self.run_rpc_safe(successor["node_address"], "rpc_get_merkle_ranges",
+                                                          ranges, self.sync_max_keys)
+            if status != 0 or remote["status"] != 0:
+                return
+
+            next_ranges = []
+            for (low, high), summary in zip(ranges, remote["ranges"]):
+                if "keys" in summary:
+                    local_keys = dict(map(tuple, self.storage.key_digests(low, high)))
+                    remote_keys = dict(map(tuple, summary["keys"]))
+                    fetch.extend(key for key, digest in remote_keys.items() if local_keys.get(key) != digest)
+                    push.extend(key for key in local_keys if key not in remote_keys)
+                elif summary["digest"] != self.storage.range_digest(low, high)[0]:
+                    next_ranges.extend(self.storage.split_range(low, high, SYNC_FANOUT))
+
+            ranges = next_ranges[:self.sync_max_ranges]
+
+        # Exchange the values of the differing keys
+        budget = self.sync_max_bytes
+        codec = self.rpc_codec()
+        only_remote, only_local = [], []
+        if fetch:
+            fetch = sorted(fetch)[:SYNC_MAX_REQUEST]
+            remote, status = yield from self.run_rpc_safe(successor["node_address"], "rpc_get_merkle_values",
+                                                          fetch, budget)
+            if status != 0 or remote["status"] != 0:
+                return
+
+            budget -= len(codec.encode(remote["storage"]))
+            only_remote, only_local = self.storage.diff_keys(fetch[:remote["keys"]], remote["storage"])
+        only_local.extend(self.storage.serialize({key: self.storage.get_items(key) for key in push}))
+
+        records = []
+        for record in only_local:
+            budget -= len(codec.encode(record))
+            if budget < 0:
+                break
+            records.append(record)
+
+        self.log.info("Anti-entropy with %s: %d items received, %d items sent.",
+                      successor["node_address"], len(only_remote), len(records))
+        if only_remote:
+            self.storage.merge(only_remote)
+        if records:
+            yield from self.run_rpc_safe(successor["node_address"], "rpc_merkle_push", records)
+
+    @asyncio.coroutine
+    def put_data(self, key, data, ttl, replication_count=-1, write_quorum=None, iterative=None):
+        """Stores data on all replicas of ``key`` in parallel.
+
+        Returns as soon as ``write_quorum`` replicas acknowledged the write (or the quorum cannot
+        be reached anymore). Remaining writes continue in the background.
+
+        :param write_quorum:
+            Number of successful replica writes required. Defaults to ``self.write_quorum``.
+
+        :param iterative:
+            Lookup mode for the storage nodes (see :func:`find_successor`).
+
+        :return:
+            Status, number of successes and the result per replica key. The status of replicas
+            that did not finish yet is ``None``.
+        :rtype: dict
+        """
+        if not self.binary_values:
+            data = base64.b64encode(data).decode('utf-8')
+        else:
+            data = bytes(data)
+
+        if self.replication_mode == "successors":
+            result = yield from self.put_data_successors(key, data, ttl, replication_count, write_quorum, iterative)
+            return result
+
+        keys = self.replica.get_key_list(key, replicationCount=replication_count)
+        quorum = min(write_quorum or self.write_quorum, len(keys))
+
+        print("\n\n\n\nPUT KEYS ARE ", keys)  # [197, 210, 70]
+        # Resolve the storage nodes of all replica keys in one batched lookup
+        storage_nodes = yield from self.find_successors(keys, iterative=iterative, use_cache=True)
+        tasks = [asyncio.Task(self.put_replica_data(keyWithReplicaIndex, data, ttl, storage_node, iterative))
+                 for keyWithReplicaIndex, storage_node in zip(keys, storage_nodes)]
+        for keyWithReplicaIndex, task in zip(keys, tasks):
+            self.writes_in_flight[keyWithReplicaIndex, data] += 1
+            task.add_done_callback(lambda task, write=(keyWithReplicaIndex, data): self.finish_write(write))
+        pending = set(tasks)
+        successes = failures = 0
+        while pending and successes < quorum and len(keys) - failures >= quorum:
+            done, pending = yield from asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.result()["status"] == 0:
                     successes += 1
                 else:
-                    pass  # TODO: FAIL MESSAGE
+                    failures += 1
+
+        replicas = [task.result() if task.done() else {"replica_key": keyWithReplicaIndex, "status": None}
+                    for keyWithReplicaIndex, task in zip(keys, tasks)]
 
         print("\n\n\n\PUTS OK: ", successes)
-        if successes >= 1:
+        if successes >= max(quorum, 1):
             return {
                 "status": 0,
-                "successes": successes
+                "successes": successes,
+                "replicas": replicas
             }
         else:
             return {
                 "status": 1,
                 "successes": successes,
+                "replicas": replicas,
                 "message": "Data could not be saved."
             }
 
+    def finish_write(self, write):
+        self.writes_in_flight[write] -= 1
+        if self.writes_in_flight[write] <= 0:
+            del self.writes_in_flight[write]
+
     @asyncio.coroutine
-    def get_data(self, key, replication_count=-1):
-        replica = Replica(CHORD_RING_SIZE)
-        keys = replica.get_key_list(key, replicationCount=replication_count)  # 3 is the replications that are tried before abort
+    def put_data_successors(self, key, data, ttl, replication_count=-1, write_quorum=None, iterative=None):
+        """Stores data on the node responsible for ``key``, which copies it to its successors.
 
-        for keyWithReplicaIndex in keys:
-            storage_node = yield from self.find_successor(keyWithReplicaIndex)
-            print("got storage_node:", storage_node)
+        Only one lookup is needed. The responsible node pushes the copies to its successors in parallel.
 
-            if storage_node.get("node_id") == self.id:
-                # Note the case that this node received the responsibility for a failed node.
-                # Given that the missing data might not be available on this node, continue the replica loop.
-                result = self.rpc_dht_get_data(keyWithReplicaIndex)
-                print("[rpc_dht_get_data] Result is:", result)
-                if result["status"] == 0:
-                    return result
+        :return:
+            Status, number of successes and the result per copy.
+        :rtype: dict
+        """
+        replication_count = self.replica.replicationCount if replication_count == -1 else replication_count
+        quorum = max(min(write_quorum or self.write_quorum, replication_count), 1)
 
+        for use_cache in (True, False):
+            storage_node = yield from self.find_successor(key, iterative=iterative, use_cache=use_cache)
+            print("Found successor for storage: ", storage_node)
+            if storage_node is None:
+                replicas = []
+                break
+            elif storage_node["node_id"] == self.id:
+                replicas = yield from self.store_with_successor_replicas(key, data, ttl, replication_count - 1)
+                break
+
+            # TODO: validate
+            response, status = yield from self.run_rpc_safe(storage_node["node_address"], "rpc_dht_put_data",
+                                                             key, data, ttl, replicas=replication_count - 1)
+            if status != 0:
+                response = {"status": 1, "message": "storage node not responding"}
+            if "replicas" in response:
+                replicas = response["replicas"]
             else:
-                # Directly connect to remote peer and fetch data from there
-                # TODO: validate
-                result, status = yield from self.run_rpc_safe(storage_node.get("node_address"),
-                                                              "rpc_dht_get_data", keyWithReplicaIndex)
-                if status == 0 and result["status"] == 0:
-                    return result
-                else:
-                    print("result ERROR", result)
+                replicas = [{"node_id": storage_node["node_id"], "status": response["status"]}]
+                if "message" in response:
+                    replicas[0]["message"] = response["message"]
+
+            # Repeat with a fresh lookup if the cached node was wrong
+            if response["status"] == 0 or not self.invalidate_lookup(storage_node, response):
+                break
+
+        successes = sum(1 for replica in replicas if replica["status"] == 0)
+        if successes >= quorum:
+            return {
+                "status": 0,
+                "successes": successes,
+                "replicas": replicas
+            }
+        else:
+            return {
+                "status": 1,
+                "successes": successes,
+                "replicas": replicas,
+                "message": "Data could not be saved."
+            }
+
+    @asyncio.coroutine
+    def store_with_successor_replicas(self, key, data, ttl, replicas):
+        """Stores the primary copy of a value and pushes copies to the first ``replicas`` successors.
+
+        :return:
+            List with the status per copy, starting with the local one.
+        :rtype: list
+        """
+        if not self.storage.put(key, data, ttl=ttl):
+            self.log.warn("Value for key %d exceeds the storage budget of this node.", key)
+            return [{"node_id": self.id, "status": 1, "message": "storage budget exceeded"}]
+
+        results = [{"node_id": self.id, "status": 0}]
+        targets = [successor for successor in self.successor.list[:replicas] if successor["node_id"] != self.id]
+        tasks = [asyncio.Task(self.run_rpc_safe(target["node_address"], "rpc_dht_put_replica", key, data, ttl))
+                 for target in targets]
+        if tasks:
+            yield from asyncio.wait(tasks)
+
+        for target, task in zip(targets, tasks):
+            response, status = task.result()
+            results.append({"node_id": target["node_id"], "status": response["status"] if status == 0 else 1})
+
+        return results
+
+    @asyncio.coroutine
+    def replicate_to_successors(self):
+        """Copies our key range to successors that recently became replica holders (successor replication).
+
+        The successor list changes if nodes join or fail. New successors within the replication
+        factor receive all items of (predecessor, this node].
+        """
+        if self.replication_mode != "successors" or self.predecessor is None:
+            return
+
+        targets = [successor for successor in self.successor.list[:self.replica.replicationCount - 1]
+                   if successor["node_id"] != self.id]
+        holders = set(target["node_id"] for target in targets if target["node_id"] in self.replica_holders)
+        records = None
+        for target in targets:
+            if target["node_id"] in holders:
+                continue
+            if records is None:
+                records = self.storage.serialize(self.storage.get_storage_data_between(self.predecessor["node_id"],
+                                                                                       self.id))
+            response, status = yield from self.run_rpc_safe(target["node_address"], "rpc_merkle_push", records)
+            if status == 0 and response["status"] == 0:
+                holders.add(target["node_id"])
+
+        self.replica_holders = holders
+
+    @asyncio.coroutine
+    def put_replica_data(self, key, data, ttl, storage_node=None, iterative=None, use_cache=True):
+        """Stores data under a single replica key on the node responsible for it.
+
+        :param storage_node:
+            The responsible node if already known. Otherwise, it is looked up.
+
+        :param use_cache:
+            If ``True``, the node may be taken from the lookup cache.
+
+        :return:
+            Dict with the replica key, the storing node and the status (0 on success).
+        :rtype: dict
+        """
+        result = {"replica_key": key, "status": 1}
+        if storage_node is None:
+            storage_node = yield from self.find_successor(key, iterative=iterative, use_cache=use_cache)
+        print("Found successor for storage: ", storage_node)
+        if storage_node is None:
+            result["message"] = "responsible node not found"
+            return result
+
+        result["node_id"] = storage_node["node_id"]
+        if storage_node["node_id"] == self.id:
+            if self.storage.put(key, data, ttl=ttl):
+                result["status"] = 0
+            else:
+                result["message"] = "storage budget exceeded"
+        else:
+            # Directly connect to remote peer and store it there
+            # TODO: validate
+            response, status = yield from self.run_rpc_safe(storage_node["node_address"],
+                                                            "rpc_dht_put_data", key, data, ttl)
+            if status == 0:
+                result["status"] = response["status"]
+                if "message" in response:
+                    result["message"] = response["message"]
+            else:
+                result["message"] = "storage node not responding"
+
+        if result["status"] != 0 and self.invalidate_lookup(storage_node, result):
+            # The cached node was wrong
+            result = yield from self.put_replica_data(key, data, ttl, iterative=iterative, use_cache=False)
+
+        return result
+
+    @asyncio.coroutine
+    def get_data(self, key, replication_count=-1, read_mode=None, iterative=None):
+        """Fetches the values stored under ``key`` from its replicas.
+
+        :param read_mode:
+            ``sequential`` asks one replica after the other. ``hedged`` additionally asks the next
+            replica if no answer arrived within :func:`get_hedge_delay`. ``quorum`` asks all replicas
+            and merges the values of ``self.read_quorum`` answers.
+            Defaults to ``self.read_mode``.
+
+        :param iterative:
+            Lookup mode for the storage nodes (see :func:`find_successor`).
+
+        :return:
+            Status and list of values.
+        :rtype: dict
+        """
+        if self.replication_mode == "successors":
+            result = yield from self.get_data_successors(key, replication_count, iterative)
+            return result
+
+        keys = self.replica.get_key_list(key, replicationCount=replication_count)  # 3 is the replications that are tried before abort
+        read_mode = read_mode or self.read_mode
+        if read_mode == "quorum":
+            result = yield from self.get_data_quorum(keys, iterative)
+            return result
+
+        # Replicas whose holder's Bloom filter excludes the key are only asked if no other replica has the data.
+        # The filter might be outdated, so they are not skipped completely.
+        deferred = []
+        # Holders that answered without values are repaired if another replica has them
+        misses = []
+        if read_mode == "hedged":
+            result = yield from self.get_data_hedged(keys, deferred, misses, iterative)
+        else:
+            result = yield from self.get_data_sequential(keys, deferred, misses, iterative)
+        if result is not None:
+            self._count_skipped_gets(deferred)
+            self.schedule_read_repair(result, misses)
+            return result
+
+        for keyWithReplicaIndex, storage_node in deferred:
+            result = yield from self.get_replica_data(keyWithReplicaIndex, storage_node)
+            if result["status"] == 0:
+                self.stats["bloom_stale"] += 1
+                self.schedule_read_repair(result, misses)
+                return result
 
         # Lookup was not successful. Try locating other replica.
         return {"status": 1, "data": []}
 
+    @asyncio.coroutine
+    def get_data_successors(self, key, replication_count=-1, iterative=None):
+        """Asks the node responsible for ``key`` and then its successors (successor replication).
+
+        :return:
+            Status and list of values.
+        :rtype: dict
+        """
+        replication_count = self.replica.replicationCount if replication_count == -1 else replication_count
+
+        node_id = key
+        misses = []
+        for i in range(replication_count):
+            storage_node = yield from self.find_successor(node_id, iterative=iterative, use_cache=i == 0)
+            if storage_node is None:
+                break
+
+            result = yield from self.get_replica_data(key, storage_node, replica=i > 0)
+            if result["status"] != 0 and self.invalidate_lookup(storage_node, result):
+                # The cached node was wrong
+                storage_node = yield from self.find_successor(node_id, iterative=iterative)
+                if storage_node is None:
+                    break
+                result = yield from self.get_replica_data(key, storage_node)
+            if result["status"] == 0:
+                self.schedule_read_repair(result, misses)
+                return result
+            elif "data" in result:
+                misses.append((key, storage_node))
+
+            # Next copy is on the following node
+            node_id = (storage_node["node_id"] + 1) % CHORD_RING_SIZE
+            if storage_node["node_id"] == self.id and self.successor.get()["node_id"] == self.id:
+                break
+
+        return {"status": 1, "data": []}
+
+    @asyncio.coroutine
+    def get_data_sequential(self, keys, deferred, misses, iterative=None):
+        """Asks the replicas one after the other.
+
+        :param deferred: list to append ``(key, storage_node)`` of replicas skipped due to Bloom filters
+        :param misses: list to append ``(key, storage_node)`` of replicas answering without values
+        :return:
+            Response of the first replica with data or None.
+        """
+        for keyWithReplicaIndex in keys:
+            result, storage_node = yield from self.read_replica(keyWithReplicaIndex, iterative=iterative)
+            if result is None:
+                deferred.append((keyWithReplicaIndex, storage_node))
+            elif result["status"] == 0:
+                return result
+            elif "data" in result:
+                misses.append((keyWithReplicaIndex, storage_node))
+
+        return None
+
+    @asyncio.coroutine
+    def get_data_hedged(self, keys, deferred, misses, iterative=None):
+        """Asks the first replica and hedges to the next one if there is no answer in time.
+
+        A replica failing early starts the next one immediately. Requests still running when one
+        replica returned data are left to finish in the background (see :func:`abandon_tasks`).
+
+        :param deferred: list to append ``(key, storage_node)`` of replicas skipped due to Bloom filters
+        :param misses: list to append ``(key, storage_node)`` of replicas answering without values
+        :return:
+            Response of the first replica with data or None.
+        """
+        remaining = list(keys)
+        replica_keys = {}
+        pending = set()
+        try:
+            while remaining or pending:
+                if remaining:
+                    keyWithReplicaIndex = remaining.pop(0)
+                    task = asyncio.Task(self.read_replica(keyWithReplicaIndex, iterative=iterative))
+                    replica_keys[task] = keyWithReplicaIndex
+                    pending.add(task)
+
+                timeout = self.get_hedge_delay() if remaining else None
+                done, pending = yield from asyncio.wait(pending, timeout=timeout,
+                                                        return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.stats["hedged_reads"] += 1
+
+                for task in done:
+                    result, storage_node = task.result()
+                    if result is None:
+                        deferred.append((replica_keys[task], storage_node))
+                    elif result["status"] == 0:
+                        return result
+                    elif "data" in result:
+                        misses.append((replica_keys[task], storage_node))
+
+            return None
+        finally:
+            self.abandon_tasks(pending)
+
+    @asyncio.coroutine
+    def get_data_quorum(self, keys, iterative=None):
+        """Asks all replicas and merges the values of the first ``self.read_quorum`` answers.
+
+        Answers of responsible nodes without values count for the quorum. Bloom filters are not
+        considered, as the answers of all replicas are needed anyway.
+
+        :return:
+            Status and merged list of values.
+        :rtype: dict
+        """
+        quorum = min(self.read_quorum, len(keys))
+        replica_keys = {}
+        for keyWithReplicaIndex in keys:
+            task = asyncio.Task(self.read_replica(keyWithReplicaIndex, check_key=False, iterative=iterative))
+            replica_keys[task] = keyWithReplicaIndex
+        pending = set(replica_keys)
+        answers = []
+        try:
+            while pending and len(answers) < quorum:
+                done, pending = yield from asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result, storage_node = task.result()
+                    if "data" in result:
+                        answers.append((replica_keys[task], storage_node, result))
+        finally:
+            self.abandon_tasks(pending)
+
+        if len(answers) < quorum:
+            return {"status": 1, "data": [], "message": "read quorum not reached"}
+
+        # Union of all values in the order of their first occurrence
+        merged = {"data": [], "ttls": []}
+        seen = set()
+        for keyWithReplicaIndex, storage_node, answer in answers:
+            ttls = answer.get("ttls", [None] * len(answer["data"]))
+            for value, ttl in zip(answer["data"], ttls):
+                if value not in seen:
+                    seen.add(value)
+                    merged["data"].append(value)
+                    merged["ttls"].append(ttl)
+
+        # Answers lacking some of the values are repaired with the missing ones
+        self.schedule_read_repair(merged, [(keyWithReplicaIndex, storage_node, answer["data"])
+                                           for keyWithReplicaIndex, storage_node, answer in answers])
+
+        merged["status"] = 0 if merged["data"] else 1
+        return merged
+
+    def abandon_tasks(self, tasks):
+        """Lets tasks whose results are not needed anymore finish in the background and ignores their results.
+
+        Tasks waiting for RPCs must not be cancelled: aiomas treats the late reply to a cancelled
+        request as a protocol error and closes the whole connection to this peer.
+        """
+        for task in tasks:
+            task.add_done_callback(self._ignore_task_result)
+
+    def _ignore_task_result(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self.log.debug("Abandoned task failed: %s", task.exception())
+
+    @asyncio.coroutine
+    def read_replica(self, key, check_key=True, iterative=None, use_cache=True):
+        """Locates the node responsible for a replica key and fetches its values.
+
+        :param check_key:
+            If ``True``, no values are fetched if the Bloom filter of the node excludes the key.
+
+        :param use_cache:
+            If ``True``, the node may be taken from the lookup cache.
+
+        :return:
+            Tuple of the response (see :func:`get_replica_data`) and the storage node.
+            The response is None if the node was skipped due to its Bloom filter.
+        :rtype: tuple
+        """
+        started = time.monotonic()
+        storage_node = yield from self.find_successor(key, check_key=check_key, iterative=iterative,
+                                                      use_cache=use_cache)
+        print("got storage_node:", storage_node)
+        if storage_node is None:
+            return {"status": 1, "message": "responsible node not found"}, None
+
+        key_present = storage_node.get("key_present")
+        if key_present is False:
+            self.stats["bloom_negatives"] += 1
+            return None, storage_node
+
+        result = yield from self.get_replica_data(key, storage_node)
+        if key_present:
+            self.stats["bloom_positives"] += 1
+            if result["status"] != 0:
+                self.stats["bloom_false_positives"] += 1
+        if result["status"] == 0:
+            self.read_latencies.append(time.monotonic() - started)
+        elif self.invalidate_lookup(storage_node, result):
+            # The cached node was wrong
+            result, storage_node = yield from self.read_replica(key, check_key=check_key, iterative=iterative,
+                                                                use_cache=False)
+
+        return result, storage_node
+
+    def schedule_read_repair(self, result, holders):
+        """Copies values found by a GET to replica holders that missed them. Runs in the background.
+
+        :param result: successful response with the values and their remaining time to live
+        :param holders: list of ``(key, storage_node)`` or ``(key, storage_node, present_values)``
+            of the holders to repair
+        """
+        if self.repair_limiter is None or "ttls" not in result:
+            return
+
+        for holder in holders:
+            key, storage_node = holder[0], holder[1]
+            present = set(holder[2]) if len(holder) > 2 else set()
+            # Values of running PUTs are delivered by the write itself
+            records = [[key, value, ttl] for value, ttl in zip(result["data"], result["ttls"])
+                       if value not in present and ttl is not None and (key, value) not in self.writes_in_flight]
+            if not records:
+                continue
+
+            if not self.repair_limiter.consume():
+                self.stats["read_repairs_dropped"] += 1
+                continue
+
+            asyncio.Task(self.repair_replica(storage_node, records))
+
+    @asyncio.coroutine
+    def repair_replica(self, storage_node, records):
+        """Merges records (see :func:`Storage.serialize`) into the storage of a replica holder.
+
+        The holder drops records outside of the range it stores (see :func:`rpc_merkle_push`),
+        e.g. if the ring changed since the lookup. Such a repair counts as failed.
+        """
+        if storage_node["node_id"] == self.id:
+            self.storage.merge(records)
+            status = 0
+        else:
+            response, status = yield from self.run_rpc_safe(storage_node["node_address"], "rpc_merkle_push", records)
+            if status == 0:
+                status = response["status"]
+
+        if status == 0:
+            self.stats["read_repairs"] += 1
+        else:
+            self.stats["read_repairs_failed"] += 1
+
+    def get_hedge_delay(self):
+        """Seconds to wait for a replica before asking the next one in hedged reads.
+
+        :return:
+            ``self.hedge_delay`` or, if set to ``p95``, the 95th percentile of recent successful
+            replica reads.
+        :rtype: float
+        """
+        if self.hedge_delay != "p95":
+            return self.hedge_delay
+        if len(self.read_latencies) < 20:
+            return 1.0
+
+        latencies = sorted(self.read_latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    @asyncio.coroutine
+    def get_replica_data(self, key, storage_node, replica=False):
+        """Fetches the values of a replica key from the node responsible for it.
+
+        :param replica:
+            If ``True``, the node returns values it holds as copy for a preceding node (successor replication).
+
+        :return:
+            Response of :func:`rpc_dht_get_data` (status 1 without data if the node failed).
+        :rtype: dict
+        """
+        if storage_node.get("node_id") == self.id:
+            # Note the case that this node received the responsibility for a failed node.
+            # Given that the missing data might not be available on this node, continue the replica loop.
+            result = self.rpc_dht_get_data(key, replica=replica, ttls=True)
+            print("[rpc_dht_get_data] Result is:", result)
+            return result
+
+        # Directly connect to remote peer and fetch data from there
+        # TODO: validate
+        extra_args = {"replica": True} if replica else {}
+        if self.repair_limiter is not None:
+            # Remaining time to live of the values is needed for repairing other replicas
+            extra_args["ttls"] = True
+        result, status = yield from self.run_rpc_safe(storage_node.get("node_address"), "rpc_dht_get_data", key,
+                                                      **extra_args)
+        if status == 0:
+            return result
+
+        print("result ERROR", result)
+        return {"status": 1, "message": "storage node not responding"}
+
+    def _count_skipped_gets(self, skipped):
+        """Updates the statistics for GET requests saved by Bloom filters.
+        """
+        codec = self.rpc_codec()
+        for key, storage_node in skipped:
+            if storage_node.get("node_id") == self.id:
+                continue
+            # Rough size of the request and an empty response with our codec
+            request = codec.encode(["rpc_dht_get_data", [key], {}])
+            response = codec.encode({"status": 1, "data": []})
+            self.stats["bloom_skipped"] += 1
+            self.stats["bloom_bytes_saved"] += len(request) + len(response)
+
     @asyncio.coroutine
     def get_trace(self, key):
         """Information about the hops involved in the path for the lookup of the given ``key``.
@@ -928,15 +2509,24 @@ class Node(aiomas.Agent):
         data = None
         err = 1
         try:
-            fut_peer = self.container.connect(remote_address)
-            remote_peer = yield from asyncio.wait_for(fut_peer, timeout=self.network_timeout)
+            remote_peer = yield from self.get_peer(remote_address)
+            # The round trip time does not include connecting
+            started = time.monotonic()
             # Invoke remote function
             data = yield from getattr(remote_peer, func_name)(*args, **kwargs)
+            if func_name in RTT_SAMPLE_RPCS:
+                self.observe_rtt(remote_address, time.monotonic() - started)
             # Validate schema
-            validate(data, SCHEMA_OUTGOING_RPC[func_name])
+            validate_rpc(data, SCHEMA_OUTGOING_RPC[func_name])
             err = 0
+            if func_name == "rpc_get_node_info" and isinstance(data, dict) and data.get("accepts_sender") is True:
+                self.sender_peers.add(remote_address)
+
+        except asyncio.CancelledError:
+            # The caller was cancelled (e.g. on shutdown). Do not report this as a failed peer.
+            raise
 
-        except (asyncio.TimeoutError, asyncio.CancelledError):
+        except asyncio.TimeoutError:
             err = errno.ETIMEDOUT
             self.log.warn("AsyncIO error: connection timed out to remote peer %s", remote_address)
 
@@ -969,20 +2559,38 @@ class Node(aiomas.Agent):
             self.log.error("Unhandled error during RPC function %s to %s: %s", func_name, remote_address, ex)
             traceback.print_exc()
 
+        if err in (errno.ETIMEDOUT, errno.ECONNREFUSED, errno.ECOMM):
+            self.drop_connection(remote_address)
+            self.routing_cache.remove_address(remote_address)
+            self.sender_peers.discard(remote_address)
+            self.suspicion.failure(remote_address)
+        elif self.suspicion.success(remote_address):
+            # The peer answered, even if the answer was not valid
+            self.stats["suspects_cleared"] += 1
+            self.log.info("Peer %s answers again.", remote_address)
+
         return data, err
 
     @aiomas.expose
-    def rpc_get_node_info(self, successor_list=False, additional_data=False):
+    def rpc_get_node_info(self, successor_list=False, additional_data=False, key_filter=False):
         node_info = self.as_dict(serialize_neighbors=True, additional_data=additional_data)
+        # Lookup RPCs may announce their sender to us
+        node_info["accepts_sender"] = True
         if successor_list:
             node_info["successor_list"] = self.successor.list
+        if self.replication_mode == "successors":
+            node_info["predecessor_list"] = self.predecessor_list
+        if key_filter:
+            node_info["key_filter"] = self.export_key_filter()
 
         return node_info
 
-    # @aiomas.expose
-    # def rpc_get_fingertable(self):
-    #     # Check: might be critical to be published completely
-    #     return self.fingertable
+    @aiomas.expose
+    def rpc_get_fingertable(self):
+        """Our fingers to seed the finger table of a joining predecessor. Only node ID and address are published.
+        """
+        return [{"start": finger["start"], "successor": filter_node_response(finger["successor"])}
+                for finger in self.fingertable if finger["successor"] is not None]
 
     @aiomas.expose
     def rpc_update_predecessor(self, remote_node):
@@ -999,13 +2607,19 @@ class Node(aiomas.Agent):
             old_predecessor = self.predecessor or self.as_dict()
             self.predecessor = filter_node_response(remote_node)
             self.log.info("Predecessor now links to requester %s (old: %s)", remote_node, old_predecessor)
+            self.note_ring_change(joined=self.predecessor)
+            self.learn_node(self.predecessor)
 
             res = self.predecessor.copy()
             res["old_predecessor"] = old_predecessor
 
-            # Get storage between old and new node. Delete data from our node.
-            res["storage"] = self.storage.get_storage_data_between(old_predecessor["node_id"], remote_id)
-            self.storage.delete_storage_data_between(old_predecessor["node_id"], remote_id)
+            # Hand over the storage between old and new node. If copies are kept, we keep one of its keys as
+            # its first successor. Copies of farther nodes are dropped by check_predecessor.
+            if self.replication_mode == "successors" or self.successor_copy:
+                moved_data = self.storage.get_storage_data_between(old_predecessor["node_id"], remote_id)
+            else:
+                moved_data = self.storage.split_storage_data_between(old_predecessor["node_id"], remote_id)
+            res["storage"] = self.storage.serialize(moved_data)
 
             return res
         else:
@@ -1034,19 +2648,79 @@ class Node(aiomas.Agent):
         return {"status": 0}
 
     @aiomas.expose
-    def rpc_find_successor_rec(self, node_id, with_neighbors=False, tracing=False):
+    def rpc_update_finger_table_batch(self, origin_node, indices):
+        yield from self._check_running_state()
+
+        origin_node = filter_node_response(origin_node)
+        validate(origin_node, SCHEMA_INCOMING_RPC["rpc_update_finger_table"])
+        if not isinstance(indices, list) or \
+                not all(isinstance(i, int) and 0 <= i < CHORD_FINGER_TABLE_SIZE for i in indices):
+            raise TypeError('Invalid type in argument.')
+
+        yield from self.update_finger_table_batch(origin_node, indices)
+        return {"status": 0}
+
+    @aiomas.expose
+    def rpc_get_closest_preceding_fingers(self, node_id, count=3, sender=None):
+        """Step of an iterative lookup: our successor if it is responsible for ``node_id``, otherwise up to
+        ``count`` distinct fingers preceding ``node_id``, closest first.
+        """
+        yield from self._check_running_state()
+        self.learn_sender(sender)
+
+        successor = self.successor.get()
+        if in_interval(node_id, self.id, successor["node_id"], inclusive_right=True):
+            return {"status": 0, "successor": successor}
+
+        nodes = []
+        for fall_back in range(min(count, 8)):
+            finger = self.get_closest_preceding_finger(node_id, fall_back=fall_back, count_stats=False)
+            if finger["node_id"] == self.id:
+                break
+            nodes.append(finger)
+
+        return {"status": 0, "nodes": nodes}
+
+    @aiomas.expose
+    def rpc_find_successors_batch(self, node_ids, with_neighbors=False, sender=None):
         yield from self._check_running_state()
+        self.learn_sender(sender)
+
+        if not isinstance(node_ids, list):
+            raise TypeError('Invalid type in argument.')
+
+        res = yield from self.find_successors_batch_rec(node_ids, with_neighbors=with_neighbors)
+        return res
+
+    @aiomas.expose
+    def rpc_find_successor_rec(self, node_id, with_neighbors=False, tracing=False, check_key=False, sender=None):
+        yield from self._check_running_state()
+        self.learn_sender(sender)
 
         # TODO: validate params to prevent attacks!
-        res = yield from self.find_successor_rec(node_id, with_neighbors=with_neighbors, tracing=tracing)
+        res = yield from self.find_successor_rec(node_id, with_neighbors=with_neighbors, tracing=tracing,
+                                                 check_key=check_key)
         return res
 
     ### RPC Data storage ###
     @aiomas.expose
-    def rpc_dht_put_data(self, key, data, ttl):
+    def rpc_dht_put_data(self, key, data, ttl, replicas=0):
         # TODO: validate
         if in_interval(key, self.predecessor["node_id"], self.id, inclusive_right=True):
-            self.storage.put(key, data, ttl=ttl)
+            if replicas > 0:
+                # Successor replication: store and push copies to our successors
+                results = yield from self.store_with_successor_replicas(key, data, ttl, replicas)
+                return {
+                    "status": results[0]["status"],
+                    "replicas": results
+                }
+
+            if not self.storage.put(key, data, ttl=ttl):
+                self.log.warn("Value for key %d exceeds the storage budget of this node.", key)
+                return {
+                    "status": 1,
+                    "message": "storage budget exceeded"
+                }
             return {
                 "status": 0
             }
@@ -1059,18 +2733,145 @@ class Node(aiomas.Agent):
             }
 
     @aiomas.expose
-    def rpc_dht_get_data(self, key):
-        if in_interval(key, self.predecessor["node_id"], self.id, inclusive_right=True):
-            data = self.storage.get(key)
-            status = 0 if len(data) > 0 else 1
+    def rpc_dht_put_replica(self, key, data, ttl):
+        """Stores a copy for a preceding node (successor replication).
+
+        Only keys of the nodes we hold copies for are accepted (see :func:`get_replica_range_start`).
+        """
+        validate_rpc({"key": key, "data": data, "ttl": ttl}, SCHEMA_INCOMING_RPC["rpc_dht_put_replica"])
+        if self.predecessor is None or \
+                not in_interval(key, self.get_replica_range_start(), self.predecessor["node_id"], inclusive_right=True):
+            self.log.warn("This node %d does not hold copies for key %d.", self.id, key)
             return {
+                "status": 1,
+                "message": "not a replica holder"
+            }
+
+        if not self.storage.put(key, data, ttl=ttl):
+            return {
+                "status": 1,
+                "message": "storage budget exceeded"
+            }
+        return {
+            "status": 0
+        }
+
+    @aiomas.expose
+    def rpc_dht_get_data(self, key, replica=False, ttls=False):
+        if replica or in_interval(key, self.predecessor["node_id"], self.id, inclusive_right=True):
+            items = self.storage.get_items(key)
+            status = 0 if len(items) > 0 else 1
+            result = {
                 "status": status,
-                "data": data
+                "data": [item.value for item in items]
+            }
+            if ttls:
+                now = time.monotonic()
+                result["ttls"] = [item.remaining_ttl(now) for item in items]
+            return result
+        else:
+            return {
+                "status": 1,
+                "message": "not responsible"
             }
+
+    ### RPC anti-entropy ###
+    @aiomas.expose
+    def rpc_get_merkle_hashes(self, key_left, key_right, nodes):
+        yield from self._check_running_state()
+
+        if not isinstance(nodes, list) or len(nodes) > 2 * self.storage.merkle.leafCount:
+            raise TypeError('Invalid list of tree nodes.')
+        if not all(isinstance(node, int) and 1 <= node < 2 * self.storage.merkle.leafCount for node in nodes):
+            raise ValueError('Invalid tree node index.')
+
+        return {
+            "status": 0,
+            "hashes": self.storage.merkle_hashes(key_left, key_right, nodes)
+        }
+
+    @aiomas.expose
+    def rpc_get_merkle_ranges(self, ranges, max_keys):
+        """Summaries of key ranges (low, high] for anti-entropy: the keys with their digests if a range
+        holds at most ``max_keys`` keys, otherwise the digest of the whole range.
+        """
+        yield from self._check_running_state()
+
+        if not isinstance(ranges, list) or len(ranges) > SYNC_MAX_REQUEST or not isinstance(max_keys, int):
+            raise TypeError('Invalid list of key ranges.')
+        if not all(isinstance(bounds, list) and len(bounds) == 2 and all(isinstance(key, int) for key in bounds)
+                   and -1 <= bounds[0] < bounds[1] < CHORD_RING_SIZE for bounds in ranges):
+            raise ValueError('Invalid key range.')
+
+        summaries = []
+        for low, high in ranges:
+            digest, count = self.storage.range_digest(low, high)
+            if count <= max_keys:
+                summaries.append({"keys": self.storage.key_digests(low, high)})
+            else:
+                summaries.append({"digest": digest})
+
+        return {
+            "status": 0,
+            "ranges": summaries
+        }
+
+    @aiomas.expose
+    def rpc_get_merkle_values(self, keys, max_bytes):
+        """Records of the given keys for anti-entropy, in the order of the keys until ``max_bytes`` are reached.
+
+        :return: the records and the number of keys whose records are all included
+        """
+        yield from self._check_running_state()
+
+        if not isinstance(keys, list) or len(keys) > SYNC_MAX_REQUEST or not isinstance(max_bytes, int):
+            raise TypeError('Invalid list of keys.')
+        if not all(isinstance(key, int) and 0 <= key < CHORD_RING_SIZE for key in keys):
+            raise ValueError('Invalid key.')
+
+        codec = self.rpc_codec()
+        records = []
+        count = 0
+        for key in keys:
+            key_records = self.storage.serialize({key: self.storage.get_items(key)})
+            max_bytes -= len(codec.encode(key_records))
+            # The values of one key are always sent, so that the exchange makes progress
+            if max_bytes < 0 and count > 0:
+                break
+            records.extend(key_records)
+            count += 1
+
+        return {
+            "status": 0,
+            "storage": records,
+            "keys": count
+        }
+
+    @aiomas.expose
+    def rpc_merkle_push(self, records):
+        """Merges records (see :func:`Storage.serialize`) pushed by anti-entropy, replication or read repair.
+
+        Only records of keys in (:func:`get_copy_range_start`, this node] are accepted, like in :func:`rpc_dht_put_replica`.
+        """
+        yield from self._check_running_state()
+
+        validate_rpc(records, SCHEMA_INCOMING_RPC["rpc_merkle_push"])
+        if self.predecessor is None:
+            accepted = []
         else:
+            range_start = self.get_copy_range_start()
+            accepted = [record for record in records
+                        if in_interval(record[0], range_start, self.id, inclusive_right=True)]
+        self.storage.merge(accepted)
+
+        if len(accepted) < len(records):
+            self.log.warn("This node %d does not hold copies for %d pushed items.", self.id, len(records) - len(accepted))
             return {
-                "status": 1
+                "status": 1,
+                "message": "not a replica holder",
+                "rejected": len(records) - len(accepted)
             }
+        return {"status": 0}
 
     ### RPC tests ###
     @asyncio.coroutine
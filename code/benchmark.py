@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+import hashlib
+import random
+import timeit
+
+from helpers.chordInterval import *
+from helpers.fingerIndex import FingerIndex
+from helpers.replica import Replica
+
+"""
+Micro benchmarks for hot paths of a node. Start it with ./benchmark.py
+"""
+
+ROUNDS = 200
+
+
+def recursive_replica_key(key, replicaIndex):
+    """Replica key derivation as done before the iterative version (for comparison).
+    """
+    if replicaIndex > 0:
+        key = recursive_replica_key(key, replicaIndex - 1)
+
+    return int(hashlib.sha256(key.to_bytes(32, byteorder='big')).hexdigest(), 16) % CHORD_RING_SIZE
+
+
+def benchmark_replica():
+    print("Replica key list (%d keys, time per list in us)" % ROUNDS)
+    print("%4s %12s %12s %12s" % ("r", "recursive", "iterative", "cached"))
+
+    keys = [random.randint(0, CHORD_RING_SIZE - 1) for _ in range(ROUNDS)]
+    for replicationCount in (1, 2, 3, 4, 8, 16):
+        recursive = timeit.timeit(
+            lambda: [[recursive_replica_key(key, i) for i in range(replicationCount)] for key in keys], number=1)
+
+        uncached = Replica(CHORD_RING_SIZE, cacheSize=0)
+        iterative = timeit.timeit(
+            lambda: [uncached.get_key_list(key, replicationCount) for key in keys], number=1)
+
+        replica = Replica(CHORD_RING_SIZE)
+        for key in keys:
+            replica.get_key_list(key, replicationCount)
+        cached = timeit.timeit(
+            lambda: [replica.get_key_list(key, replicationCount) for key in keys], number=1)
+
+        print("%4d %12.1f %12.1f %12.1f" % (replicationCount, recursive / ROUNDS * 1e6,
+                                            iterative / ROUNDS * 1e6, cached / ROUNDS * 1e6))
+
+
+def scan_closest_preceding_finger(nodeId, fingertable, key):
+    """Linear scan over all fingers as done before the finger index (for comparison).
+    """
+    for k in range(CHORD_FINGER_TABLE_SIZE - 1, -1, -1):
+        finger_successor = fingertable[k]["successor"]
+        if in_interval(finger_successor["node_id"], nodeId, key):
+            return finger_successor
+
+    return None
+
+
+def benchmark_fingers():
+    print("Closest preceding finger (lookups per second)")
+    print("%6s %12s %12s" % ("nodes", "scan", "bisect"))
+
+    keys = [random.randint(0, CHORD_RING_SIZE - 1) for _ in range(ROUNDS * 10)]
+    for nodeCount in (10, 100, 1000, 10000):
+        ring = sorted(random.randint(0, CHORD_RING_SIZE - 1) for _ in range(nodeCount))
+        nodeId = ring[0]
+        fingertable = []
+        for k in range(CHORD_FINGER_TABLE_SIZE):
+            start = (nodeId + 2**k) % CHORD_RING_SIZE
+            successor = min(ring, key=lambda node: (node - start) % CHORD_RING_SIZE)
+            fingertable.append({"start": start, "successor": {"node_id": successor, "node_address": str(successor)}})
+
+        scan = timeit.timeit(lambda: [scan_closest_preceding_finger(nodeId, fingertable, key) for key in keys],
+                             number=1)
+        index = FingerIndex()
+        index.rebuild(nodeId, fingertable)
+        bisected = timeit.timeit(lambda: [index.closest_preceding(nodeId, key) for key in keys], number=1)
+
+        print("%6d %12.0f %12.0f" % (nodeCount, len(keys) / scan, len(keys) / bisected))
+
+
+if __name__ == '__main__':
+    random.seed(1)
+    benchmark_replica()
+    print()
+    benchmark_fingers()
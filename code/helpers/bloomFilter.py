@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+
+"""
+Bloom filters summarizing the keys stored on a node.
+
+A node maintains a :py:class:`CountingBloomFilter` of its keys which supports deletions (expiry,
+handoff). Other nodes receive a compact :py:class:`BloomFilter` exported from it. If this filter
+does not contain a key, the node definitely did not store it when the filter was exported.
+"""
+
+import hashlib
+
+MASK_64 = 2**64 - 1
+
+
+def _hash_pair(key):
+    """Two 64 bit hashes for double hashing.
+
+    Keys in the ring are already SHA-256 values, so their bits can be used directly.
+    """
+    if not isinstance(key, int):
+        key = int.from_bytes(hashlib.sha256(str(key).encode("utf-8")).digest(), byteorder='big')
+
+    return key & MASK_64, ((key >> 64) & MASK_64) | 1
+
+
+def filter_indices(key, size, hashes):
+    """Bit positions of a key in a filter of the given size (power of 2).
+
+    As ``size`` is a power of 2, positions in a filter folded to a smaller size are the same
+    positions modulo the smaller size.
+    """
+    h1, h2 = _hash_pair(key)
+    return [(h1 + i * h2) % size for i in range(hashes)]
+
+
+class BloomFilter:
+
+    """
+    Plain Bloom filter as received from other nodes.
+
+    :param bits: the bit array (bit j is bit j % 8 of byte j // 8)
+    :type bits: bytes
+    :param hashes: number of hash functions
+    """
+
+    def __init__(self, bits, hashes):
+        if len(bits) == 0 or len(bits) & (len(bits) - 1) != 0:
+            raise ValueError("Size of the filter must be a power of 2.")
+
+        self.bits = bytes(bits)
+        self.hashes = hashes
+        self.size = len(self.bits) * 8
+
+    def might_contain(self, key):
+        for index in filter_indices(key, self.size, self.hashes):
+            if not self.bits[index // 8] & (1 << (index % 8)):
+                return False
+
+        return True
+
+
+class CountingBloomFilter:
+
+    """
+    Bloom filter with a counter per position to support deletions.
+
+    Besides the counters, a bit array of the non-zero counters is maintained for cheap exports.
+    Counters saturate at 255 and are never decremented afterwards.
+
+    :param sizeBits: the filter has 2^sizeBits counters
+    :param hashes: number of hash functions
+    """
+
+    def __init__(self, sizeBits=20, hashes=4):
+        self.size = 2**sizeBits
+        self.hashes = hashes
+        self.counters = bytearray(self.size)
+        self.bits = bytearray(self.size // 8)
+        self.count = 0
+
+    def clear(self):
+        self.counters = bytearray(self.size)
+        self.bits = bytearray(self.size // 8)
+        self.count = 0
+
+    def add(self, key):
+        for index in filter_indices(key, self.size, self.hashes):
+            counter = self.counters[index]
+            if counter == 0:
+                self.bits[index // 8] |= 1 << (index % 8)
+            if counter < 255:
+                self.counters[index] = counter + 1
+
+        self.count += 1
+
+    def remove(self, key):
+        for index in filter_indices(key, self.size, self.hashes):
+            counter = self.counters[index]
+            if 0 < counter < 255:
+                self.counters[index] = counter - 1
+                if counter == 1:
+                    self.bits[index // 8] &= ~(1 << (index % 8)) & 0xff
+
+        self.count -= 1
+
+    def might_contain(self, key):
+        for index in filter_indices(key, self.size, self.hashes):
+            if self.counters[index] == 0:
+                return False
+
+        return True
+
+    def export(self, bitsPerKey=10):
+        """Exports a plain Bloom filter sized for the current number of keys.
+
+        The bit array is folded (halves combined by OR) until it is just large enough for
+        ``bitsPerKey`` bits per key. About 10 bits per key result in a false positive rate of
+        roughly 1% with 4 hash functions.
+
+        :rtype: BloomFilter
+        """
+        target = 1024
+        while target < self.count * bitsPerKey and target < self.size:
+            target *= 2
+
+        bits = int.from_bytes(self.bits, byteorder='little')
+        size = self.size
+        while size > target:
+            size //= 2
+            bits = (bits & ((1 << size) - 1)) | (bits >> size)
+
+        return BloomFilter(bits.to_bytes(size // 8, byteorder='little'), self.hashes)
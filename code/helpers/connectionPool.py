@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+
+"""
+Pool of connections to other nodes.
+
+Consecutive RPCs to the same peer reuse its remote agent proxy instead of connecting again.
+Connections not used for a while are closed, broken ones are evicted by the node after a failed RPC.
+The pool only keeps the bookkeeping; opening and closing connections is done by the node.
+"""
+
+import time
+from collections import OrderedDict
+
+
+class ConnectionPool:
+
+    """
+    Remote agent proxies of peers by address with LRU eviction.
+
+    :param maxIdle: seconds an unused connection is kept open
+    :param maxEntries: maximum number of pooled peers. 0 disables the pool.
+    """
+
+    def __init__(self, maxIdle=60, maxEntries=64):
+        self.maxIdle = maxIdle
+        self.maxEntries = maxEntries
+        self._peers = OrderedDict()     # address -> [proxy, last use], least recently used first
+        self.stats = {"requests": 0, "reuses": 0, "connects": 0, "connect_time": 0.0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._peers)
+
+    def __contains__(self, address):
+        return address in self._peers
+
+    def get(self, address, now=None):
+        """Returns the pooled proxy of a peer or None if a new connection is needed.
+
+        :param now: current monotonic time. Determined if None.
+        """
+        now = time.monotonic() if now is None else now
+        self.stats["requests"] += 1
+        entry = self._peers.get(address)
+        if entry is None or now - entry[1] > self.maxIdle:
+            return None
+
+        entry[1] = now
+        self._peers.move_to_end(address)
+        self.stats["reuses"] += 1
+        return entry[0]
+
+    def add(self, address, proxy, connectTime=0.0, now=None):
+        """Pools a new connection.
+
+        :param connectTime: seconds it took to connect
+        :param now: current monotonic time. Determined if None.
+        :returns: addresses evicted to stay within ``maxEntries``
+        :rtype: list of str
+        """
+        self.stats["connects"] += 1
+        self.stats["connect_time"] += connectTime
+        if self.maxEntries <= 0:
+            return []
+
+        self._peers[address] = [proxy, time.monotonic() if now is None else now]
+        self._peers.move_to_end(address)
+        evicted = []
+        while len(self._peers) > self.maxEntries:
+            evicted.append(next(iter(self._peers)))
+            self.evict(evicted[-1])
+
+        return evicted
+
+    def evict(self, address):
+        """Removes a peer from the pool, e.g. after an error on its connection.
+
+        :returns: True if the peer was pooled
+        """
+        if self._peers.pop(address, None) is None:
+            return False
+
+        self.stats["evictions"] += 1
+        return True
+
+    def expired(self, now=None):
+        """Addresses of connections idle for longer than ``maxIdle``. They remain pooled until evicted.
+
+        :param now: current monotonic time. Determined if None.
+        :rtype: list of str
+        """
+        now = time.monotonic() if now is None else now
+        return [address for address, entry in self._peers.items() if now - entry[1] > self.maxIdle]
+
+    def get_statistics(self):
+        """Reuse ratio and mean connect latency in seconds besides the raw counters.
+        """
+        stats = dict(self.stats)
+        stats["pooled"] = len(self._peers)
+        stats["reuse_ratio"] = self.stats["reuses"] / self.stats["requests"] if self.stats["requests"] else 0.0
+        stats["connect_latency"] = self.stats["connect_time"] / self.stats["connects"] if self.stats["connects"] else 0.0
+
+        return stats
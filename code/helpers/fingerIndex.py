@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+
+"""
+Compact index over the finger table of a node for finding the closest preceding finger.
+
+The distinct finger nodes are kept as a sorted array of their clockwise distances from the
+node. Fingers preceding a key are exactly those with a distance smaller than the distance of
+the key, so the closest one is found by bisection.
+"""
+
+import bisect
+from helpers.chordInterval import CHORD_RING_SIZE
+
+
+class FingerIndex:
+
+    """
+    Sorted distances of the distinct finger nodes of a node.
+
+    The index does not track changes of the finger table itself. It needs to be rebuilt after
+    the finger table was modified.
+    """
+
+    def __init__(self):
+        self.distances = []     # Clockwise distances from our node, ascending
+        self.nodes = []         # Node dicts belonging to the distances
+
+    def rebuild(self, nodeId, fingertable):
+        """Indexes the finger table of a node.
+
+        :param nodeId: ID of the node owning the finger table
+        :param fingertable: list of fingers, each a dict with the node dict as ``successor``
+        """
+        entries = {}
+        for finger in fingertable:
+            node = finger.get("successor")
+            if node is None:
+                continue
+            distance = (node["node_id"] - nodeId) % CHORD_RING_SIZE
+            # Our own node never precedes a key
+            if distance != 0 and distance not in entries:
+                entries[distance] = node
+
+        self.distances = sorted(entries)
+        self.nodes = [entries[distance] for distance in self.distances]
+
+    def closest_preceding(self, nodeId, key, fall_back=0):
+        """Finger node closest to, but preceding the key.
+
+        :param nodeId: ID of the node owning the finger table
+        :param key: the key to look up
+        :param fall_back: 0 returns the closest node, i returns the i-th next distinct alternative
+        :returns: node dict or None if no (further) finger precedes the key
+        """
+        # The interval (nodeId, key) covers the whole ring except our node if key equals nodeId
+        limit = (key - nodeId) % CHORD_RING_SIZE or CHORD_RING_SIZE
+        index = bisect.bisect_left(self.distances, limit) - 1 - fall_back
+        return self.nodes[index] if index >= 0 else None
@@ -32,7 +32,8 @@ class IniParser:
 
         with open(filename) as f:
             for line in f:
-                if line.strip()!="":
+                # Skip empty lines and comments
+                if line.strip()!="" and not line.lstrip().startswith(('#', ';')):
                     try:
                         if line != "":
                             if line.startswith('['):
@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+
+"""
+Cache of lookup results mapping key ranges to their responsible node.
+
+If node N is responsible for key k, no node lies in [k, N). Therefore, N is responsible for all keys
+in [k, N] as well. With the predecessor P of N known, the range grows to (P, N]. An entry stores
+the widest known range per node, so one lookup serves all keys of this range.
+"""
+
+import bisect
+import time
+from collections import OrderedDict
+from helpers.chordInterval import *
+
+
+class LookupCache:
+
+    """
+    Bounded cache of ``[low, node_id]`` ranges with a time to live.
+
+    :param maxEntries: maximum number of cached nodes. The least recently used one is dropped.
+        0 disables the cache.
+    :param ttl: seconds an entry is valid
+    """
+
+    def __init__(self, maxEntries=1024, ttl=30):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # node_id -> (low, node, deadline), least recently used first
+        self._nodeIds = []              # Sorted node IDs for bisection
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stale_hits": 0, "invalidations": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self._nodeIds = []
+
+    def get(self, key, now=None):
+        """Returns the cached responsible node for a key or None.
+
+        :param key: the key to look up
+        :param now: current monotonic time. Determined if None.
+        :rtype: dict or None
+        """
+        if self._nodeIds:
+            # Only the first cached node clockwise from the key can be responsible
+            index = bisect.bisect_left(self._nodeIds, key) % len(self._nodeIds)
+            nodeId = self._nodeIds[index]
+            low, node, deadline = self._entries[nodeId]
+            if key == nodeId or (low != nodeId and in_interval(key, low, nodeId, inclusive_left=True)):
+                now = time.monotonic() if now is None else now
+                if now <= deadline:
+                    self._entries.move_to_end(nodeId)
+                    self.stats["hits"] += 1
+                    return node
+
+                self.stats["expired"] += 1
+                self._remove(nodeId)
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, node, low=None, now=None):
+        """Caches that ``node`` is responsible for ``key`` (and all keys in ``[low, key]`` if given).
+
+        :param key: key resolved by a lookup
+        :param node: node dict of the responsible node
+        :param low: first key of a wider known range, e.g. the predecessor of the node plus 1
+        :param now: current monotonic time. Determined if None.
+        """
+        if self.maxEntries <= 0:
+            return
+
+        nodeId = node["node_id"]
+        low = key if low is None else low
+        now = time.monotonic() if now is None else now
+
+        if nodeId in self._entries:
+            cachedLow, cachedNode, deadline = self._entries[nodeId]
+            # Keep the wider range (its start is farther away counterclockwise) if still valid
+            if now <= deadline and cachedNode == node and \
+                    (nodeId - cachedLow) % CHORD_RING_SIZE > (nodeId - low) % CHORD_RING_SIZE:
+                low = cachedLow
+            self._entries.move_to_end(nodeId)
+        else:
+            bisect.insort(self._nodeIds, nodeId)
+
+        self._entries[nodeId] = (low, node, now + self.ttl)
+        if len(self._entries) > self.maxEntries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, nodeId, stale=False):
+        """Drops the entry of a node, e.g. if it failed or is not responsible anymore.
+
+        :param stale: the entry was used and turned out to be wrong
+        """
+        if nodeId in self._entries:
+            self._remove(nodeId)
+            self.stats["invalidations"] += 1
+        if stale:
+            self.stats["stale_hits"] += 1
+
+    def invalidate_containing(self, nodeId):
+        """Drops all entries whose range contains a (new) node, which took over a part of the range.
+        """
+        for cachedId in [cachedId for cachedId, entry in self._entries.items()
+                         if cachedId != nodeId and entry[0] != cachedId and
+                         in_interval(nodeId, entry[0], cachedId, inclusive_left=True)]:
+            self.invalidate(cachedId)
+
+    def _remove(self, nodeId):
+        del self._entries[nodeId]
+        del self._nodeIds[bisect.bisect_left(self._nodeIds, nodeId)]
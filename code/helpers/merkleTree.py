@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+
+"""
+Merkle tree over the ring partitions of a storage used for anti-entropy between nodes.
+
+Each leaf holds the digest of one partition. A partition digest is the sum of the hashes of
+all its (key, value) items modulo 2^256. Like this, it can be updated incrementally when a
+single item is added or removed. Inner nodes combine the hashes of their children and are
+only recomputed when they are requested.
+
+Nodes are numbered like a binary heap: the root is 1, the children of node i are 2i and 2i+1
+and the leaves are the nodes ``leafCount`` to ``2 * leafCount - 1``.
+"""
+
+import hashlib
+
+DIGEST_MODULO = 2**256
+
+# Classification of a range of leaves regarding a key interval
+OUTSIDE = 0
+INSIDE = 1
+PARTIAL = None
+
+
+def item_digest(key, value):
+    """Hash of a single stored (key, value) pair as integer.
+
+    The time to live is not part of the hash, as it differs slightly between copies of an item.
+    """
+    if isinstance(value, str):
+        raw = b"s" + value.encode("utf-8")
+    elif isinstance(value, (bytes, bytearray)):
+        raw = b"b" + bytes(value)
+    else:
+        raw = b"r" + repr(value).encode("utf-8")
+
+    if isinstance(key, int):
+        raw = key.to_bytes(32, byteorder='big') + raw
+    else:
+        raw = str(key).encode("utf-8") + raw
+
+    return int.from_bytes(hashlib.sha256(raw).digest(), byteorder='big')
+
+
+def combine(left, right):
+    """Hash of an inner node. Empty subtrees stay 0.
+    """
+    if left == 0 and right == 0:
+        return 0
+
+    raw = left.to_bytes(32, byteorder='big') + right.to_bytes(32, byteorder='big')
+    return int.from_bytes(hashlib.sha256(raw).digest(), byteorder='big')
+
+
+class MerkleTree:
+
+    """
+    Merkle tree with a fixed number of leaves.
+
+    :param leafCount: number of leaves. Must be a power of 2.
+    """
+
+    def __init__(self, leafCount):
+        if leafCount & (leafCount - 1) != 0:
+            raise AttributeError("Number of leaves must be a power of 2.")
+
+        self.leafCount = leafCount
+        self.nodes = [0] * (2 * leafCount)
+        self._dirty = set()     # Inner nodes to recompute
+
+    def clear(self):
+        self.nodes = [0] * (2 * self.leafCount)
+        self._dirty = set()
+
+    def leaf(self, index):
+        return self.nodes[self.leafCount + index]
+
+    def update(self, index, digest):
+        """Sets the digest of a leaf. Its ancestors are recomputed on the next request.
+        """
+        node = self.leafCount + index
+        self.nodes[node] = digest
+
+        node //= 2
+        while node >= 1 and node not in self._dirty:
+            self._dirty.add(node)
+            node //= 2
+
+    def add(self, index, digest):
+        self.update(index, (self.leaf(index) + digest) % DIGEST_MODULO)
+
+    def remove(self, index, digest):
+        self.update(index, (self.leaf(index) - digest) % DIGEST_MODULO)
+
+    def is_leaf(self, node):
+        return node >= self.leafCount
+
+    def leaf_span(self, node):
+        """Indices of the first and last leaf below the given node.
+        """
+        first = last = node
+        while first < self.leafCount:
+            first, last = 2 * first, 2 * last + 1
+
+        return first - self.leafCount, last - self.leafCount
+
+    def hash(self, node):
+        """Hash of the given node over all leaves.
+        """
+        if node in self._dirty:
+            self.nodes[node] = combine(self.hash(2 * node), self.hash(2 * node + 1))
+            self._dirty.discard(node)
+
+        return self.nodes[node]
+
+    def range_hash(self, node, classify, partial_leaf):
+        """Hash of the given node considering only the leaves (or parts of them) in a key interval.
+
+        :param node: node index
+        :param classify: function ``(first_leaf, last_leaf)`` returning ``INSIDE``, ``OUTSIDE`` or
+            ``PARTIAL`` for the span of leaves regarding the interval
+        :param partial_leaf: function ``(leaf)`` returning the digest of the part of the leaf inside
+            the interval
+        """
+        state = classify(*self.leaf_span(node))
+        if state == INSIDE:
+            return self.hash(node)
+        elif state == OUTSIDE:
+            return 0
+        elif self.is_leaf(node):
+            return partial_leaf(node - self.leafCount)
+        else:
+            return combine(self.range_hash(2 * node, classify, partial_leaf),
+                           self.range_hash(2 * node + 1, classify, partial_leaf))
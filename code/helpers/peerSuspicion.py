@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+
+"""
+Failure suspicion of peers shared by all requests of a node.
+
+A peer that timed out or refused a connection is suspected to be dead. Lookups skip suspected
+peers instead of waiting for the network timeout again. Suspected peers are probed with an
+exponential backoff and cleared as soon as they answer any request.
+"""
+
+import time
+from collections import OrderedDict
+
+
+class PeerSuspicion:
+
+    """
+    Suspected peers by address.
+
+    :param probeInterval: seconds until a suspected peer is probed the first time
+    :param maxProbeInterval: upper bound of the probe interval, which doubles after every failure
+    :param maxEntries: maximum number of suspected peers. The oldest suspicion is dropped.
+    """
+
+    def __init__(self, probeInterval=5, maxProbeInterval=120, maxEntries=1024):
+        self.probeInterval = probeInterval
+        self.maxProbeInterval = maxProbeInterval
+        self.maxEntries = maxEntries
+        self._suspects = OrderedDict()  # address -> [failures, next probe time], oldest suspicion first
+
+    def __len__(self):
+        return len(self._suspects)
+
+    def __contains__(self, address):
+        return address in self._suspects
+
+    def failure(self, address, now=None):
+        """Records a timeout or refused connection of a peer.
+
+        :param now: current monotonic time. Determined if None.
+        """
+        now = time.monotonic() if now is None else now
+        entry = self._suspects.get(address)
+        if entry is None:
+            self._suspects[address] = [1, now + self.probeInterval]
+            if len(self._suspects) > self.maxEntries:
+                self._suspects.popitem(last=False)
+        else:
+            entry[0] += 1
+            entry[1] = now + min(self.maxProbeInterval, self.probeInterval * 2**(entry[0] - 1))
+
+    def success(self, address):
+        """Records an answer of a peer, which clears its suspicion.
+
+        :returns: True if the peer was suspected
+        """
+        return self._suspects.pop(address, None) is not None
+
+    def due_probes(self, now=None):
+        """Suspected peers to be probed now. Their next probe is postponed until the result is recorded.
+
+        :param now: current monotonic time. Determined if None.
+        :rtype: list of str
+        """
+        now = time.monotonic() if now is None else now
+        due = [address for address, entry in self._suspects.items() if entry[1] <= now]
+        for address in due:
+            self._suspects[address][1] = now + self.maxProbeInterval
+
+        return due
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+
+"""
+Rate limiting for background work of a node, e.g. read repairs.
+"""
+
+import time
+
+
+class TokenBucket:
+
+    """
+    Token bucket allowing ``rate`` operations per second on average and bursts of up to ``burst``.
+
+    :param rate: tokens added per second
+    :param burst: maximum number of tokens. Defaults to ``rate`` (at least 1).
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def consume(self, tokens=1, now=None):
+        """Takes tokens from the bucket if enough are available.
+
+        :param tokens: number of tokens needed
+        :param now: current monotonic time. Determined if None.
+        :returns: True if the operation is allowed
+        :rtype: bool
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+
+        return False
@@ -1,19 +1,52 @@
 #!/usr/bin/python3
 import hashlib
+from collections import OrderedDict
 
 """
 The replica module provides functions for managing replication in the Chord ring.
 This part is based on the paper `Dynamic Replica Management in Distributed Hash Tables <http://citeseerx.ist.psu.edu/viewdoc/download?doi=10.1.1.2.5845&rep=rep1&type=pdf/>`_ from Waldvogel et al.
+
+The replica key with index i is the key hashed i+1 times. The keys of a chain are derived once
+and kept in a bounded LRU cache, as the same keys are usually requested several times
+(e.g. a PUT followed by GETs).
 """
 
 class Replica:
 
     """
     :param chordRingSize: The Size of the Chord ring. Usually something like 2^256
+    :param replicationCount: default number of replica keys
+    :param cacheSize: maximum number of keys whose replica keys are cached
     """
-    def __init__(self, chordRingSize, replicationCount=3):
+    def __init__(self, chordRingSize, replicationCount=3, cacheSize=4096):
         self.chordRingSize = chordRingSize
         self.replicationCount = replicationCount
+        self.cacheSize = cacheSize
+        self._cache = OrderedDict()     # key -> list of replica keys, least recently used first
+
+    def _hash(self, key):
+        return int.from_bytes(hashlib.sha256(key.to_bytes(32, byteorder='big')).digest(), byteorder='big') % self.chordRingSize
+
+    def _chain(self, key, length):
+        """Replica keys 0 to length-1 of a key. The returned list must not be modified.
+        """
+        chain = self._cache.get(key)
+        if chain is None:
+            chain = []
+            if self.cacheSize > 0:
+                self._cache[key] = chain
+                if len(self._cache) > self.cacheSize:
+                    self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        # Extend a cached chain if more replicas are requested than before
+        current = chain[-1] if chain else key
+        while len(chain) < length:
+            current = self._hash(current)
+            chain.append(current)
+
+        return chain
 
     def get_key(self, key, replicaIndex=1):
         """Set default attribute values only
@@ -22,11 +55,7 @@ class Replica:
         :returns: a hash value which is the location in the chord ring
         :rtype: int
         """
-
-        if replicaIndex>0:
-            key = self.get_key(key, replicaIndex-1)
-
-        return int(hashlib.sha256(key.to_bytes(32, byteorder='big')).hexdigest(), 16) % self.chordRingSize
+        return self._chain(key, replicaIndex + 1)[replicaIndex]
 
     def get_key_list(self, key, replicationCount=-1):
         """Get a list of replica keys for a given replica key
@@ -38,8 +67,4 @@ class Replica:
         """
         replicationCount = self.replicationCount if replicationCount == -1 else replicationCount
 
-        indices = []
-        for i in range(0, replicationCount):
-            indices.append(self.get_key(key, i))
-
-        return indices
+        return self._chain(key, replicationCount)[:replicationCount]
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+
+"""
+Routing cache of live nodes a node learned about from the traffic it sees (requests of other
+nodes, trace hops, lookup results). These nodes are used for routing in addition to the fingers.
+In busy rings, a learned node is often closer to a key than the closest finger, which saves hops.
+"""
+
+import bisect
+from collections import OrderedDict
+from helpers.chordInterval import *
+
+
+class RoutingCache:
+
+    """
+    Bounded set of recently seen nodes with LRU eviction.
+
+    :param maxEntries: maximum number of nodes. 0 disables the cache.
+    """
+
+    def __init__(self, maxEntries=64):
+        self.maxEntries = maxEntries
+        self._nodes = OrderedDict()     # node_id -> node dict, least recently seen first
+        self._nodeIds = []              # Sorted node IDs for bisection
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def add(self, node):
+        """Notes that a node was seen alive.
+
+        :param node: node dict with ``node_id`` and ``node_address``
+        """
+        if self.maxEntries <= 0:
+            return
+
+        nodeId = node["node_id"]
+        if nodeId in self._nodes:
+            self._nodes.move_to_end(nodeId)
+        else:
+            bisect.insort(self._nodeIds, nodeId)
+        self._nodes[nodeId] = {"node_id": nodeId, "node_address": node["node_address"]}
+
+        if len(self._nodes) > self.maxEntries:
+            self.remove(next(iter(self._nodes)))
+
+    def remove(self, nodeId):
+        if nodeId in self._nodes:
+            del self._nodes[nodeId]
+            del self._nodeIds[bisect.bisect_left(self._nodeIds, nodeId)]
+
+    def remove_address(self, address):
+        """Removes the node with the given address, e.g. after it did not respond.
+        """
+        for nodeId in [nodeId for nodeId, node in self._nodes.items() if node["node_address"] == address]:
+            self.remove(nodeId)
+
+    def closest_preceding(self, nodeId, key):
+        """Cached node closest to, but preceding the key as seen from our node.
+
+        :param nodeId: ID of our node
+        :param key: the key to look up
+        :returns: node dict or None if no cached node lies in (nodeId, key)
+        """
+        if not self._nodeIds:
+            return None
+
+        # Largest ID before the key. If there is none, the largest ID before 0.
+        candidate = self._nodeIds[bisect.bisect_left(self._nodeIds, key) - 1]
+        if candidate != nodeId and in_interval(candidate, nodeId, key):
+            return self._nodes[candidate]
+
+        return None
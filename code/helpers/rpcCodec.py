@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+
+"""
+Binary codec for the RPCs between Chord nodes.
+
+The MsgPack codec shipped with aiomas cannot be used directly: node IDs and keys are 256 bit
+integers, but MsgPack only supports integers up to 64 bit. This codec transfers larger integers
+as MsgPack extension type. Besides, lists are decoded as lists again (and not as tuples), so that
+responses look the same as with the JSON codec.
+
+With this codec, stored values are transferred as raw bytes instead of base64 strings.
+All nodes of a ring must use the same codec. JSON stays the default, so that this codec has to
+be enabled explicitly (RPC_CODEC = msgpack) on all nodes of a ring.
+"""
+
+import aiomas
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+EXT_BIG_INT = 1
+INT_MIN = -2**63
+INT_MAX = 2**64 - 1
+
+
+def _pack_big_ints(obj):
+    """Replaces integers exceeding 64 bit in (nested) containers by MsgPack extension types.
+    """
+    if isinstance(obj, int) and not isinstance(obj, bool):
+        if INT_MIN <= obj <= INT_MAX:
+            return obj
+        length = (obj.bit_length() + 8) // 8  # one additional bit for the sign
+        return msgpack.ExtType(EXT_BIG_INT, obj.to_bytes(length, byteorder='big', signed=True))
+    elif isinstance(obj, dict):
+        return {_pack_big_ints(key): _pack_big_ints(value) for key, value in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [_pack_big_ints(value) for value in obj]
+
+    return obj
+
+
+def _unpack_ext(code, data):
+    if code == EXT_BIG_INT:
+        return int.from_bytes(data, byteorder='big', signed=True)
+
+    return msgpack.ExtType(code, data)
+
+
+class ChordMsgPack(aiomas.codecs.Codec):
+    """
+    A :class:`aiomas.codecs.Codec` using MsgPack with support for 256 bit integers.
+    """
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError('Please install "msgpack" to use the %s codec: pip3 install msgpack'
+                              % self.__class__.__name__)
+        super().__init__()
+
+    def encode(self, data):
+        return msgpack.packb(_pack_big_ints(data), default=self.serialize_obj, use_bin_type=True)
+
+    def decode(self, data):
+        return msgpack.unpackb(data, object_hook=self.deserialize_obj, ext_hook=_unpack_ext,
+                               use_list=True, raw=False, strict_map_key=False)
+
+
+# Codecs selectable in the configuration
+RPC_CODECS = {
+    "msgpack": ChordMsgPack,
+    "json": aiomas.codecs.JSON
+}
@@ -7,20 +7,168 @@ multiple entrys per key.
 """
 
 # Storage Class which is called by PUT and GET Operations
+import bisect
 import datetime
+import heapq
+import itertools
+import sys
+import time
+from collections.abc import Mapping
 from helpers.chordInterval import *
+from helpers.bloomFilter import CountingBloomFilter
+from helpers.merkleTree import MerkleTree, item_digest, DIGEST_MODULO, INSIDE, OUTSIDE, PARTIAL
+
+# Memory accounting: bytes of the bookkeeping structures per item (expiry heap entry, list slot)
+# and per key (list of values, digest, dict and ring index slots) in addition to the objects themselves
+ITEM_OVERHEAD = sys.getsizeof([0.0, 0, 0, None]) + sys.getsizeof(0.0) + sys.getsizeof(2**40) + 8
+KEY_OVERHEAD = sys.getsizeof([]) + sys.getsizeof(2**255) + 6 * 8
+
+# Digests of key ranges cached per partition (see Storage.merkle_hashes)
+RANGE_DIGEST_CACHE = 4
+
+
+class StorageItem:
+
+    """
+    Compact record of a single stored value.
+
+    Only the value and its absolute deadline on the monotonic clock are kept. Using slots avoids
+    the per-instance dict and the formerly stored ISO time string. A stored item references its
+    entry in the expiry heap of the storage, so that the entry can be invalidated on removal.
+    """
+
+    __slots__ = ("value", "deadline", "entry")
+
+    def __init__(self, value, deadline):
+        self.value = value
+        self.deadline = deadline
+        self.entry = None
+
+    def remaining_ttl(self, now=None):
+
+        """Seconds until this item expires (0 if already expired).
+
+        :param now: current monotonic time. Determined if None.
+        :rtype: float
+        """
+
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.deadline - now)
+
+    def __repr__(self):
+        return "StorageItem(%r, %.3f)" % (self.value, self.deadline)
+
+
+class StoragePartition:
+
+    """
+    Keys of one ring segment with their sorted ring positions and digests.
+    """
+
+    __slots__ = ("data", "ring", "size", "digests", "rangeDigests")
+
+    def __init__(self):
+        self.data = {}      # key -> list of StorageItem
+        self.ring = []      # Sorted ring positions of all keys in ``data``
+        self.size = 0       # Accounted bytes of this partition
+        self.digests = {}   # key -> sum of the digests of its distinct values
+        self.rangeDigests = {}  # (low, high) -> sum of the key digests in (low, high], kept up to date
+
+
+class StorageView(Mapping):
+
+    """
+    Read-only dict view of all keys and their items over the partitions of a storage.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def __getitem__(self, key):
+        return self._storage._partition(key).data[key]
+
+    def __contains__(self, key):
+        return key in self._storage._partition(key).data
+
+    def __iter__(self):
+        for partition in self._storage.partitions:
+            yield from partition.data
+
+    def __len__(self):
+        return sum(len(partition.data) for partition in self._storage.partitions)
+
 
 class Storage:
 
     """
     Manage PUT and GET operations
+
+    Keys are kept in 2^partitionBits partitions, each covering a fixed segment of the ring
+    (selected by the high-order bits of the key). When a range of keys is handed over to
+    another node, partitions inside the range are moved as a whole and only the partitions at
+    the borders of the range are split.
+    A Merkle tree with one leaf per partition allows to compare the content with other nodes.
+    The digest of each key is kept, so that parts of a partition are compared without hashing.
+    A counting Bloom filter of all keys can be published to other nodes.
+
+    :param maxBytes: memory budget of the storage in bytes. If exceeded, items closest to their
+        expiry are evicted first. No limit if None.
+    :param maxValuesPerKey: maximum number of values kept per key. The oldest value of a key is
+        dropped in favor of a new one. No limit if None.
+    :param partitionBits: number of high-order key bits selecting the partition
+    :param filterBits: the key filter has 2^filterBits counters
     """
 
-    def __init__(self):
-        self.data = {}
+    def __init__(self, maxBytes=None, maxValuesPerKey=None, partitionBits=8, filterBits=20):
+        self._shift = CHORD_FINGER_TABLE_SIZE - partitionBits
+        self.partitions = [StoragePartition() for _ in range(2**partitionBits)]
+        self.merkle = MerkleTree(len(self.partitions))
+        self.key_filter = CountingBloomFilter(filterBits)
+        self.data = StorageView(self)
+        self._expiry = []   # Min-heap of [deadline, sequence, key, item] ordered by monotonic deadline
+        self._sequence = itertools.count()  # Tie breaker for equal deadlines
+        self._staleEntries = 0  # Heap entries of removed items, their key and item are set to None
+        self.journal = None     # Optional StorageJournal that records all changes
+
+        self.maxBytes = maxBytes
+        self.maxValuesPerKey = maxValuesPerKey
+        self.size = 0       # Accounted bytes of all keys and items
+        self.stats = {
+            "evicted_items": 0,     # Items dropped to stay within maxBytes
+            "evicted_bytes": 0,
+            "capped_items": 0,      # Items dropped due to maxValuesPerKey
+            "rejected_items": 0     # Items larger than the whole budget
+        }
 
     def clear(self):
-        self.data = {}
+        self.partitions = [StoragePartition() for _ in self.partitions]
+        self.merkle.clear()
+        self.key_filter.clear()
+        self._expiry = []
+        self._staleEntries = 0
+        self.size = 0
+
+    def _partition_index(self, key):
+        # Keys other than ring positions (e.g. strings) are all kept in the first partition
+        return key >> self._shift if isinstance(key, int) else 0
+
+    def _partition(self, key):
+        return self.partitions[self._partition_index(key)]
+
+    @staticmethod
+    def _item_size(item):
+
+        """Bytes accounted for a single storage item including its bookkeeping.
+
+        :type item: StorageItem
+        :rtype: int
+        """
+
+        return sys.getsizeof(item) + sys.getsizeof(item.value) + ITEM_OVERHEAD
+
+    @staticmethod
+    def _key_size(key):
+        return sys.getsizeof(key) + KEY_OVERHEAD
 
     def put(self, key, value, ttl=43200,timeOfInsert=None):
 
@@ -30,27 +178,188 @@ class Storage:
         :param value: the dht value
         :todo: Add support for binary keys and values
         :param ttl: time to live in seconds. after this period of seconds the item will be deleted
-        :param timeOfInsert: datetime when the item was inserted. If none is set, we will use the current date. Will be used later to check outdated items.
+        :param timeOfInsert: ISO formatted datetime when the item was inserted. If none is set, we will use the current date. Only used to calculate the deadline of the item.
         :Example: See example of  :py:meth:`get`  method.
         """
 
-        if not timeOfInsert:
-            timeOfInsert = datetime.datetime.now().isoformat()
-
         if ttl>43200:
             raise AttributeError("TTL must be below 43200.")
 
-        if not key in self.data: # if there does not exists a item of the given key, we create a new list
-            self.data[key] = []
+        # Absolute deadline on the monotonic clock. Only items inserted elsewhere need their age calculated.
+        deadline = time.monotonic() + ttl
+        if timeOfInsert:
+            age = datetime.datetime.now() - self._parse_time(timeOfInsert)
+            deadline -= age.total_seconds()
+
+        return self._insert(key, StorageItem(value, deadline))
+
+    def _insert(self, key, item):
+
+        """Adds a storage item to the data, the ring index and the expiry heap.
+
+        Enforces the limits of the storage afterwards. Evictions are not journaled, as replaying
+        the puts applies the same limits again.
+
+        :param key: the dht key
+        :param item: the item to add
+        :type item: StorageItem
+        :returns: False if the item alone exceeds the memory budget or was dropped right away
+            to enforce the limits
+        :rtype: bool
+        """
+
+        itemSize = self._item_size(item)
+        if self.maxBytes is not None and itemSize + self._key_size(key) > self.maxBytes:
+            self.stats["rejected_items"] += 1
+            return False
+
+        index = self._partition_index(key)
+        partition = self.partitions[index]
+        if not key in partition.data: # if there does not exists a item of the given key, we create a new list
+            partition.data[key] = []
+            bisect.insort(partition.ring, key)
+            partition.size += self._key_size(key)
+            self.key_filter.add(key)
+            self.size += self._key_size(key)
+
+        bucket = partition.data[key]
+        if not any(listItem.value == item.value for listItem in bucket):
+            self._add_digest(index, key, item_digest(key, item.value))
+        bucket.append(item)
+        partition.size += itemSize
+        self.size += itemSize
+        item.entry = [item.deadline, next(self._sequence), key, item]
+        heapq.heappush(self._expiry, item.entry)
+
+        if self.journal:
+            self.journal.log_put(key, item)
+
+        # Per key limit: drop the oldest values
+        if self.maxValuesPerKey is not None:
+            while len(bucket) > self.maxValuesPerKey:
+                capped = bucket.pop(0)
+                self._drop_entry(capped)
+                self._merkle_remove(index, key, bucket, capped.value)
+                cappedSize = self._item_size(capped)
+                partition.size -= cappedSize
+                self.size -= cappedSize
+                self.stats["capped_items"] += 1
+
+        if self.maxBytes is not None:
+            self._evict(self.maxBytes)
+
+        # The new item might have been the first to go
+        return item.entry is not None
+
+    def _drop_entry(self, item):
+
+        """Invalidates the heap entry of an item leaving the storage, so that it does not keep the item alive.
+
+        The entry itself is skipped once it reaches the top of the heap. The heap is rebuilt if
+        most of its entries are invalid.
+        """
+
+        if item.entry is None:
+            return
+        item.entry[2] = item.entry[3] = None
+        item.entry = None
+        self._staleEntries += 1
+
+        if self._staleEntries > 64 and self._staleEntries > len(self._expiry) // 2:
+            self._expiry = [entry for entry in self._expiry if entry[3] is not None]
+            heapq.heapify(self._expiry)
+            self._staleEntries = 0
+
+    def _pop_entry(self):
+
+        """Removes the heap entry with the earliest deadline.
+
+        :returns: key and item of the entry. Both are None if the item was removed before.
+        :rtype: tuple
+        """
+
+        _, _, key, item = heapq.heappop(self._expiry)
+        if item is None:
+            self._staleEntries -= 1
+        else:
+            item.entry = None
+        return key, item
+
+    def _remove_item(self, key, item):
+
+        """Removes a specific item of a key. The key is dropped if it has no values left.
+
+        :returns: True if the item was still stored
+        :rtype: bool
+        """
+
+        index = self._partition_index(key)
+        partition = self.partitions[index]
+        bucket = partition.data.get(key)
+        if bucket is None:
+            return False
+
+        for position, listItem in enumerate(bucket):
+            if listItem is item:
+                del bucket[position]
+                self._drop_entry(item)
+                self._merkle_remove(index, key, bucket, item.value)
+                removedSize = self._item_size(item)
+
+                if len(bucket) == 0:
+                    del partition.data[key]
+                    del partition.ring[bisect.bisect_left(partition.ring, key)]
+                    removedSize += self._key_size(key)
+                    self.key_filter.remove(key)
+
+                partition.size -= removedSize
+                self.size -= removedSize
+                return True
+
+        return False
+
+    def _merkle_remove(self, index, key, bucket, value):
+        # The Merkle tree contains each value of a key once, no matter how often it was stored
+        if not any(listItem.value == value for listItem in bucket):
+            self._add_digest(index, key, -item_digest(key, value))
+
+    def _add_digest(self, index, key, digest):
+
+        """Adds the digest of a value of a key (or removes it if negative) to the key digest,
+        the Merkle leaf and the cached range digests of the partition.
+        """
+
+        partition = self.partitions[index]
+        keyDigest = (partition.digests.get(key, 0) + digest) % DIGEST_MODULO
+        if keyDigest:
+            partition.digests[key] = keyDigest
+        else:
+            partition.digests.pop(key, None)
+        self.merkle.add(index, digest)
+
+        for low, high in partition.rangeDigests:
+            if low < key <= high:
+                partition.rangeDigests[low, high] = (partition.rangeDigests[low, high] + digest) % DIGEST_MODULO
+
+    def _evict(self, targetSize):
+
+        """Evicts the items closest to their expiry until the storage fits into targetSize bytes.
+        """
 
-        self.data[key].append({"value": value, "timeOfInsert": timeOfInsert, "ttl": ttl})
+        while self.size > targetSize and self._expiry:
+            key, item = self._pop_entry()
+            sizeBefore = self.size
+            if item is not None and self._remove_item(key, item):
+                self.stats["evicted_items"] += 1
+                self.stats["evicted_bytes"] += sizeBefore - self.size
 
     def merge(self, dataToMerge):
 
         """Merge another storage to this storage
 
-        :param dataToMerge: the dht key
-        :type dataToMerge: list
+        :param dataToMerge: either the data of another storage (dict of lists with storage items) or
+            a list of records received from a remote node (see :py:meth:`serialize`)
+        :type dataToMerge: dict or list
         :Example:
              .. code-block:: python
                     storage2 = Storage()
@@ -59,19 +368,86 @@ class Storage:
                     storage3 = Storage()
                     storage3.put(1, 1)
                     storage2.merge(storage3.data)
-                    # storage2.data now contains all three elements
+                    # storage2.data still contains two elements, as 1:1 is known already
+
+        Values already stored under a key are skipped. The same record may arrive several times,
+        e.g. by read repair, anti-entropy and handoff, and must not be duplicated.
         """
         if not dataToMerge:
             print("[storage:merge] No data to merge.")
             return
 
-        for key in dataToMerge:
-            itemsOfKey = dataToMerge[key]
-            if not key in self.data: # if there does not exists a item of the given key, we create a new list
-                self.data[key] = []
+        if isinstance(dataToMerge, Mapping):
+            records = ((key, listItem.value, listItem.deadline)
+                       for key in dataToMerge for listItem in dataToMerge[key])
+        else:
+            now = time.monotonic()
+            records = ((key, value, now + min(ttl, 43200)) for key, value, ttl in dataToMerge)
+
+        for key, value, deadline in records:
+            if not self._contains_value(key, value):
+                self._insert(key, StorageItem(value, deadline))
+
+    def _contains_value(self, key, value):
+        bucket = self._partition(key).data.get(key, ())
+        return any(item.value == value for item in bucket)
+
+    @staticmethod
+    def serialize(dataToSerialize):
+
+        """Converts storage data into a list of records for sending it to another node.
+
+        Each record is a list ``[key, value, ttl]``. The remaining time to live is used
+        instead of the deadline, as monotonic clocks of different nodes are not comparable.
+
+        :param dataToSerialize: dict of keys with their lists of storage items
+        :type dataToSerialize: dict
+        :returns: list of records which can be passed to :py:meth:`merge`
+        :rtype: list
+        """
+
+        now = time.monotonic()
+        records = []
+        for key in dataToSerialize:
+            for item in dataToSerialize[key]:
+                records.append([key, item.value, item.remaining_ttl(now)])
 
-            for listItem in itemsOfKey:
-                self.data[key].append(listItem)
+        return records
+
+    @staticmethod
+    def _ring_ranges(keyLeft, keyRight):
+
+        """Splits the ring interval (keyLeft, keyRight] into ranges (low, high] not wrapping around 0.
+
+        The interval wraps around 0 if keyLeft is greater than keyRight. Equal bounds follow
+        :py:func:`in_interval` and cover every key except keyLeft itself.
+
+        :returns: list of (low, high) tuples
+        :rtype: list
+        """
+
+        if keyLeft < keyRight:
+            return [(keyLeft, keyRight)]
+        elif keyLeft > keyRight:
+            return [(keyLeft, CHORD_RING_SIZE - 1), (-1, keyRight)]
+        else:
+            return [(keyLeft, CHORD_RING_SIZE - 1), (-1, keyLeft - 1)]
+
+    def _partitions_between(self, keyLeft, keyRight):
+
+        """Partitions touched by the ring interval (keyLeft, keyRight].
+
+        :returns: generator of (partition index, start, stop) tuples. If start is None, the whole
+            partition is covered. Otherwise, the keys ``ring[start:stop]`` of the partition are covered.
+        """
+
+        for low, high in self._ring_ranges(keyLeft, keyRight):
+            for index in range((low + 1) >> self._shift, min((high >> self._shift) + 1, len(self.partitions))):
+                if low < (index << self._shift) and ((index + 1) << self._shift) - 1 <= high:
+                    yield index, None, None
+                else:
+                    ring = self.partitions[index].ring
+                    yield index, bisect.bisect_right(ring, low), bisect.bisect_right(ring, high)
 
     # successor must be included, predecessor must not be included
     def get_storage_data_between(self, keyOldPredecessor, keyNewPredecessor):
@@ -85,10 +461,13 @@ class Storage:
         """
 
         newset = {}
-        for key in self.data:
-            item = self.data[key]
-            if in_interval(key, keyOldPredecessor, keyNewPredecessor, inclusive_right=True):
-                newset[key] = item
+        for index, start, stop in self._partitions_between(keyOldPredecessor, keyNewPredecessor):
+            partition = self.partitions[index]
+            if start is None:
+                newset.update(partition.data)
+            else:
+                for key in partition.ring[start:stop]:
+                    newset[key] = partition.data[key]
 
         return newset
 
@@ -101,13 +480,192 @@ class Storage:
         :param keyNewPredecessor: the key of the new predecessor
         """
 
-        keysToDelete = []
-        for key in self.data:
-            if in_interval(key, keyOldPredecessor, keyNewPredecessor, inclusive_right=True):
-                keysToDelete.append(key)
+        self.split_storage_data_between(keyOldPredecessor, keyNewPredecessor)
+
+    def split_storage_data_between(self, keyOldPredecessor, keyNewPredecessor):
+
+        """Removes and returns the storage items between two nodes in one step.
+
+        Used to hand keys over to a new predecessor. Partitions completely inside the interval
+        are detached as a whole, only the border partitions are split key by key. Like this, the
+        costs depend on the number of moved keys, not on the total number of stored keys.
+
+        :param keyOldPredecessor: the key of the old predecessor (excluded)
+        :param keyNewPredecessor: the key of the new predecessor (included)
+        :returns: dict of keys with their lists of storage items
+        :rtype: dict
+        """
+
+        newset = {}
+        for index, start, stop in self._partitions_between(keyOldPredecessor, keyNewPredecessor):
+            partition = self.partitions[index]
+            if start is None:
+                # Move the whole partition and replace it by an empty one
+                newset.update(partition.data)
+                for items in partition.data.values():
+                    for item in items:
+                        self._drop_entry(item)
+                self.size -= partition.size
+                self.partitions[index] = StoragePartition()
+                self.merkle.update(index, 0)
+                for key in partition.data:
+                    self.key_filter.remove(key)
+            else:
+                for key in partition.ring[start:stop]:
+                    newset[key] = partition.data.pop(key)
+                    self.key_filter.remove(key)
+                    movedSize = self._key_size(key)
+                    for item in newset[key]:
+                        movedSize += self._item_size(item)
+                        self._drop_entry(item)
+                    self._add_digest(index, key, -partition.digests.get(key, 0))
+                    partition.size -= movedSize
+                    self.size -= movedSize
+                del partition.ring[start:stop]
+
+        if self.journal and newset:
+            self.journal.log_delete(keyOldPredecessor, keyNewPredecessor)
+
+        return newset
 
-        for key in keysToDelete:
-            del(self.data[key])
+    def leaf_ranges(self, keyLeft, keyRight, leaf):
+
+        """Parts of a partition (Merkle leaf) inside the ring interval (keyLeft, keyRight].
+
+        :returns: list of non-wrapping ranges (low, high)
+        :rtype: list
+        """
+
+        return self._clip_ranges(self._ring_ranges(keyLeft, keyRight), leaf)
+
+    def _clip_ranges(self, ranges, index):
+        first = index << self._shift
+        last = ((index + 1) << self._shift) - 1
+        clipped = []
+        for low, high in ranges:
+            low, high = max(low, first - 1), min(high, last)
+            if low < high:
+                clipped.append((low, high))
+
+        return clipped
+
+    @staticmethod
+    def split_range(low, high, parts):
+
+        """Splits the non-wrapping range (low, high] into at most ``parts`` ranges of about equal width.
+
+        :returns: list of (low, high) tuples
+        :rtype: list
+        """
+
+        step = max((high - low) // parts, 1)
+        bounds = list(range(low, high, step))[:parts] + [high]
+        return list(zip(bounds, bounds[1:]))
+
+    def merkle_hashes(self, keyLeft, keyRight, nodes):
+
+        """Merkle tree hashes of the given nodes, only considering the keys in (keyLeft, keyRight].
+
+        Subtrees completely inside the interval use the incrementally maintained hashes. The parts
+        of the partitions at the borders of the interval are summed up from the key digests once
+        and kept up to date afterwards, so comparing the same interval again costs no hashing.
+
+        :param nodes: list of tree node indices (see :py:class:`MerkleTree`)
+        :returns: list of hashes in the order of nodes
+        :rtype: list
+        """
+
+        ranges = self._ring_ranges(keyLeft, keyRight)
+
+        def classify(firstLeaf, lastLeaf):
+            lowKey = firstLeaf << self._shift
+            highKey = ((lastLeaf + 1) << self._shift) - 1
+            state = OUTSIDE
+            for low, high in ranges:
+                if low < lowKey and highKey <= high:
+                    return INSIDE
+                if low < highKey and lowKey <= high:
+                    state = PARTIAL
+            return state
+
+        def partial_leaf(index):
+            partition = self.partitions[index]
+            digest = 0
+            for bounds in self._clip_ranges(ranges, index):
+                if bounds not in partition.rangeDigests:
+                    if len(partition.rangeDigests) >= RANGE_DIGEST_CACHE:
+                        partition.rangeDigests.clear()
+                    partition.rangeDigests[bounds] = self.range_digest(*bounds)[0]
+                digest += partition.rangeDigests[bounds]
+            return digest % DIGEST_MODULO
+
+        return [self.merkle.range_hash(node, classify, partial_leaf) for node in nodes]
+
+    def range_digest(self, low, high):
+
+        """Sum of the key digests in the non-wrapping range (low, high] and the number of keys in it.
+
+        Partitions completely inside the range use their Merkle leaf. Only the keys of the
+        partitions at the borders are summed up.
+
+        :returns: tuple of digest and number of keys
+        :rtype: tuple
+        """
+
+        digest = count = 0
+        for index, start, stop in self._partitions_between(low, high):
+            partition = self.partitions[index]
+            if start is None:
+                digest += self.merkle.leaf(index)
+                count += len(partition.data)
+            else:
+                digest += sum(partition.digests.get(key, 0) for key in partition.ring[start:stop])
+                count += stop - start
+
+        return digest % DIGEST_MODULO, count
+
+    def key_digests(self, low, high):
+
+        """Keys in the non-wrapping range (low, high] with their digests.
+
+        :returns: list of ``[key, digest]``
+        :rtype: list
+        """
+
+        keys = []
+        for index, start, stop in self._partitions_between(low, high):
+            partition = self.partitions[index]
+            ring = partition.ring if start is None else partition.ring[start:stop]
+            keys.extend([key, partition.digests.get(key, 0)] for key in ring)
+
+        return keys
+
+    def diff_keys(self, keys, records):
+
+        """Compares the items of the given keys with the records of a remote node.
+
+        :param keys: keys whose items are all contained in records
+        :param records: records of the remote node (see :py:meth:`serialize`)
+        :returns: tuple of records only known remotely and records only known locally
+        :rtype: tuple
+        """
+
+        # Values are compared without multiplicity, as merging skips values known already
+        remote = {}
+        for record in records:
+            remote.setdefault(item_digest(record[0], record[1]), record)
+
+        onlyLocal = []
+        local = set()
+        for record in self.serialize({key: self.get_items(key) for key in keys}):
+            digest = item_digest(record[0], record[1])
+            if digest not in remote and digest not in local:
+                onlyLocal.append(record)
+            local.add(digest)
+
+        onlyRemote = [record for digest, record in remote.items() if digest not in local]
+
+        return onlyRemote, onlyLocal
 
     def get(self, key):
 
@@ -128,48 +686,63 @@ class Storage:
         """
 
         returnValues = []
-        if not key in self.data or len(self.data[key]) == 0:
+        bucket = self._partition(key).data.get(key)
+        if not bucket:
             return []
         else:
-            for key2, val in enumerate(self.data[key]):
-                returnValues.append( self.data[key][key2]["value"])
+            for item in bucket:
+                returnValues.append(item.value)
         return returnValues
 
-    def timeDiff(self, timeStart, timeStop, ttl):
+    def get_items(self, key):
 
-        """Checks if an item inserted at timeStart with a given ttl is still valid
-        at timestop (ttl has not expired at timeStop)
+        """Returns the storage items for the given key, e.g. to determine their remaining time to live.
 
-        :param timeStart:  time when the item was inserted
-        :type: timeStart: datetime
-        :param timeStop: time when the item is checked
-        :type: timeStop: datetime
-        :param ttl: time to live in seconds
-        :type ttl: int
-        :returns: True if valid or false if invalid
-        :rtype: Boolean
+        :param key: the dht key
+        :returns: list of storage items
+        :rtype: list
         """
 
-        diff = timeStop-timeStart
-        if diff >= datetime.timedelta(seconds=ttl):
-            return True
-        else:
-            return False
+        return list(self._partition(key).data.get(key, []))
 
-    def clean_old(self):
+    @staticmethod
+    def _parse_time(timeOfInsert):
+
+        """Parses an ISO formatted time of insert.
+
+        :param timeOfInsert: time string as created by ``datetime.isoformat()``
+        :rtype: datetime
+        """
+
+        if "." in timeOfInsert:
+            return datetime.datetime.strptime(timeOfInsert, "%Y-%m-%dT%H:%M:%S.%f")
+        return datetime.datetime.strptime(timeOfInsert, "%Y-%m-%dT%H:%M:%S")
+
+    def clean_old(self, maxItems=None):
 
         """
         Clean old items where the time to live has expired.
+
+        Only the expired items are visited as they are taken from a heap ordered by deadline.
+        Items that were already removed otherwise (e.g. handed over to another node) are skipped.
+
+        :param maxItems: maximum number of heap entries to process in this call. Allows to evict
+            in small slices without blocking the event loop. No limit if None.
+        :returns: number of processed heap entries. If it equals maxItems, more items might be expired.
+        :rtype: int
         """
 
-        for bucketKey in self.data:
-            keysToDelete = []
-            bucket = self.data[bucketKey]
-            for key, val in enumerate(bucket):
-                item = bucket[key]
-                timeobj = datetime.datetime.strptime(item["timeOfInsert"], "%Y-%m-%dT%H:%M:%S.%f")
-                if self.timeDiff(timeobj, datetime.datetime.now(), item["ttl"]):
-                    keysToDelete.append(key)
+        now = time.monotonic()
+        processed = 0
+
+        while self._expiry and self._expiry[0][0] <= now:
+            if maxItems is not None and processed >= maxItems:
+                break
+
+            key, item = self._pop_entry()
+            processed += 1
+
+            if item is not None:
+                self._remove_item(key, item)
 
-            for key in keysToDelete:
-                del (self.data[bucketKey][key])
+        return processed
@@ -0,0 +1,323 @@
+#!/usr/bin/python3
+
+"""
+Optional persistence for the :py:class:`Storage` of a node.
+
+Every change of the storage is appended to a write log (put and delete records). Expiry is
+not logged, as put records carry their deadline and expired puts are skipped on replay.
+From time to time, a compacted snapshot of all live items is written and the log is
+started anew. After a restart, the snapshot is loaded via mmap and the remaining log is
+replayed on top of it. Like this, a node does not need to fetch all of its data from the
+ring again.
+
+Log files are numbered by a generation. A snapshot stores the generation of the first log
+that is not contained in it, so a crash at any point of the snapshot procedure still
+recovers the complete state.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+
+# Record types
+RECORD_PUT = 1
+RECORD_DELETE = 2   # Deletes all keys in the ring interval (key, value]
+
+# Value encodings
+VALUE_STRING = 0
+VALUE_BYTES = 1
+VALUE_JSON = 2
+
+# op, value encoding, key (256 bit), wall clock time, value length
+RECORD_HEADER = struct.Struct(">BB32sdI")
+# magic, log generation
+SNAPSHOT_HEADER = struct.Struct(">4sQ")
+SNAPSHOT_MAGIC = b"CDSS"
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class StorageJournal:
+
+    """
+    Append-only write log plus snapshots for a storage.
+
+    :param directory: directory for the log and snapshot files. Created if missing.
+    :param fsync: ``always`` syncs each record to disk, ``interval`` syncs in :py:meth:`maintain`,
+        ``never`` leaves it to the operating system.
+    :param snapshot_interval: seconds between two snapshots written by :py:meth:`maintain`
+    """
+
+    def __init__(self, directory, fsync="interval", snapshot_interval=600):
+        if fsync not in FSYNC_POLICIES:
+            raise AttributeError("Fsync policy must be one of %s." % ", ".join(FSYNC_POLICIES))
+
+        self.directory = directory
+        self.fsync = fsync
+        self.snapshot_interval = snapshot_interval
+        self.generation = 0
+        self.last_snapshot = time.monotonic()
+
+        self._log = None
+        self._dirty = False
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _log_path(self, generation):
+        return os.path.join(self.directory, "storage.%d.log" % generation)
+
+    def _snapshot_path(self):
+        return os.path.join(self.directory, "storage.snapshot")
+
+    def _log_generations(self):
+        generations = []
+        for filename in os.listdir(self.directory):
+            parts = filename.split(".")
+            if len(parts) == 3 and parts[0] == "storage" and parts[2] == "log" and parts[1].isdigit():
+                generations.append(int(parts[1]))
+
+        return sorted(generations)
+
+    ### Encoding ###
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, str):
+            return VALUE_STRING, value.encode("utf-8")
+        elif isinstance(value, (bytes, bytearray)):
+            return VALUE_BYTES, bytes(value)
+        else:
+            return VALUE_JSON, json.dumps(value).encode("utf-8")
+
+    @staticmethod
+    def _decode_value(encoding, raw):
+        if encoding == VALUE_STRING:
+            return raw.decode("utf-8")
+        elif encoding == VALUE_BYTES:
+            return raw
+        else:
+            return json.loads(raw.decode("utf-8"))
+
+    @classmethod
+    def _encode(cls, op, key, timestamp, value=None):
+        encoding, raw = cls._encode_value(value) if value is not None else (VALUE_BYTES, b"")
+        return RECORD_HEADER.pack(op, encoding, key.to_bytes(32, byteorder='big'), timestamp, len(raw)) + raw
+
+    @classmethod
+    def _decode(cls, buffer, offset=0):
+        """Generator of ``(op, key, timestamp, value, next_offset)`` for all complete records in buffer.
+
+        Parsing stops at a truncated record, e.g. written partially during a crash.
+        """
+        size = len(buffer)
+        while offset + RECORD_HEADER.size <= size:
+            op, encoding, key, timestamp, length = RECORD_HEADER.unpack_from(buffer, offset)
+            end = offset + RECORD_HEADER.size + length
+            if end > size:
+                break
+
+            value = cls._decode_value(encoding, bytes(buffer[offset + RECORD_HEADER.size:end]))
+            yield op, int.from_bytes(key, byteorder='big'), timestamp, value, end
+            offset = end
+
+    @staticmethod
+    def _wall_deadline(item, now_wall, now_monotonic):
+        return now_wall + (item.deadline - now_monotonic)
+
+    ### Writing ###
+    def _append(self, record):
+        if self._log is None:
+            self._log = open(self._log_path(self.generation), "ab")
+
+        self._log.write(record)
+        if self.fsync == "always":
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        else:
+            self._dirty = True
+
+    def log_put(self, key, item):
+        """Appends a put record for a storage item.
+
+        :param key: the dht key
+        :param item: the item added to the storage
+        :type item: StorageItem
+        """
+        deadline = self._wall_deadline(item, time.time(), time.monotonic())
+        self._append(self._encode(RECORD_PUT, key, deadline, item.value))
+
+    def log_delete(self, keyLeft, keyRight):
+        """Appends a delete record for all keys in the ring interval (keyLeft, keyRight].
+        """
+        self._append(self._encode(RECORD_DELETE, keyLeft, time.time(), keyRight))
+
+    def sync(self):
+        """Flushes the log to disk.
+        """
+        if self._log is not None and self._dirty:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        self._dirty = False
+
+    def snapshot(self, storage):
+        """Writes a compacted snapshot of all live items and starts a new log generation.
+
+        :param storage: the storage this journal belongs to
+        """
+        self.begin_snapshot(storage)()
+
+    def begin_snapshot(self, storage):
+        """Starts a snapshot: a new log generation is started and the live items are collected.
+
+        Writing the files is left to the returned function. It does not access the storage or
+        the current log, so it may run in another thread while the storage is changed further.
+
+        :param storage: the storage this journal belongs to
+        :returns: function writing the snapshot and removing the logs contained in it
+        """
+        # New changes go to the next log, the snapshot covers everything before
+        old_log = self._log
+        if old_log is not None:
+            old_log.flush()
+        self._log = None
+        self._dirty = False
+        old_generation = self.generation
+        self.generation += 1
+        generation = self.generation
+
+        now_wall, now_monotonic = time.time(), time.monotonic()
+        items = [(key, self._wall_deadline(item, now_wall, now_monotonic), item.value)
+                 for key in storage.data for item in storage.data[key]]
+        self.last_snapshot = time.monotonic()
+
+        def write_snapshot():
+            if old_log is not None:
+                os.fsync(old_log.fileno())
+                old_log.close()
+
+            path = self._snapshot_path()
+            with open(path + ".tmp", "wb") as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, generation))
+                for key, deadline, value in items:
+                    f.write(self._encode(RECORD_PUT, key, deadline, value))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+
+            for log_generation in self._log_generations():
+                if log_generation <= old_generation:
+                    os.remove(self._log_path(log_generation))
+
+        return write_snapshot
+
+    def maintain(self, storage):
+        """Periodic work: syncs the log (fsync policy ``interval``) and writes a snapshot if due.
+
+        :param storage: the storage this journal belongs to
+        """
+        work = self.begin_maintenance(storage)
+        if work is not None:
+            work()
+
+    def begin_maintenance(self, storage):
+        """Like :py:meth:`maintain`, but the blocking file operations are left to the returned function.
+
+        The function may run in an executor, so that syncing and writing snapshots do not block
+        the event loop.
+
+        :param storage: the storage this journal belongs to
+        :returns: function doing the file operations or None if there is nothing to do
+        """
+        if time.monotonic() - self.last_snapshot >= self.snapshot_interval:
+            # Syncs the previous log as well
+            return self.begin_snapshot(storage)
+
+        if self.fsync == "interval" and self._log is not None and self._dirty:
+            self._log.flush()
+            self._dirty = False
+            log = self._log
+            return lambda: os.fsync(log.fileno())
+
+        return None
+
+    def close(self):
+        self.sync()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    ### Recovery ###
+    @staticmethod
+    def _map_file(path):
+        """Returns a read-only memory map of the file or None if it is missing or empty.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _replay(self, storage, buffer, offset, now_wall):
+        """Applies all records in buffer to the storage.
+
+        :returns: offset after the last complete record
+        """
+        valid_end = offset
+        for op, key, timestamp, value, valid_end in self._decode(buffer, offset):
+            if op == RECORD_PUT:
+                # Items that expired while the node was down are not restored
+                if timestamp > now_wall:
+                    storage.put(key, value, ttl=min(timestamp - now_wall, 43200))
+            elif op == RECORD_DELETE:
+                storage.split_storage_data_between(key, value)
+
+        return valid_end
+
+    def recover(self, storage):
+        """Restores the storage from the latest snapshot and the subsequent logs.
+
+        Must be called before the journal is attached to the storage. A partially written
+        last record is cut off the log.
+
+        :param storage: the (empty) storage to fill
+        :returns: number of restored keys
+        :rtype: int
+        """
+        now_wall = time.time()
+
+        snapshot_generation = 0
+        snapshot = self._map_file(self._snapshot_path())
+        if snapshot is not None:
+            try:
+                magic, snapshot_generation = SNAPSHOT_HEADER.unpack_from(snapshot, 0)
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError("Invalid snapshot file.")
+                self._replay(storage, snapshot, SNAPSHOT_HEADER.size, now_wall)
+            finally:
+                snapshot.close()
+
+        generations = self._log_generations()
+        for generation in generations:
+            path = self._log_path(generation)
+            if generation < snapshot_generation:
+                # Left over from an interrupted snapshot and already contained in it
+                os.remove(path)
+                continue
+
+            log = self._map_file(path)
+            if log is None:
+                continue
+            try:
+                valid_end = self._replay(storage, log, 0, now_wall)
+                size = len(log)
+            finally:
+                log.close()
+
+            if valid_end < size:
+                with open(path, "r+b") as f:
+                    f.truncate(valid_end)
+
+        # Continue with the most recent log
+        self.generation = max(generations + [snapshot_generation])
+        return len(storage.data)
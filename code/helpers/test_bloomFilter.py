@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+import random
+from helpers.chordInterval import *
+from helpers.bloomFilter import BloomFilter, CountingBloomFilter
+from helpers.storage import Storage
+
+class TestBloomFilter(unittest.TestCase):
+
+  def test_add_remove(self):
+      keyFilter = CountingBloomFilter(sizeBits=12)
+      keyFilter.add(42)
+      keyFilter.add(42)
+      keyFilter.add(1000)
+      self.assertTrue(keyFilter.might_contain(42))
+      self.assertTrue(keyFilter.might_contain(1000))
+
+      keyFilter.remove(42)
+      self.assertTrue(keyFilter.might_contain(42))
+      keyFilter.remove(42)
+      keyFilter.remove(1000)
+      self.assertEqual(keyFilter.count, 0)
+      self.assertEqual(keyFilter.bits, bytearray(len(keyFilter.bits)))
+
+  def test_export(self):
+      random.seed(9)
+      keyFilter = CountingBloomFilter(sizeBits=20)
+      keys = [random.randint(0, CHORD_RING_SIZE - 1) for _ in range(2000)]
+      for key in keys:
+          keyFilter.add(key)
+
+      exported = keyFilter.export()
+      # Folded to the next power of 2 above 10 bits per key
+      self.assertEqual(exported.size, 32768)
+      self.assertEqual(exported.hashes, keyFilter.hashes)
+
+      # No false negatives
+      for key in keys:
+          self.assertTrue(exported.might_contain(key))
+
+      # False positive rate close to the expected one
+      falsePositives = sum(exported.might_contain(random.randint(0, CHORD_RING_SIZE - 1)) for _ in range(10000))
+      self.assertLess(falsePositives / 10000, 0.02)
+
+      self.assertRaises(ValueError, BloomFilter, b"\x00" * 3, 4)
+
+  def test_storage_filter(self):
+      storage = Storage(partitionBits=4, filterBits=14)
+      step = CHORD_RING_SIZE // 10
+      for i in range(10):
+          storage.put(i * step + 1, "value")
+
+      # The filter follows handoffs
+      storage.split_storage_data_between(0, 5 * step)
+      for i in range(10):
+          self.assertEqual(storage.key_filter.might_contain(i * step + 1), i >= 5)
+      self.assertEqual(storage.key_filter.count, 5)
+
+      storage.clear()
+      self.assertEqual(storage.key_filter.count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+from helpers.connectionPool import ConnectionPool
+
+class TestConnectionPool(unittest.TestCase):
+
+  def test_reuse(self):
+      pool = ConnectionPool(maxIdle=60)
+      self.assertIsNone(pool.get("a", now=0))
+      pool.add("a", "proxy a", connectTime=0.2, now=0)
+      self.assertEqual(pool.get("a", now=30), "proxy a")
+      # Idle time starts again with every use
+      self.assertEqual(pool.get("a", now=80), "proxy a")
+      self.assertEqual(pool.expired(now=140), [])
+      self.assertEqual(pool.expired(now=141), ["a"])
+      self.assertIsNone(pool.get("a", now=141))
+
+      self.assertTrue(pool.evict("a"))
+      self.assertFalse(pool.evict("a"))
+      self.assertNotIn("a", pool)
+
+      stats = pool.get_statistics()
+      self.assertEqual(stats["requests"], 4)
+      self.assertEqual(stats["reuse_ratio"], 0.5)
+      self.assertAlmostEqual(stats["connect_latency"], 0.2)
+      self.assertEqual(stats["evictions"], 1)
+
+  def test_max_entries(self):
+      pool = ConnectionPool(maxEntries=2)
+      pool.add("a", "proxy a", now=0)
+      pool.add("b", "proxy b", now=1)
+      pool.get("a", now=2)
+      self.assertEqual(pool.add("c", "proxy c", now=3), ["b"])
+      self.assertIn("a", pool)
+      self.assertEqual(len(pool), 2)
+
+      disabled = ConnectionPool(maxEntries=0)
+      disabled.add("a", "proxy a")
+      self.assertIsNone(disabled.get("a"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+import random
+from helpers.chordInterval import *
+from helpers.fingerIndex import FingerIndex
+
+def build_fingertable(nodeId, ring):
+    fingertable = []
+    for k in range(CHORD_FINGER_TABLE_SIZE):
+        start = (nodeId + 2**k) % CHORD_RING_SIZE
+        successor = min(ring, key=lambda node: (node - start) % CHORD_RING_SIZE)
+        fingertable.append({"start": start, "successor": {"node_id": successor, "node_address": str(successor)}})
+    return fingertable
+
+def scan_closest_preceding(nodeId, fingertable, key, fall_back):
+    # Reference: walk the finger table from the top and count distinct alternatives
+    seen = []
+    for finger in reversed(fingertable):
+        successor = finger["successor"]
+        if in_interval(successor["node_id"], nodeId, key) and successor not in seen:
+            seen.append(successor)
+    return seen[fall_back] if fall_back < len(seen) else None
+
+class TestFingerIndex(unittest.TestCase):
+
+  def test_closest_preceding(self):
+      random.seed(16)
+      ring = [random.randint(0, CHORD_RING_SIZE - 1) for _ in range(50)]
+      nodeId = ring[0]
+      fingertable = build_fingertable(nodeId, ring)
+
+      index = FingerIndex()
+      index.rebuild(nodeId, fingertable)
+      self.assertEqual(index.distances, sorted(index.distances))
+      self.assertNotIn(0, index.distances)
+
+      keys = [random.randint(0, CHORD_RING_SIZE - 1) for _ in range(100)] + ring + [nodeId]
+      for key in keys:
+          for fall_back in range(3):
+              self.assertEqual(index.closest_preceding(nodeId, key, fall_back),
+                               scan_closest_preceding(nodeId, fingertable, key, fall_back))
+
+  def test_distinct_nodes(self):
+      nodeId = 100
+      fingertable = [{"start": 101, "successor": {"node_id": 110, "node_address": "a"}},
+                     {"start": 102, "successor": {"node_id": 110, "node_address": "a"}},
+                     {"start": 104, "successor": {"node_id": 200, "node_address": "b"}},
+                     {"start": 108, "successor": None}]
+      index = FingerIndex()
+      index.rebuild(nodeId, fingertable)
+
+      self.assertEqual(index.closest_preceding(nodeId, 300)["node_id"], 200)
+      self.assertEqual(index.closest_preceding(nodeId, 300, fall_back=1)["node_id"], 110)
+      self.assertIsNone(index.closest_preceding(nodeId, 300, fall_back=2))
+      self.assertIsNone(index.closest_preceding(nodeId, 105))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,9 @@ class TestIniParser(unittest.TestCase):
       inip = IniParser("configExample.ini")
       self.assertEqual(inip.get("PORT", "DHT"), '4424')
       self.assertEqual(inip.get("HOSTNAME", "DHT"), "127.0.0.1")
+      # Comment lines are skipped
+      self.assertEqual(inip.get("SUCCESSOR_COPY", "DHT"), "0")
+      self.assertFalse(any(key.startswith("#") for key in inip.data["DHT"]))
 
 if __name__ == '__main__':
     unittest.main()
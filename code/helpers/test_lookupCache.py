@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+from helpers.chordInterval import *
+from helpers.lookupCache import LookupCache
+
+def node(nodeId):
+    return {"node_id": nodeId, "node_address": "tcp://127.0.0.1:%d/0" % nodeId}
+
+class TestLookupCache(unittest.TestCase):
+
+  def test_ranges(self):
+      cache = LookupCache(maxEntries=10, ttl=30)
+      cache.put(150, node(200), now=0)
+      self.assertEqual(cache.get(170, now=1), node(200))
+      self.assertEqual(cache.get(200, now=1), node(200))
+      self.assertIsNone(cache.get(140, now=1))
+
+      # Range is widened by the predecessor
+      cache.put(190, node(200), low=101, now=2)
+      self.assertEqual(cache.get(101, now=3), node(200))
+      self.assertIsNone(cache.get(100, now=3))
+
+      # Range wrapping around 0
+      cache.put(CHORD_RING_SIZE - 5, node(10), now=4)
+      self.assertEqual(cache.get(3, now=5), node(10))
+      self.assertEqual(cache.get(CHORD_RING_SIZE - 1, now=5), node(10))
+
+      # Key equal to the node ID only covers this key
+      cache.put(500, node(500), now=6)
+      self.assertEqual(cache.get(500, now=7), node(500))
+      self.assertIsNone(cache.get(499, now=7))
+
+      self.assertEqual(cache.stats["hits"], 6)
+      self.assertEqual(cache.stats["misses"], 3)
+
+  def test_invalidation(self):
+      cache = LookupCache(maxEntries=2, ttl=30)
+      cache.put(150, node(200), now=0)
+      cache.put(250, node(300), now=0)
+
+      # Expired entries are dropped
+      self.assertIsNone(cache.get(170, now=31))
+      self.assertEqual(cache.stats["expired"], 1)
+      self.assertEqual(len(cache), 1)
+
+      # Least recently used entry is dropped
+      cache.put(150, node(200), now=32)
+      cache.put(350, node(400), now=32)
+      self.assertIsNone(cache.get(260, now=33))
+      self.assertEqual(cache.get(160, now=33), node(200))
+
+      # New node within a cached range
+      cache.invalidate_containing(170)
+      self.assertIsNone(cache.get(160, now=34))
+      self.assertEqual(cache.get(360, now=34), node(400))
+
+      cache.invalidate(400, stale=True)
+      self.assertEqual(len(cache), 0)
+      self.assertEqual(cache.stats["stale_hits"], 1)
+
+      # Disabled cache
+      disabled = LookupCache(maxEntries=0)
+      disabled.put(150, node(200))
+      self.assertIsNone(disabled.get(150))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+import random
+import unittest.mock
+from helpers.chordInterval import *
+from helpers.merkleTree import MerkleTree, item_digest, combine
+from helpers.storage import Storage
+
+class TestMerkleTree(unittest.TestCase):
+
+  def test_incremental_update(self):
+      tree = MerkleTree(8)
+      self.assertEqual(tree.hash(1), 0)
+
+      tree.add(3, item_digest(1, "a"))
+      tree.add(6, item_digest(2, "b"))
+      rootBefore = tree.hash(1)
+      self.assertEqual(tree.leaf_span(1), (0, 7))
+      self.assertEqual(tree.leaf_span(5), (2, 3))
+
+      # Equal to a tree built from scratch
+      rebuilt = MerkleTree(8)
+      rebuilt.update(3, item_digest(1, "a"))
+      rebuilt.update(6, item_digest(2, "b"))
+      self.assertEqual(rebuilt.hash(1), rootBefore)
+      self.assertEqual(tree.hash(2), combine(tree.hash(4), tree.hash(5)))
+
+      # Adding and removing an item restores the previous hash
+      tree.add(6, item_digest(3, "c"))
+      self.assertNotEqual(tree.hash(1), rootBefore)
+      tree.remove(6, item_digest(3, "c"))
+      self.assertEqual(tree.hash(1), rootBefore)
+
+  def test_storage_sync(self):
+      random.seed(8)
+      local = Storage(partitionBits=4)
+      remote = Storage(partitionBits=4)
+      keyLeft, keyRight = CHORD_RING_SIZE // 3, CHORD_RING_SIZE // 3 * 2
+
+      for _ in range(200):
+          key = random.randrange(CHORD_RING_SIZE)
+          local.put(key, "shared")
+          remote.put(key, "shared")
+      # Items outside of the compared range do not matter
+      remote.put(keyRight + 1, "remote only, outside")
+      local.put(keyLeft, "local only, outside")
+      self.assertEqual(local.merkle_hashes(keyLeft, keyRight, [1]), remote.merkle_hashes(keyLeft, keyRight, [1]))
+
+      # Differences inside the range are found down to their leaves
+      local.put(keyLeft + 1, "local only")
+      remote.put(keyRight, "remote only")
+      remote.put(keyRight, "remote only")
+      self.assertNotEqual(local.merkle_hashes(keyLeft, keyRight, [1]), remote.merkle_hashes(keyLeft, keyRight, [1]))
+
+      leaves = [leaf for leaf in range(16)
+                if local.merkle_hashes(keyLeft, keyRight, [16 + leaf]) != remote.merkle_hashes(keyLeft, keyRight, [16 + leaf])]
+      self.assertEqual(leaves, sorted(set([local._partition_index(keyLeft + 1), local._partition_index(keyRight)])))
+
+      # Only the keys with differing digests are exchanged
+      for leaf in leaves:
+          for low, high in local.leaf_ranges(keyLeft, keyRight, leaf):
+              localKeys = dict(map(tuple, local.key_digests(low, high)))
+              remoteKeys = dict(map(tuple, remote.key_digests(low, high)))
+              self.assertEqual(local.range_digest(low, high)[1], len(localKeys))
+              keys = [key for key in set(localKeys) | set(remoteKeys) if localKeys.get(key) != remoteKeys.get(key)]
+              self.assertEqual(len(keys), 1)
+              records = Storage.serialize({key: remote.get_items(key) for key in keys})
+              onlyRemote, onlyLocal = local.diff_keys(keys, records)
+              local.merge(onlyRemote)
+              remote.merge(onlyLocal)
+
+      self.assertEqual(local.merkle_hashes(keyLeft, keyRight, [1]), remote.merkle_hashes(keyLeft, keyRight, [1]))
+      # Values are synchronized once, even if stored twice remotely
+      self.assertEqual(local.get(keyRight), ["remote only"])
+      self.assertEqual(remote.get(keyLeft + 1), ["local only"])
+
+      # Comparing the same interval again needs no hashing, later changes are applied to the cached digests
+      with unittest.mock.patch("helpers.storage.item_digest", side_effect=AssertionError):
+          self.assertEqual(local.merkle_hashes(keyLeft, keyRight, [1]), remote.merkle_hashes(keyLeft, keyRight, [1]))
+      local.put(keyLeft + 2, "later")
+      local.put(keyRight - 1, "later")
+      local.split_storage_data_between(keyLeft + 1, keyLeft + 2)
+      rebuilt = Storage(partitionBits=4)
+      rebuilt.merge(local.data)
+      self.assertEqual(local.merkle_hashes(keyLeft, keyRight, [1]), rebuilt.merkle_hashes(keyLeft, keyRight, [1]))
+
+      # Handoff and expiry keep the tree consistent
+      local.split_storage_data_between(0, CHORD_RING_SIZE // 2)
+      local.clean_old()
+      rebuilt = Storage(partitionBits=4)
+      rebuilt.merge(local.data)
+      self.assertEqual(local.merkle.hash(1), rebuilt.merkle.hash(1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+from helpers.peerSuspicion import PeerSuspicion
+
+class TestPeerSuspicion(unittest.TestCase):
+
+  def test_suspicion(self):
+      suspicion = PeerSuspicion(probeInterval=5, maxProbeInterval=20)
+      suspicion.failure("a", now=0)
+      self.assertIn("a", suspicion)
+      self.assertNotIn("b", suspicion)
+
+      self.assertEqual(suspicion.due_probes(now=4), [])
+      self.assertEqual(suspicion.due_probes(now=5), ["a"])
+      # Not handed out again while the probe is running
+      self.assertEqual(suspicion.due_probes(now=6), [])
+
+      # Failed probes double the interval up to the maximum
+      suspicion.failure("a", now=10)
+      self.assertEqual(suspicion.due_probes(now=19), [])
+      self.assertEqual(suspicion.due_probes(now=20), ["a"])
+      suspicion.failure("a", now=20)
+      suspicion.failure("a", now=20)
+      self.assertEqual(suspicion.due_probes(now=39), [])
+      self.assertEqual(suspicion.due_probes(now=40), ["a"])
+
+      self.assertTrue(suspicion.success("a"))
+      self.assertFalse(suspicion.success("a"))
+      self.assertEqual(len(suspicion), 0)
+
+  def test_max_entries(self):
+      suspicion = PeerSuspicion(maxEntries=2)
+      for address in ("a", "b", "c"):
+          suspicion.failure(address, now=0)
+
+      self.assertEqual(len(suspicion), 2)
+      self.assertNotIn("a", suspicion)
+      self.assertIn("c", suspicion)
+
+if __name__ == '__main__':
+    unittest.main()
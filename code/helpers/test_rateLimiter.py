@@ -0,0 +1,29 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+from helpers.rateLimiter import TokenBucket
+
+class TestRateLimiter(unittest.TestCase):
+
+  def test_token_bucket(self):
+      bucket = TokenBucket(2, burst=3)
+      now = bucket.updated
+
+      # Burst is available at once
+      self.assertTrue(bucket.consume(now=now))
+      self.assertTrue(bucket.consume(now=now))
+      self.assertTrue(bucket.consume(now=now))
+      self.assertFalse(bucket.consume(now=now))
+
+      # Refilled with the configured rate
+      self.assertTrue(bucket.consume(now=now + 0.5))
+      self.assertFalse(bucket.consume(now=now + 0.5))
+
+      # Never more than the burst
+      self.assertTrue(bucket.consume(3, now=now + 100))
+      self.assertFalse(bucket.consume(now=now + 100))
+
+if __name__ == '__main__':
+    unittest.main()
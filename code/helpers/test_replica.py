@@ -19,5 +19,28 @@ class TestReplica(unittest.TestCase):
         self.assertEqual(len(replica.get_key_list(8, 3)), 3)
         self.assertNotEqual(k1, k2) # keys do not collide hopefully at a ring size of 10000
         self.assertEqual(k1, 7195)
+
+  def test_cache(self):
+        replica = Replica(2**256, cacheSize=2)
+        uncached = Replica(2**256, cacheSize=0)
+
+        # Same keys as hashing the key repeatedly
+        key = 2**255 + 17
+        expected = []
+        for i in range(16):
+            key = replica._hash(key)
+            expected.append(key)
+        self.assertEqual(replica.get_key_list(2**255 + 17, 4), expected[:4])
+        self.assertEqual(replica.get_key_list(2**255 + 17, 16), expected)
+        self.assertEqual(uncached.get_key_list(2**255 + 17, 16), expected)
+        self.assertEqual(replica.get_key(2**255 + 17, 7), expected[7])
+
+        # Least recently used key is dropped
+        replica.get_key_list(1)
+        replica.get_key_list(2**255 + 17)
+        replica.get_key_list(2)
+        self.assertEqual(list(replica._cache), [2**255 + 17, 2])
+        self.assertEqual(len(uncached._cache), 0)
+
 if __name__ == '__main__':
     unittest.main()
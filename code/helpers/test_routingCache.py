@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+import random
+from helpers.chordInterval import *
+from helpers.routingCache import RoutingCache
+
+def node(nodeId):
+    return {"node_id": nodeId, "node_address": "tcp://127.0.0.1:%d/0" % (nodeId % 65536)}
+
+class TestRoutingCache(unittest.TestCase):
+
+  def test_closest_preceding(self):
+      random.seed(19)
+      cache = RoutingCache(maxEntries=20)
+      nodeIds = [random.randint(0, CHORD_RING_SIZE - 1) for _ in range(20)]
+      for nodeId in nodeIds:
+          cache.add(node(nodeId))
+      ownId = random.randint(0, CHORD_RING_SIZE - 1)
+
+      for _ in range(200):
+          key = random.randint(0, CHORD_RING_SIZE - 1)
+          preceding = [nodeId for nodeId in nodeIds if in_interval(nodeId, ownId, key)]
+          expected = max(preceding, key=lambda nodeId: (nodeId - ownId) % CHORD_RING_SIZE) if preceding else None
+          result = cache.closest_preceding(ownId, key)
+          self.assertEqual(result["node_id"] if result else None, expected)
+
+  def test_eviction(self):
+      cache = RoutingCache(maxEntries=2)
+      cache.add(node(100))
+      cache.add(node(200))
+      cache.add(node(100))
+      cache.add(node(300))
+      self.assertEqual(len(cache), 2)
+      self.assertEqual(cache.closest_preceding(0, 250)["node_id"], 100)
+
+      cache.remove_address(node(100)["node_address"])
+      self.assertIsNone(cache.closest_preceding(0, 250))
+      self.assertEqual(cache.closest_preceding(0, 350)["node_id"], 300)
+
+      disabled = RoutingCache(maxEntries=0)
+      disabled.add(node(100))
+      self.assertEqual(len(disabled), 0)
+
+if __name__ == '__main__':
+    unittest.main()
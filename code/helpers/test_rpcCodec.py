@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+from helpers.rpcCodec import ChordMsgPack
+from helpers.chordInterval import CHORD_RING_SIZE
+from helpers.validator import *
+from jsonschema.exceptions import ValidationError
+
+class TestRpcCodec(unittest.TestCase):
+
+  def test_round_trip(self):
+      codec = ChordMsgPack()
+
+      message = [0, 1, "rpc_dht_put_data",
+                 [CHORD_RING_SIZE - 1, b"\x00\xffraw bytes", 3600],
+                 {"node_id": -2**100, "successor_list": [{"node_id": 2**64, "node_address": "tcp://127.0.0.1:1337/0"}],
+                  7: "int key", "small": 2**63}]
+
+      decoded = codec.decode(codec.encode(message))
+      self.assertEqual(decoded, message)
+      # Lists stay lists (the aiomas MsgPack codec returns tuples)
+      self.assertTrue(isinstance(decoded[3], list))
+      self.assertTrue(isinstance(decoded[3][1], bytes))
+
+  def test_binary_schema(self):
+      schema = SCHEMA_OUTGOING_RPC["rpc_dht_get_data"]
+      validate_rpc({"status": 0, "data": [b"\x01\x02", "aGFsbG8="]}, schema)
+
+      with self.assertRaises(ValidationError):
+          validate_rpc({"status": 0, "data": [12]}, schema)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,11 @@
 
 import unittest
 from helpers.chordInterval import *
-from helpers.storage import Storage
+from helpers.storage import Storage, StorageItem
 import datetime
+import time
+import tracemalloc
+import random
 import imp
 
 class TestStorage(unittest.TestCase):
@@ -48,12 +51,236 @@ class TestStorage(unittest.TestCase):
       storage3.put(1, 1)
 
       storage2.merge(storage3.data)
-      self.assertEqual(len(storage2.get(1)) ,4)
+      self.assertEqual(len(storage2.get(1)) ,1) # merging does not duplicate known values
       self.assertEqual(len (storage2.get_storage_data_between(1,4)), 3)
       self.assertEqual(len (storage2.data),6)
       storage2.delete_storage_data_between(1,4)
       self.assertEqual(len (storage2.data), 3)
 
+  def test_split_storage_data_between(self):
+      storage = Storage()
+      for key in [5, 10, 15, 20, 25]:
+          storage.put(key, key)
+      storage.put(10, "ten")
+
+      # Plain interval (5, 15]: predecessor excluded, new predecessor included
+      moved = storage.split_storage_data_between(5, 15)
+      self.assertEqual(sorted(moved.keys()), [10, 15])
+      self.assertEqual(len(moved[10]), 2)
+      self.assertEqual(sorted(storage.data.keys()), [5, 20, 25])
+      self.assertEqual(storage.get(10), [])
+
+      # Interval wrapping around 0: (22, 5]
+      self.assertEqual(sorted(storage.get_storage_data_between(22, 5).keys()), [5, 25])
+      moved = storage.split_storage_data_between(22, 5)
+      self.assertEqual(sorted(moved.keys()), [5, 25])
+      self.assertEqual(list(storage.data.keys()), [20])
+
+      # Equal bounds cover the whole ring except the bound itself
+      storage.put(3, 3)
+      self.assertEqual(sorted(storage.get_storage_data_between(20, 20).keys()), [3])
+
+      # Keys inserted after a split are indexed again
+      storage.merge(moved)
+      self.assertEqual(sorted(storage.get_storage_data_between(0, 2**CHORD_FINGER_TABLE_SIZE - 1).keys()),
+                       [3, 5, 20, 25])
+
+
+
+  def test_clean_old_in_slices(self):
+      storage = Storage()
+      longTimeAgo = (datetime.datetime.today() - datetime.timedelta(1)).isoformat()
+
+      for key in range(10):
+          storage.put(key, "expired", timeOfInsert=longTimeAgo)
+      storage.put(3, "valid")
+      storage.put(42, "valid", ttl=60)
+
+      # Evict in bounded slices: each call processes at most maxItems expired entries
+      self.assertEqual(storage.clean_old(maxItems=4), 4)
+      self.assertEqual(storage.clean_old(maxItems=4), 4)
+      self.assertEqual(storage.clean_old(maxItems=4), 2)
+      self.assertEqual(storage.clean_old(maxItems=4), 0)
+
+      # Keys without values left are removed completely, including the ring index
+      self.assertEqual(sorted(storage.data.keys()), [3, 42])
+      self.assertEqual(storage.get(3), ["valid"])
+      self.assertEqual(sorted(storage.get_storage_data_between(0, 100).keys()), [3, 42])
+
+      # Items handed over to another node are skipped once their deadline is reached
+      storage.put(7, "expired", timeOfInsert=longTimeAgo)
+      moved = storage.split_storage_data_between(5, 10)
+      self.assertEqual(list(moved.keys()), [7])
+      self.assertEqual(storage.clean_old(), 1)
+      self.assertEqual(sorted(storage.data.keys()), [3, 42])
+
+
+  def test_serialize_and_merge_records(self):
+      storage = Storage()
+      storage.put(2**200, "big key", ttl=100)
+      storage.put(12, "a")
+      storage.put(12, "b", ttl=10)
+
+      records = Storage.serialize(storage.split_storage_data_between(0, 2**255))
+      self.assertEqual(len(storage.data), 0)
+      self.assertEqual(sorted(record[1] for record in records), ["a", "b", "big key"])
+      for key, value, ttl in records:
+          self.assertTrue(isinstance(key, int))
+          self.assertTrue(0 < ttl <= 43200)
+
+      storage2 = Storage()
+      storage2.merge(records)
+      self.assertEqual(storage2.get(12), ["a", "b"])
+      self.assertEqual(storage2.get(2**200), ["big key"])
+      # The remaining time to live is kept
+      self.assertTrue(storage2.data[12][1].remaining_ttl() <= 10)
+      self.assertTrue(storage2.data[12][0].remaining_ttl() > 10)
+
+  def test_merge_skips_known_values(self):
+      storage = Storage()
+      storage.put(12, "a")
+      storage.put(12, "a") # explicit puts are kept twice
+      records = [[12, "a", 100], [12, "b", 100], [12, "b", 100]]
+
+      storage.merge(records)
+      storage.merge(records)
+      self.assertEqual(storage.get(12), ["a", "a", "b"])
+
+      # The Merkle tree contains each value once
+      other = Storage()
+      other.merge([[12, "a", 100], [12, "b", 100]])
+      self.assertEqual(storage.merkle.hash(1), other.merkle.hash(1))
+      storage.split_storage_data_between(0, 12)
+      self.assertEqual(storage.merkle.hash(1), Storage().merkle.hash(1))
+
+  def test_item_memory(self):
+      count = 5000
+      value = "payload"
+
+      def bytes_per_item(factory):
+          tracemalloc.start()
+          before = tracemalloc.get_traced_memory()[0]
+          items = [factory(i) for i in range(count)]
+          after = tracemalloc.get_traced_memory()[0]
+          tracemalloc.stop()
+          self.assertEqual(len(items), count)
+          return (after - before) / count
+
+      # Previous representation: dict with an ISO time string per item
+      legacy = bytes_per_item(lambda i: {"value": value,
+                                         "timeOfInsert": datetime.datetime.now().isoformat(),
+                                         "ttl": 43200})
+      compact = bytes_per_item(lambda i: StorageItem(value, time.monotonic() + 43200))
+
+      print("[test_item_memory] bytes per item: dict %.1f, StorageItem %.1f" % (legacy, compact))
+      self.assertLess(compact, legacy / 2)
+
+
+  def test_memory_budget(self):
+      storage = Storage()
+      storage.put(1, "x" * 100, ttl=100)
+      itemSize = storage.size
+      storage.clear()
+      self.assertEqual(storage.size, 0)
+
+      # Room for three keys with one item each
+      storage.maxBytes = 3 * itemSize
+      storage.put(1, "x" * 100, ttl=300)
+      storage.put(2, "x" * 100, ttl=100)
+      storage.put(3, "x" * 100, ttl=200)
+      self.assertEqual(storage.stats["evicted_items"], 0)
+
+      # Earliest expiry goes first
+      storage.put(4, "x" * 100, ttl=400)
+      self.assertEqual(sorted(storage.data.keys()), [1, 3, 4])
+      self.assertEqual(storage.stats["evicted_items"], 1)
+      self.assertTrue(storage.stats["evicted_bytes"] >= itemSize)
+      self.assertTrue(storage.size <= storage.maxBytes)
+
+      # Items larger than the whole budget are rejected
+      self.assertFalse(storage.put(5, "x" * (4 * itemSize)))
+      self.assertEqual(storage.stats["rejected_items"], 1)
+      self.assertEqual(sorted(storage.data.keys()), [1, 3, 4])
+
+      # Accounting stays consistent after handoff and expiry
+      storage.split_storage_data_between(0, 3)
+      storage.clean_old()
+      self.assertEqual(storage.size, itemSize)
+
+  def test_max_values_per_key(self):
+      storage = Storage(maxValuesPerKey=2)
+      for value in ["a", "b", "c"]:
+          storage.put("key", value)
+
+      self.assertEqual(storage.get("key"), ["b", "c"])
+      self.assertEqual(storage.stats["capped_items"], 1)
+
+  def test_removed_items_released(self):
+      storage = Storage(maxValuesPerKey=1)
+      storage.put(1, "a")
+      capped = storage.get_items(1)[0]
+      storage.put(1, "b")
+      storage.put(2, "c")
+      moved = storage.split_storage_data_between(1, 2)[2][0]
+
+      # The heap does not reference dropped or handed over items anymore
+      heapItems = [entry[3] for entry in storage._expiry]
+      self.assertFalse(any(item is capped or item is moved for item in heapItems))
+      self.assertEqual(storage._staleEntries, 2)
+
+      # Invalid entries do not pile up
+      for i in range(200):
+          storage.put(1, i)
+      self.assertLess(len(storage._expiry), 200)
+      storage.clean_old()
+      self.assertEqual(storage.get(1), [199])
+
+  def test_insert_evicts_new_item(self):
+      storage = Storage()
+      storage.put(1, "x" * 100, ttl=300)
+      storage.maxBytes = storage.size
+
+      # An item expiring before all others is evicted right away
+      self.assertFalse(storage.put(2, "x" * 100, ttl=100))
+      self.assertEqual(list(storage.data.keys()), [1])
+      self.assertTrue(storage.put(3, "x" * 100, ttl=400))
+      self.assertEqual(list(storage.data.keys()), [3])
+
+
+  def test_partitioned_split(self):
+      random.seed(4)
+      segment = 2**(CHORD_FINGER_TABLE_SIZE - 3)
+      keys = [random.randrange(CHORD_RING_SIZE) for _ in range(300)] + [0, segment - 1, segment, 3 * segment]
+
+      for keyLeft, keyRight in [(segment // 2, 6 * segment + 5), (7 * segment, segment),
+                                (segment - 1, 3 * segment), (segment, segment), (0, 0)]:
+          storage = Storage(partitionBits=3)
+          for key in keys:
+              storage.put(key, "v")
+          fullSize = storage.size
+
+          expected = sorted(set(key for key in keys if in_interval(key, keyLeft, keyRight, inclusive_right=True)))
+          self.assertEqual(sorted(storage.get_storage_data_between(keyLeft, keyRight).keys()), expected)
+
+          moved = storage.split_storage_data_between(keyLeft, keyRight)
+          self.assertEqual(sorted(moved.keys()), expected)
+          self.assertEqual(len(storage.data), len(set(keys)) - len(expected))
+
+          # Size accounting of the remaining partitions is consistent
+          self.assertEqual(storage.size, sum(partition.size for partition in storage.partitions))
+          remaining = Storage(partitionBits=3)
+          remaining.merge(storage.data)
+          self.assertEqual(storage.size, remaining.size)
+          self.assertTrue(storage.size < fullSize or not expected)
+
+      # Partitions inside the range are detached as a whole
+      storage = Storage(partitionBits=3)
+      storage.put(2 * segment + 1, "v")
+      inner = storage.partitions[2]
+      moved = storage.split_storage_data_between(segment, 4 * segment)
+      self.assertEqual(list(moved.keys()), [2 * segment + 1])
+      self.assertIsNot(storage.partitions[2], inner)
+      self.assertEqual(storage.size, 0)
 
 
 if __name__ == '__main__':
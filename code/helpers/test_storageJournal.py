@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+
+# Note: Always use unittest.sh to run the tests!
+
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from helpers.storage import Storage
+from helpers.storageJournal import StorageJournal
+
+class TestStorageJournal(unittest.TestCase):
+
+  def setUp(self):
+      self.directory = tempfile.mkdtemp()
+
+  def tearDown(self):
+      shutil.rmtree(self.directory)
+
+  def recovered_storage(self):
+      storage = Storage()
+      StorageJournal(self.directory).recover(storage)
+      return storage
+
+  def test_recover_from_log(self):
+      storage = Storage()
+      storage.journal = StorageJournal(self.directory, fsync="always")
+
+      storage.put(5, "five")
+      storage.put(5, b"\x00binary")
+      storage.put(2**255, {"json": 1}, ttl=100)
+      storage.put(10, "ten")
+      storage.put(20, "twenty")
+      storage.split_storage_data_between(5, 15)  # removes key 10
+      storage.journal.close()
+
+      recovered = self.recovered_storage()
+      self.assertEqual(recovered.get(5), ["five", b"\x00binary"])
+      self.assertEqual(recovered.get(2**255), [{"json": 1}])
+      self.assertEqual(recovered.get(10), [])
+      self.assertEqual(sorted(recovered.data.keys()), [5, 20, 2**255])
+      self.assertTrue(90 < recovered.data[2**255][0].remaining_ttl() <= 100)
+
+  def test_recover_from_snapshot_and_log(self):
+      storage = Storage()
+      storage.journal = StorageJournal(self.directory, fsync="never")
+      storage.put(1, "a")
+      storage.put(2, "b")
+      storage.journal.snapshot(storage)
+      storage.put(3, "c")
+      storage.split_storage_data_between(0, 1)
+      storage.journal.close()
+
+      # Only the latest log generation is left next to the snapshot
+      self.assertEqual(sorted(os.listdir(self.directory)), ["storage.1.log", "storage.snapshot"])
+
+      recovered = self.recovered_storage()
+      self.assertEqual(sorted(recovered.data.keys()), [2, 3])
+
+  def test_snapshot_written_later(self):
+      storage = Storage()
+      storage.journal = StorageJournal(self.directory, fsync="interval", snapshot_interval=0)
+      storage.put(1, "a")
+
+      # Changes after the snapshot was started go to the next log
+      writeSnapshot = storage.journal.begin_maintenance(storage)
+      storage.put(2, "b")
+      storage.split_storage_data_between(0, 1)
+      writeSnapshot()
+      storage.journal.close()
+
+      self.assertEqual(sorted(os.listdir(self.directory)), ["storage.1.log", "storage.snapshot"])
+      self.assertEqual(sorted(self.recovered_storage().data.keys()), [2])
+
+  def test_rejoin_does_not_duplicate(self):
+      storage = Storage()
+      storage.journal = StorageJournal(self.directory)
+      storage.put(1, "a")
+      storage.put(2, "b")
+      records = Storage.serialize(storage.data)
+      storage.journal.close()
+
+      # After a restart, the successor hands the same items back
+      recovered = self.recovered_storage()
+      recovered.merge(records)
+      self.assertEqual(recovered.get(1), ["a"])
+      self.assertEqual(recovered.get(2), ["b"])
+
+  def test_expiry_is_not_logged(self):
+      storage = Storage()
+      storage.journal = StorageJournal(self.directory)
+      storage.put(1, "short lived", ttl=0.01)
+      storage.journal.sync()
+      path = os.path.join(self.directory, "storage.0.log")
+      size = os.path.getsize(path)
+
+      time.sleep(0.02)
+      self.assertEqual(storage.clean_old(), 1)
+      storage.journal.close()
+      # The put record carries the deadline, so replay skips the item without an extra record
+      self.assertEqual(os.path.getsize(path), size)
+      self.assertEqual(self.recovered_storage().get(1), [])
+
+  def test_truncated_record_is_dropped(self):
+      storage = Storage()
+      storage.journal = StorageJournal(self.directory)
+      storage.put(1, "complete")
+      storage.put(2, "partially written")
+      storage.journal.close()
+
+      path = os.path.join(self.directory, "storage.0.log")
+      with open(path, "r+b") as f:
+          f.truncate(os.path.getsize(path) - 3)
+
+      recovered = self.recovered_storage()
+      self.assertEqual(recovered.get(1), ["complete"])
+      self.assertEqual(recovered.get(2), [])
+
+      # The damaged tail is cut off, so new records can be appended
+      journal = StorageJournal(self.directory)
+      recovered = Storage()
+      journal.recover(recovered)
+      recovered.journal = journal
+      recovered.put(3, "new")
+      journal.close()
+      self.assertEqual(sorted(self.recovered_storage().data.keys()), [1, 3])
+
+if __name__ == '__main__':
+    unittest.main()
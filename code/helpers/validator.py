@@ -1,3 +1,23 @@
+from jsonschema import Draft4Validator, validators
+
+# Validator for RPC responses. Besides the JSON types, the type "binary" matches raw
+# bytes transferred with the MsgPack codec.
+RpcValidator = validators.extend(
+    Draft4Validator,
+    type_checker=Draft4Validator.TYPE_CHECKER.redefine(
+        "binary", lambda checker, instance: isinstance(instance, (bytes, bytearray)))
+)
+
+
+def validate_rpc(instance, schema):
+    """Validates RPC data with :py:data:`RpcValidator`.
+
+    Unlike ``jsonschema.validate``, the schema is not checked against the meta schema which does
+    not know the type "binary".
+    """
+    RpcValidator(schema).validate(instance)
+
+
 # Check server response for outgoing RPCs
 SCHEMA_OUTGOING_RPC = {}
 # Check incoming RPC parameters
@@ -7,12 +27,25 @@ SCHEMA_OUTGOING_RPC["rpc_dht_put_data"] = {
     "type" : "object",
      "properties" : {
         "status" : {"type" : "number"},
-        "message" : {"type" : "string"}
+        "message" : {"type" : "string"},
+        "replicas" : {
+            "type" : "array",
+            "items" : {
+                "type" : "object",
+                "properties" : {
+                    "node_id" : {"type" : "number"},
+                    "status" : {"type" : "number"}
+                },
+                "required": ["node_id", "status"]
+            }
+        }
      },
      "required": ["status"]
 
 }
 
+SCHEMA_OUTGOING_RPC["rpc_dht_put_replica"] = SCHEMA_OUTGOING_RPC["rpc_dht_put_data"]
+
 SCHEMA_OUTGOING_RPC["rpc_dht_get_data"] = {
     "type" : "object",
      "properties" : {
@@ -21,8 +54,13 @@ SCHEMA_OUTGOING_RPC["rpc_dht_get_data"] = {
             "type" : "array",
             "items":
                 {
-                    "type": "string"
+                    # base64 string with the JSON codec, raw bytes with MsgPack
+                    "type": ["string", "binary"]
                 }
+        },
+        "ttls" : {
+            "type" : "array",
+            "items": {"type": "number"}
         }
      },
      "required": ["status"]
@@ -35,6 +73,7 @@ SCHEMA_OUTGOING_RPC["rpc_find_successor_rec"] = {
         "status" : {"type" : "number"},
         "node_id" : {"type" : "number"},
         "node_address" : {"type" : "string"},
+        "key_present" : {"type" : "boolean"},
         "trace" : {
             "type" : "array",
             "items" : {
@@ -50,6 +89,38 @@ SCHEMA_OUTGOING_RPC["rpc_find_successor_rec"] = {
     "required": ["status"]
 }
 
+SCHEMA_OUTGOING_RPC["rpc_get_closest_preceding_fingers"] = {
+    "type" : "object",
+    "properties" : {
+        "status" : {"type" : "number"},
+        "successor" : {
+            "type" : "object",
+            "properties" : {
+                "node_id" : {"type" : "number"},
+                "node_address" : {"type" : "string"}
+            },
+            "required": ["node_id", "node_address"]
+        },
+        "nodes" : {
+            "type" : "array",
+            "items" : {
+                "type" : "object",
+                "properties" : {
+                    "node_id" : {"type" : "number"},
+                    "node_address" : {"type" : "string"}
+                },
+                "required": ["node_id", "node_address"]
+            }
+        }
+    },
+    "required": ["status"]
+}
+
+SCHEMA_OUTGOING_RPC["rpc_find_successors_batch"] = {
+    "type" : "array",
+    "items" : SCHEMA_OUTGOING_RPC["rpc_find_successor_rec"]
+}
+
 SCHEMA_OUTGOING_RPC["rpc_update_predecessor"] = {
     "type" : "object",
      "properties" : {
@@ -97,6 +168,15 @@ SCHEMA_INCOMING_RPC["rpc_get_node_info"] = {
         }
      }
 }
+# Sender announced in lookup RPCs
+SCHEMA_INCOMING_RPC["sender"] = {
+    "type" : "object",
+    "properties" : {
+        "node_id" : {"type" : "integer", "minimum": 0},
+        "node_address" : {"type" : "string", "pattern": "^tcp://[^/]+:[0-9]+/[0-9]+$"}
+    },
+    "required": ["node_id", "node_address"]
+}
 SCHEMA_INCOMING_RPC["rpc_update_finger_table"] = {
     "type" : "object",
      "properties" : {
@@ -106,9 +186,126 @@ SCHEMA_INCOMING_RPC["rpc_update_finger_table"] = {
     "required": ["node_id", "node_address"]
 }
 
+SCHEMA_OUTGOING_RPC["rpc_get_merkle_hashes"] = {
+    "type" : "object",
+    "properties" : {
+        "status" : {"type" : "number"},
+        "hashes" : {
+            "type" : "array",
+            "items" : {"type" : "number"}
+        }
+    },
+    "required": ["status", "hashes"]
+}
+
+# Storage records: [key, value, ttl]
+SCHEMA_STORAGE_RECORDS = {
+    "type" : "array",
+    "items" : {
+        "type" : "array",
+        "items" : [
+            {"type" : "number"},
+            {"type" : ["string", "binary"]},
+            {"type" : "number", "minimum": 0}
+        ],
+        "minItems": 3,
+        "maxItems": 3
+    }
+}
+
+SCHEMA_INCOMING_RPC["rpc_dht_put_replica"] = {
+    "type" : "object",
+    "properties" : {
+        "key" : {"type" : "number"},
+        "data" : {"type" : ["string", "binary"]},
+        "ttl" : {"type" : "number", "minimum": 0}
+    },
+    "required": ["key", "data", "ttl"]
+}
+
+# Predecessors of a node, published in rpc_get_node_info by nodes in successor replication mode
+SCHEMA_PREDECESSOR_LIST = {
+    "type" : "array",
+    "items" : {
+        "type" : "object",
+        "properties" : {
+            "node_id" : {"type" : "number"},
+            "node_address" : {"type" : "string"}
+        },
+        "required": ["node_id", "node_address"]
+    }
+}
+
+# Per key range either the keys with their digests or the digest of the whole range
+SCHEMA_OUTGOING_RPC["rpc_get_merkle_ranges"] = {
+    "type" : "object",
+    "properties" : {
+        "status" : {"type" : "number"},
+        "ranges" : {
+            "type" : "array",
+            "items" : {
+                "type" : "object",
+                "properties" : {
+                    "digest" : {"type" : "number"},
+                    "keys" : {
+                        "type" : "array",
+                        "items" : {
+                            "type" : "array",
+                            "items" : {"type" : "number"},
+                            "minItems": 2,
+                            "maxItems": 2
+                        }
+                    }
+                },
+                "oneOf": [{"required": ["digest"]}, {"required": ["keys"]}]
+            }
+        }
+    },
+    "required": ["status", "ranges"]
+}
+
+SCHEMA_OUTGOING_RPC["rpc_get_merkle_values"] = {
+    "type" : "object",
+    "properties" : {
+        "status" : {"type" : "number"},
+        "storage" : SCHEMA_STORAGE_RECORDS,
+        "keys" : {"type" : "integer", "minimum": 0}
+    },
+    "required": ["status", "storage", "keys"]
+}
+
+SCHEMA_OUTGOING_RPC["rpc_merkle_push"] = {
+    "type" : "object",
+    "properties" : {
+        "status" : {"type" : "number"},
+        "message" : {"type" : "string"},
+        "rejected" : {"type" : "integer", "minimum": 0}
+    },
+    "required": ["status"]
+}
+SCHEMA_INCOMING_RPC["rpc_merkle_push"] = SCHEMA_STORAGE_RECORDS
+
 SCHEMA_OUTGOING_RPC["rpc_update_finger_table"] = {}
+SCHEMA_OUTGOING_RPC["rpc_update_finger_table_batch"] = {}
 SCHEMA_OUTGOING_RPC["rpc_update_successor"] = {}
-SCHEMA_OUTGOING_RPC["rpc_get_fingertable"] = {}
+SCHEMA_OUTGOING_RPC["rpc_get_fingertable"] = {
+    "type" : "array",
+    "items" : {
+        "type" : "object",
+        "properties" : {
+            "start" : {"type" : "number"},
+            "successor" : {
+                "type" : "object",
+                "properties" : {
+                    "node_id" : {"type" : "number"},
+                    "node_address" : {"type" : "string"}
+                },
+                "required": ["node_id", "node_address"]
+            }
+        },
+        "required": ["start", "successor"]
+    }
+}
 
 # SCHEMA_RPC[]
 # Schema for the DHT messages constructed in messageParser.py
@@ -11,9 +11,11 @@ class ApiServer(asyncio.Protocol):
     """
         Class to connect to the Chord Node
     """
-    def __init__(self, dht_node):
+    def __init__(self, dht_node, iterative_lookup=None):
         self.log = logging.getLogger(__name__)
         self.node = dht_node
+        # Lookup mode for API requests (None: default of the node)
+        self.iterative_lookup = iterative_lookup
 
         self.log.info("API server listening.")
 
@@ -81,10 +83,8 @@ class ApiServer(asyncio.Protocol):
         ttl = api_message.get_ttl()
         replication = api_message.get_replication()
 
-        # Convert byte array to base64 string for JSON compatibility
-        # This can be replaced if "aiomas.codecs.MsgPack" is used for peer communication
-        data = base64.b64encode(data).decode('utf-8')
-        dht_result = yield from self.node.put_data(key, data, ttl, replication)
+        # The node encodes the value as required by its RPC codec
+        dht_result = yield from self.node.put_data(key, data, ttl, replication, iterative=self.iterative_lookup)
         print("DHT PUT result: %s" % dht_result)
 
     @asyncio.coroutine
@@ -95,10 +95,10 @@ class ApiServer(asyncio.Protocol):
         #return
         key = api_message.get_key()
 
-        dht_result = yield from self.node.get_data(key)
-        # TODO: Convert base64 back to bytes
+        dht_result = yield from self.node.get_data(key, iterative=self.iterative_lookup)
         for item in dht_result["data"]:
-            data = base64.b64decode(item.encode())
+            # Raw bytes with a binary RPC codec, base64 strings with JSON
+            data = item if isinstance(item, bytes) else base64.b64decode(item.encode())
             print("DHT GET result: %s" % data)
 
             reply = DHTMessageGET_REPLY(key, data)
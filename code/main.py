@@ -8,6 +8,12 @@ import sys
 from Node import Node
 from ipc import ApiServer
 from helpers.iniParser import IniParser
+from helpers.storageJournal import StorageJournal
+from helpers.rpcCodec import RPC_CODECS
+from helpers.rateLimiter import TokenBucket
+from helpers.lookupCache import LookupCache
+from helpers.routingCache import RoutingCache
+from helpers.connectionPool import ConnectionPool
 from helpers.openssl import *
 
 """
@@ -31,6 +37,26 @@ ipaddress = "localhost"
 apiport = None
 bootip = bootport = None
 kx_port = 0
+rpc_codec = "json"
+write_quorum = 1
+lookup_mode = "recursive"
+lookup_alpha = 3
+lookup_cache_size = 1024
+lookup_cache_ttl = 30
+routing_cache_size = 64
+finger_selection = "first"
+connection_max_idle = 60
+connection_prewarm = "none"
+replication_mode = "rehash"
+successor_copy = False
+read_mode = "sequential"
+hedge_delay = "p95"
+read_quorum = 2
+read_repair_rate = 10
+storage_dir = None
+storage_fsync = "interval"
+storage_snapshot_interval = 600
+storage_max_bytes = storage_max_values = None
 if configname:
     projectIni = IniParser(configname)
     ipaddress = projectIni.get("HOSTNAME", "DHT")
@@ -44,6 +70,46 @@ if configname:
     kx_port = int(projectIni.get("PORT", "KX"))
 
     logfile = projectIni.get("LOG")
+    # MsgPack is opt-in: all nodes of a ring must use the same codec
+    rpc_codec = projectIni.get("RPC_CODEC", "DHT") or rpc_codec
+    # Replica writes a PUT waits for
+    write_quorum = int(projectIni.get("WRITE_QUORUM", "DHT") or write_quorum)
+    # Lookups of API requests: recursive or iterative (LOOKUP_ALPHA parallel queries)
+    lookup_mode = projectIni.get("LOOKUP_MODE", "DHT") or lookup_mode
+    lookup_alpha = int(projectIni.get("LOOKUP_ALPHA", "DHT") or lookup_alpha)
+    # Cached lookup results of data requests (0 disables the cache)
+    lookup_cache_size = int(projectIni.get("LOOKUP_CACHE_SIZE", "DHT") or lookup_cache_size)
+    lookup_cache_ttl = float(projectIni.get("LOOKUP_CACHE_TTL", "DHT") or lookup_cache_ttl)
+    # Live nodes learned from the traffic and used for routing (0 disables it)
+    routing_cache_size = int(projectIni.get("ROUTING_CACHE_SIZE", "DHT") or routing_cache_size)
+    # Fingers are the first node of their interval ("first") or the one with the lowest RTT ("proximity")
+    finger_selection = projectIni.get("FINGER_SELECTION", "DHT") or finger_selection
+    # Seconds an unused connection to another node is kept open
+    connection_max_idle = float(projectIni.get("CONNECTION_MAX_IDLE", "DHT") or connection_max_idle)
+    # Connections opened after joining: none, successors or fingers (including successors)
+    connection_prewarm = projectIni.get("CONNECTION_PREWARM", "DHT") or connection_prewarm
+    # Replica placement: rehash (independent replica keys) or successors (successor list of the responsible node)
+    replication_mode = projectIni.get("REPLICATION_MODE", "DHT") or replication_mode
+    # Rehash mode: 1 lets the successor keep a copy of a node's range for anti-entropy (doubles stored data)
+    successor_copy = bool(int(projectIni.get("SUCCESSOR_COPY", "DHT") or successor_copy))
+    # Replica reads of a GET: sequential, hedged (after HEDGE_DELAY seconds or p95) or quorum (READ_QUORUM answers)
+    read_mode = projectIni.get("READ_MODE", "DHT") or read_mode
+    hedge_delay = projectIni.get("HEDGE_DELAY", "DHT") or hedge_delay
+    if hedge_delay != "p95":
+        hedge_delay = float(hedge_delay)
+    read_quorum = int(projectIni.get("READ_QUORUM", "DHT") or read_quorum)
+    # Max. read repairs per second, 0 disables them
+    read_repair_rate = float(projectIni.get("READ_REPAIR_RATE", "DHT") or read_repair_rate)
+
+    # Optional persistence of stored data
+    storage_dir = projectIni.get("DIRECTORY", "STORAGE")
+    storage_fsync = projectIni.get("FSYNC", "STORAGE") or storage_fsync
+    storage_snapshot_interval = int(projectIni.get("SNAPSHOT_INTERVAL", "STORAGE") or storage_snapshot_interval)
+    # Memory budget of stored data
+    if projectIni.get("MAX_BYTES", "STORAGE"):
+        storage_max_bytes = int(projectIni.get("MAX_BYTES", "STORAGE"))
+    if projectIni.get("MAX_VALUES_PER_KEY", "STORAGE"):
+        storage_max_values = int(projectIni.get("MAX_VALUES_PER_KEY", "STORAGE"))
 
 if logfile:
     logging.basicConfig(filename=logfile, format='[%(levelname)s:%(funcName)s] %(message)s', level=logging.INFO)
@@ -84,16 +150,45 @@ print("Hostkey", hostkey)
 print("Node ID", nodeIdentifier)
 print("API PORT", apiport)
 print("KX PORT", kx_port)
+print("RPC codec", rpc_codec)
+print("Storage directory", storage_dir)
 print("-------------------")
 time.sleep(3)
 
 # Define multiple agents per node for accepting RPCs
-c = aiomas.Container((ipaddress, port))
+c = aiomas.Container((ipaddress, port), codec=RPC_CODECS[rpc_codec])
 nodes = [c.spawn(Node) for i in range(1)]
+nodes[0].rpc_codec = RPC_CODECS[rpc_codec]
+nodes[0].binary_values = rpc_codec != "json"
+nodes[0].write_quorum = write_quorum
+nodes[0].lookup_alpha = lookup_alpha
+nodes[0].lookup_cache = LookupCache(lookup_cache_size, lookup_cache_ttl)
+nodes[0].routing_cache = RoutingCache(routing_cache_size)
+nodes[0].proximity_fingers = finger_selection == "proximity"
+nodes[0].connections = ConnectionPool(connection_max_idle)
+nodes[0].connection_prewarm = connection_prewarm
+nodes[0].replication_mode = replication_mode
+nodes[0].successor_copy = successor_copy
+if replication_mode == "successors":
+    # All copies need to fit into the successor list
+    nodes[0].successor.max_entries = max(nodes[0].successor.max_entries, nodes[0].replica.replicationCount - 1)
+nodes[0].read_mode = read_mode
+nodes[0].hedge_delay = hedge_delay
+nodes[0].read_quorum = read_quorum
+nodes[0].repair_limiter = TokenBucket(read_repair_rate) if read_repair_rate > 0 else None
+nodes[0].storage.maxBytes = storage_max_bytes
+nodes[0].storage.maxValuesPerKey = storage_max_values
+
+# Crash recovery: restore stored data before joining the network
+if storage_dir:
+    journal = StorageJournal(storage_dir, fsync=storage_fsync, snapshot_interval=storage_snapshot_interval)
+    print("Recovered keys from storage journal:", journal.recover(nodes[0].storage))
+    nodes[0].storage.journal = journal
 
 loop = asyncio.get_event_loop()
 # Start API server interface
-api_server = loop.create_server(lambda: ApiServer(nodes[0]), ipaddress, apiport)
+api_server = loop.create_server(lambda: ApiServer(nodes[0], iterative_lookup=lookup_mode == "iterative"),
+                                ipaddress, apiport)
 loop.run_until_complete(api_server)
 # Start DHT node
 loop.run_until_complete(nodes[0].join(bootstrap_address=bootstrap_addr, node_id=nodeIdentifier, additional_data={"kx_port": kx_port}))
@@ -109,4 +204,5 @@ loop.run_until_complete(nodes[0].stabilize())
     #loop.run_until_complete(nodes[0].test_find_my_successor(bootstrap_addr))
 
 loop.run_forever()
+nodes[0].close_connections()
 c.shutdown()
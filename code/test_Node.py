@@ -2,8 +2,15 @@
 
 # Note: Always use unittest.sh to run the tests!
 
+import asyncio
+import socket
+import types
 import unittest
-from  Node import in_interval, CHORD_RING_SIZE
+import aiomas
+from  Node import Node, in_interval, CHORD_RING_SIZE
+from helpers.replica import Replica
+from helpers.connectionPool import ConnectionPool
+from helpers.rpcCodec import RPC_CODECS
 
 class TestNode(unittest.TestCase):
 
@@ -19,5 +26,627 @@ class TestNode(unittest.TestCase):
 
       self.assertFalse(in_interval(12, 13, 19 ))
 
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def slow_rpc(node, name, delay):
+    """Lets a node answer the given RPC only after ``delay`` seconds."""
+    original = getattr(node, name)
+
+    @aiomas.expose
+    @asyncio.coroutine
+    def slow(*args, **kwargs):
+        yield from asyncio.sleep(delay)
+        result = original(*args, **kwargs)
+        if isinstance(result, types.GeneratorType):
+            result = yield from result
+        return result
+
+    setattr(node, name, slow)
+
+def record_rpc(node, name):
+    """Records the arguments of each call of the given RPC in ``node.calls[name]``."""
+    original = getattr(node, name)
+    if not hasattr(node, "calls"):
+        node.calls = {}
+    node.calls[name] = []
+
+    @aiomas.expose
+    @asyncio.coroutine
+    def recorded(*args, **kwargs):
+        node.calls[name].append(args)
+        result = original(*args, **kwargs)
+        if isinstance(result, types.GeneratorType):
+            result = yield from result
+        return result
+
+    setattr(node, name, recorded)
+
+def without_sender_argument(node):
+    """Lets a node behave like older versions, which do not accept the sender of lookup RPCs."""
+    find_successor_rec = node.rpc_find_successor_rec
+    get_node_info = node.rpc_get_node_info
+    node.lookups_answered = 0
+
+    @aiomas.expose
+    @asyncio.coroutine
+    def rpc_find_successor_rec(node_id, with_neighbors=False, tracing=False, check_key=False):
+        node.lookups_answered += 1
+        return (yield from find_successor_rec(node_id, with_neighbors, tracing, check_key))
+
+    @aiomas.expose
+    def rpc_get_node_info(successor_list=False, additional_data=False, key_filter=False):
+        node_info = get_node_info(successor_list, additional_data, key_filter)
+        del node_info["accepts_sender"]
+        return node_info
+
+    node.rpc_find_successor_rec = rpc_find_successor_rec
+    node.rpc_get_node_info = rpc_get_node_info
+    node.sender_args = lambda address: {}
+
+def responsible(node_ids, key):
+    """ID of the node responsible for a key in a ring of the given nodes."""
+    return min(node_ids, key=lambda node_id: (node_id - key) % CHORD_RING_SIZE)
+
+class TestNodeRing(unittest.TestCase):
+  """Nodes in separate containers on local ports, talking to each other over TCP."""
+
+  def setUp(self):
+      self.loop = asyncio.new_event_loop()
+      asyncio.set_event_loop(self.loop)
+      self.containers = []
+      self.nodes = []
+
+  def tearDown(self):
+      for node in self.nodes:
+          node.activated = False
+      # Let background tasks (e.g. replica writes) finish
+      self.wait(asyncio.sleep(0.2))
+      for node in self.nodes:
+          node.close_connections()
+      for container in self.containers:
+          container.shutdown()
+      self.loop.close()
+      asyncio.set_event_loop(None)
+
+  def wait(self, coro):
+      return self.loop.run_until_complete(coro)
+
+  def spawn(self, codec="json", **attributes):
+      container = aiomas.Container(("127.0.0.1", free_port()), codec=RPC_CODECS[codec])
+      self.containers.append(container)
+      node = container.spawn(Node)
+      node.rpc_codec = RPC_CODECS[codec]
+      node.binary_values = codec != "json"
+      for name, value in attributes.items():
+          setattr(node, name, value)
+      self.nodes.append(node)
+      return node
+
+  def create_ring(self, node_ids, **attributes):
+      """Joins nodes with the given IDs one after another via the first one."""
+      return self.join_ring([self.spawn(**attributes) for _ in node_ids], node_ids)
+
+  def join_ring(self, nodes, node_ids):
+      for node, node_id in zip(nodes, node_ids):
+          bootstrap_address = nodes[0].node_address if node is not nodes[0] else None
+          self.wait(node.join(node_id=node_id, bootstrap_address=bootstrap_address))
+      return nodes
+
+  def assertFingersCorrect(self, node, node_ids):
+      for k, finger in enumerate(node.fingertable):
+          self.assertEqual(finger["successor"]["node_id"], responsible(node_ids, finger["start"]),
+                           "finger %d of node %d" % (k, node.id))
+
+  def stabilize(self, nodes, rounds=2):
+      for _ in range(rounds):
+          for node in nodes:
+              self.wait(node.update_successor_list())
+              self.wait(node.check_predecessor())
+
+  def test_join_two_nodes(self):
+      # The joiner precedes the bootstrap node closely, so its last fingers point to itself
+      node_ids = [2**255 + 2**253, 2**255 + 2**250]
+      bootstrap, joiner = self.create_ring(node_ids)
+
+      self.assertFingersCorrect(joiner, node_ids)
+      self.assertEqual(joiner.fingertable[255]["successor"]["node_id"], joiner.id)
+      self.assertEqual(joiner.predecessor["node_id"], bootstrap.id)
+      self.assertEqual(bootstrap.predecessor["node_id"], joiner.id)
+
+  def test_join_seeds_fingers(self):
+      node_ids = [(i * 2**252 + 12345) % CHORD_RING_SIZE for i in (1, 9, 3, 14, 6)]
+      nodes = self.create_ring(node_ids)
+
+      self.assertFingersCorrect(nodes[-1], node_ids)
+
+  def create_replica_ring(self, key, **attributes):
+      """Three nodes, each responsible for exactly one replica key of ``key``.
+
+      :return: the holders of replica 0, 1 and 2
+      """
+      replica_keys = Replica(CHORD_RING_SIZE).get_key_list(key, 3)
+      return self.create_ring(replica_keys, **attributes)
+
+  def assertAbandonedReadHarmless(self, mode, **attributes):
+      key = 12345
+      slow, fast, client = self.create_replica_ring(key, read_mode=mode, **attributes)
+      self.assertEqual(self.wait(client.put_data(key, b"hello", 60))["status"], 0)
+      self.wait(asyncio.sleep(0.1))
+      slow_rpc(slow, "rpc_dht_get_data", 0.3)
+
+      result = self.wait(client.get_data(key))
+      self.assertEqual(result["status"], 0)
+      self.assertEqual(result["data"], ["aGVsbG8="])
+
+      # The late answer of the slow replica must not break the connection to it
+      self.wait(asyncio.sleep(0.5))
+      _, err = self.wait(client.run_rpc_safe(slow.node_address, "rpc_get_node_info"))
+      self.assertEqual(err, 0)
+      self.assertNotIn(slow.node_address, client.suspicion)
+
+  def test_hedged_read_slow_replica(self):
+      self.assertAbandonedReadHarmless("hedged", hedge_delay=0.05)
+
+  def test_quorum_read_slow_replica(self):
+      self.assertAbandonedReadHarmless("quorum", read_quorum=2)
+
+  def test_read_repair_during_write(self):
+      key = 12345
+      replica_keys = Replica(CHORD_RING_SIZE).get_key_list(key, 3)
+      slow, fast, client = self.create_replica_ring(key, read_mode="hedged", hedge_delay=0.05)
+      slow_rpc(slow, "rpc_dht_put_data", 0.3)
+
+      # The GET misses the value on the slow replica while the write to it is still running
+      self.assertEqual(self.wait(client.put_data(key, b"hello", 60, write_quorum=1))["status"], 0)
+      for iterative in (False, True):
+          result = self.wait(client.get_data(key, iterative=iterative))
+          self.assertEqual(result["data"], ["aGVsbG8="])
+
+      self.wait(asyncio.sleep(0.5))
+      for node, replica_key in zip((slow, fast, client), replica_keys):
+          self.assertEqual(node.storage.get(replica_key), ["aGVsbG8="])
+
+  def test_read_repair_range_checked(self):
+      key = 12345
+      replica_keys = Replica(CHORD_RING_SIZE).get_key_list(key, 3)
+      first, second, client = self.create_replica_ring(key)
+
+      # A repair sent to a node not responsible for the replica key is rejected and counted as failed
+      self.wait(client.repair_replica(second.as_dict(), [[replica_keys[0], "x", 60]]))
+      self.assertEqual(second.storage.get(replica_keys[0]), [])
+      self.assertEqual(client.stats["read_repairs_failed"], 1)
+
+      self.wait(client.repair_replica(first.as_dict(), [[replica_keys[0], "x", 60]]))
+      self.assertEqual(first.storage.get(replica_keys[0]), ["x"])
+      self.assertEqual(client.stats["read_repairs"], 1)
+
+  def test_write_quorum(self):
+      key = 12345
+      replica_keys = Replica(CHORD_RING_SIZE).get_key_list(key, 3)
+      slow, failing, client = self.create_replica_ring(key)
+      slow_rpc(slow, "rpc_dht_put_data", 0.3)
+
+      # The PUT returns once two replicas acknowledged, the slow write finishes in the background
+      started = self.loop.time()
+      result = self.wait(client.put_data(key, b"hello", 60, write_quorum=2))
+      self.assertLess(self.loop.time() - started, 0.3)
+      self.assertEqual(result["status"], 0)
+      self.assertEqual(result["successes"], 2)
+      self.assertEqual([replica["status"] for replica in result["replicas"]], [None, 0, 0])
+      self.wait(asyncio.sleep(0.5))
+      self.assertEqual(slow.storage.get(replica_keys[0]), ["aGVsbG8="])
+
+      # The PUT fails without waiting for the slow replica once the quorum cannot be reached
+      failing.storage.put = lambda *args, **kwargs: False
+      started = self.loop.time()
+      result = self.wait(client.put_data(key, b"world", 60, write_quorum=3))
+      self.assertLess(self.loop.time() - started, 0.3)
+      self.assertEqual(result["status"], 1)
+      self.assertEqual([replica["status"] for replica in result["replicas"]], [None, 1, 0])
+      self.wait(asyncio.sleep(0.5))
+
+  def test_put_replica_range(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.1, 0.3, 0.5, 0.7, 0.9)]
+      nodes = self.create_ring(node_ids, replication_mode="successors")
+      self.stabilize(nodes, rounds=3)
+      client, holder = nodes[0], nodes[4]
+      self.assertEqual([node["node_id"] for node in holder.predecessor_list], node_ids[3:0:-1])
+
+      def put_replica(key, ttl=60):
+          response, err = self.wait(client.run_rpc_safe(holder.node_address, "rpc_dht_put_replica", key, "x", ttl))
+          return response["status"] if err == 0 else None
+
+      # Copies of the two preceding nodes are accepted
+      self.assertEqual(put_replica(int(0.4 * CHORD_RING_SIZE)), 0)
+      self.assertEqual(put_replica(int(0.7 * CHORD_RING_SIZE)), 0)
+      # Keys of the node itself or of other nodes are not
+      self.assertEqual(put_replica(int(0.8 * CHORD_RING_SIZE)), 1)
+      self.assertEqual(put_replica(int(0.2 * CHORD_RING_SIZE)), 1)
+      self.assertIsNone(put_replica(int(0.4 * CHORD_RING_SIZE), ttl=-1))
+      self.assertEqual(holder.storage.get(int(0.4 * CHORD_RING_SIZE)), ["x"])
+
+      # Successor replication works with the check
+      result = self.wait(client.put_data(int(0.6 * CHORD_RING_SIZE), b"hello", 60))
+      self.assertEqual(result["successes"], 3)
+
+  def test_merkle_push_range(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.1, 0.3, 0.5, 0.7, 0.9)]
+      nodes = self.create_ring(node_ids, replication_mode="successors")
+      self.stabilize(nodes, rounds=3)
+      client, holder = nodes[0], nodes[4]
+      inside, outside = int(0.4 * CHORD_RING_SIZE), int(0.2 * CHORD_RING_SIZE)
+
+      # Records outside of the copied range are dropped, the others are merged
+      response, err = self.wait(client.run_rpc_safe(holder.node_address, "rpc_merkle_push",
+                                                    [[inside, "x", 60], [outside, "x", 60]]))
+      self.assertEqual(err, 0)
+      self.assertEqual(response["status"], 1)
+      self.assertEqual(response["rejected"], 1)
+      self.assertEqual(holder.storage.get(inside), ["x"])
+      self.assertEqual(holder.storage.get(outside), [])
+
+      # Without successor replication, only the node's own keys are accepted
+      plain = self.create_ring([int(f * CHORD_RING_SIZE) for f in (0.2, 0.6)])
+      self.stabilize(plain)
+      response, err = self.wait(plain[0].run_rpc_safe(plain[1].node_address, "rpc_merkle_push",
+                                                      [[inside, "x", 60]]))
+      self.assertEqual((err, response["status"]), (0, 0))
+      response, err = self.wait(plain[0].run_rpc_safe(plain[1].node_address, "rpc_merkle_push",
+                                                      [[int(0.7 * CHORD_RING_SIZE), "x", 60]]))
+      self.assertEqual((err, response["status"]), (0, 1))
+      self.assertEqual(plain[1].storage.get(int(0.7 * CHORD_RING_SIZE)), [])
+
+  def test_lookup_sender(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.001, 0.3, 0.55, 0.6, 0.7)]
+      nodes = [self.spawn() for _ in node_ids]
+      # RPC methods are resolved once, so the node is patched before it joins
+      without_sender_argument(nodes[2])
+      client, _, old, new, responsible_node = self.join_ring(nodes, node_ids)
+      for node in (old, new):
+          self.wait(client.run_rpc_safe(node.node_address, "rpc_get_node_info"))
+      self.assertNotIn(old.node_address, client.sender_peers)
+      self.assertIn(new.node_address, client.sender_peers)
+
+      # The lookup is forwarded to the old node without announcing the sender
+      key = int(0.65 * CHORD_RING_SIZE)
+      self.assertEqual(self.wait(client.find_successor(key))["node_id"], responsible_node.id)
+      self.assertEqual(old.lookups_answered, 1)
+
+      # New nodes learn the sender
+      self.wait(client.find_successor(int(0.62 * CHORD_RING_SIZE), iterative=True))
+      self.assertEqual(new.routing_cache.closest_preceding(new.id, client.id + 1)["node_id"], client.id)
+      _, err = self.wait(client.run_rpc_safe(new.node_address, "rpc_find_successor_rec", key,
+                                             sender={"node_id": -1, "node_address": "foo"}))
+      self.assertNotEqual(err, 0)
+
+      # Only hops taken count as learned hops, not the candidates of iterative lookups
+      client.routing_cache.add(new.as_dict())
+      learned_hops = client.stats["learned_hops"]
+      self.wait(client.find_successor(key, iterative=True))
+      self.assertEqual(client.stats["learned_hops"], learned_hops)
+      self.wait(client.find_successor(key))
+      self.assertEqual(client.stats["learned_hops"], learned_hops + 1)
+
+  def test_batched_lookup(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.001, 0.3, 0.52, 0.56, 0.7)]
+      nodes = [self.spawn() for _ in node_ids]
+      for node in nodes:
+          record_rpc(node, "rpc_find_successors_batch")
+          # Route over fingers only
+          node.routing_cache.maxEntries = 0
+      client, _, failing, _, _ = self.join_ring(nodes, node_ids)
+      for node in nodes:
+          node.calls["rpc_find_successors_batch"].clear()
+
+      # Keys of the same node travel in one batch, results keep the order of the keys
+      group = [int(f * CHORD_RING_SIZE) for f in (0.65, 0.62, 0.68)]
+      keys = group[:2] + [int(0.2 * CHORD_RING_SIZE), int(0.9 * CHORD_RING_SIZE)] + group[2:]
+      results = self.wait(client.find_successors(keys))
+      self.assertEqual([result["node_id"] for result in results], [responsible(node_ids, key) for key in keys])
+      calls = [args[0] for node in nodes for args in node.calls["rpc_find_successors_batch"]]
+      self.assertTrue(any(set(group) <= set(batch) for batch in calls))
+      self.assertFalse(any(set(group) & set(batch) and not set(group) <= set(batch) for batch in calls))
+
+      # The keys of a failing finger are retried via the next finger, the finger is asked once
+      @asyncio.coroutine
+      def broken_batch(node_ids, with_neighbors=False):
+          raise ConnectionResetError("peer went away")
+
+      failing.find_successors_batch_rec = broken_batch
+      failing.calls["rpc_find_successors_batch"].clear()
+      results = self.wait(client.find_successors(keys))
+      self.assertEqual([result["node_id"] for result in results], [responsible(node_ids, key) for key in keys])
+      self.assertEqual([sorted(args[0]) for args in failing.calls["rpc_find_successors_batch"]],
+                       [sorted(group + keys[3:4])])
+
+  def test_closest_preceding_finger(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.001, 0.1, 0.3, 0.52, 0.56, 0.7, 0.9)]
+      nodes = [self.spawn() for _ in node_ids]
+      for node in nodes:
+          # Route over fingers only
+          node.routing_cache.maxEntries = 0
+      node = self.join_ring(nodes, node_ids)[0]
+
+      def scan(key):
+          """Distinct finger nodes preceding the key, closest first."""
+          preceding = []
+          for finger in reversed(node.fingertable):
+              successor = finger["successor"]
+              if in_interval(successor["node_id"], node.id, key) and successor["node_id"] != node.id \
+                      and successor not in preceding:
+                  preceding.append(successor)
+          return sorted(preceding, key=lambda n: (key - n["node_id"]) % CHORD_RING_SIZE)
+
+      def assertFallBacks(key):
+          expected = [n["node_id"] for n in scan(key)] + [node.id] * 2
+          found = [node.get_closest_preceding_finger(key, fall_back=i)["node_id"] for i in range(len(expected))]
+          self.assertEqual(found, expected, "key %d" % key)
+
+      for f in (0.05, 0.2, 0.53, 0.6, 0.8, 0.95, 0.0005):
+          assertFallBacks(int(f * CHORD_RING_SIZE))
+
+      # Changed fingers are reflected in the next lookup
+      node.set_finger(253, {"node_id": int(0.2 * CHORD_RING_SIZE), "node_address": "tcp://127.0.0.1:1/0"})
+      self.assertEqual(node.get_closest_preceding_finger(int(0.25 * CHORD_RING_SIZE))["node_id"],
+                       int(0.2 * CHORD_RING_SIZE))
+      assertFallBacks(int(0.95 * CHORD_RING_SIZE))
+      # Our successor failed and the next node takes over
+      node.successor.set(nodes[2].as_dict(), replace_old=True)
+      self.assertNotIn(nodes[1].id, [n["node_id"] for n in scan(node.id)])
+      assertFallBacks(int(0.95 * CHORD_RING_SIZE))
+
+  def test_lookup_cache(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.001, 0.3, 0.7)]
+      client, _, old = self.create_ring(node_ids)
+      key = int(0.5 * CHORD_RING_SIZE)
+      self.assertNotIn("cached", self.wait(client.find_successor(key, use_cache=True)))
+      # The result covers the keys up to the responsible node
+      cached = self.wait(client.find_successor(int(0.65 * CHORD_RING_SIZE), use_cache=True))
+      self.assertEqual((cached["node_id"], cached["cached"]), (old.id, True))
+
+      # A joining node updating our fingers invalidates the range it takes over
+      joiner = self.spawn()
+      self.wait(joiner.join(node_id=int(0.6 * CHORD_RING_SIZE), bootstrap_address=client.node_address))
+      self.assertIsNone(client.lookup_cache.get(key))
+
+      # A stale entry is dropped once the node answers "not responsible" and the request is repeated
+      client.lookup_cache.put(key, old.as_dict(), low=node_ids[1] + 1)
+      result = self.wait(client.put_replica_data(key, "x", 60))
+      self.assertEqual((result["status"], result["node_id"]), (0, joiner.id))
+      self.assertEqual(joiner.storage.get(key), ["x"])
+      self.assertEqual(old.storage.get(key), [])
+      self.assertEqual(client.lookup_cache.stats["stale_hits"], 1)
+      self.assertEqual(self.wait(client.find_successor(key, use_cache=True))["node_id"], joiner.id)
+
+  def test_join_notifies_predecessors_once(self):
+      node_ids = [(i * 2**252 + i * 7919) % CHORD_RING_SIZE for i in (1, 9, 3, 14, 6, 11)]
+      nodes = self.create_ring(node_ids[:-1])
+      joiner = self.spawn(update_fanout=2)
+      run_rpc_safe = joiner.run_rpc_safe
+      notified = []
+      running = [0, 0]    # current, maximum
+
+      @asyncio.coroutine
+      def recording_rpc(remote_address, func_name, *args, **kwargs):
+          if func_name.startswith("rpc_update_finger_table"):
+              notified.append((remote_address, func_name))
+              running[0] += 1
+              running[1] = max(running)
+              yield from asyncio.sleep(0.05)
+          try:
+              return (yield from run_rpc_safe(remote_address, func_name, *args, **kwargs))
+          finally:
+              if func_name.startswith("rpc_update_finger_table"):
+                  running[0] -= 1
+
+      joiner.run_rpc_safe = recording_rpc
+      self.wait(joiner.join(node_id=node_ids[-1], bootstrap_address=nodes[0].node_address))
+
+      addresses = [address for address, _ in notified]
+      self.assertGreater(len(addresses), 2)
+      self.assertEqual(len(addresses), len(set(addresses)))
+      self.assertEqual({func_name for _, func_name in notified}, {"rpc_update_finger_table_batch"})
+      self.assertEqual(running[1], 2)
+      self.assertFingersCorrect(joiner, node_ids)
+      # All fingers the joiner is responsible for now refer to it
+      for node in nodes:
+          for k, finger in enumerate(node.fingertable):
+              if responsible(node_ids, finger["start"]) == joiner.id:
+                  self.assertEqual(finger["successor"]["node_id"], joiner.id, "finger %d of node %d" % (k, node.id))
+
+  def test_skip_suspected_hops(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.001, 0.3, 0.52, 0.56, 0.7)]
+      nodes = [self.spawn() for _ in node_ids]
+      for node in nodes:
+          # Route over fingers only
+          node.routing_cache.maxEntries = 0
+      client, fallback, suspect, _, responsible_node = self.join_ring(nodes, node_ids)
+      key = int(0.65 * CHORD_RING_SIZE)
+      self.assertEqual(client.get_closest_preceding_finger(key)["node_id"], suspect.id)
+
+      # Refused connections make a peer suspected
+      dead_address = "tcp://127.0.0.1:%d/0" % free_port()
+      _, err = self.wait(client.run_rpc_safe(dead_address, "rpc_get_node_info"))
+      self.assertNotEqual(err, 0)
+      self.assertIn(dead_address, client.suspicion)
+
+      # Lookups do not wait for a suspected hop
+      run_rpc_safe = client.run_rpc_safe
+      contacted = []
+
+      def recording_rpc(remote_address, func_name, *args, **kwargs):
+          contacted.append(remote_address)
+          return run_rpc_safe(remote_address, func_name, *args, **kwargs)
+
+      client.run_rpc_safe = recording_rpc
+      client.suspicion.failure(suspect.node_address)
+      self.assertEqual(client.get_closest_preceding_finger(key)["node_id"], fallback.id)
+      self.assertEqual(self.wait(client.find_successor(key))["node_id"], responsible_node.id)
+      self.assertEqual(contacted, [fallback.node_address])
+      client.run_rpc_safe = run_rpc_safe
+      self.assertEqual(client.stats["suspect_skips"], 2)
+
+      # The original choice is kept if all alternatives are suspected as well
+      client.suspicion.failure(fallback.node_address)
+      self.assertEqual(client.get_closest_preceding_finger(key)["node_id"], suspect.id)
+
+      # Any answer clears the suspicion
+      _, err = self.wait(client.run_rpc_safe(suspect.node_address, "rpc_get_node_info"))
+      self.assertEqual(err, 0)
+      self.assertNotIn(suspect.node_address, client.suspicion)
+      self.assertEqual(client.stats["suspects_cleared"], 1)
+      self.assertEqual(client.get_statistics()["lookup"]["suspects"], 2)
+
+  def test_rtt_without_connect(self):
+      client, peer = self.create_ring([1, 2**255])
+      get_peer = client.get_peer
+
+      @asyncio.coroutine
+      def slow_get_peer(address):
+          yield from asyncio.sleep(0.3)
+          return (yield from get_peer(address))
+
+      client.get_peer = slow_get_peer
+      client.peer_rtt.clear()
+      _, err = self.wait(client.run_rpc_safe(peer.node_address, "rpc_get_node_info"))
+      self.assertEqual(err, 0)
+      self.assertLess(client.peer_rtt[peer.node_address], 0.3)
+
+  def test_successor_copies_dropped(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.2, 0.5, 0.8)]
+      nodes = self.create_ring(node_ids, successor_copy=True)
+      owner, successor = nodes[1], nodes[2]
+      key = int(0.4 * CHORD_RING_SIZE)
+      owner.storage.put(key, "x")
+      self.stabilize(nodes)
+      self.wait(owner.synchronize_storage())
+      self.assertEqual(successor.storage.get(key), ["x"])
+
+      # A node joins between the owner and its successor, which does not need the copy anymore
+      joiner = self.spawn(successor_copy=True)
+      self.wait(joiner.join(node_id=int(0.6 * CHORD_RING_SIZE), bootstrap_address=nodes[0].node_address))
+      nodes.append(joiner)
+      self.stabilize(nodes)
+      self.wait(owner.synchronize_storage())
+      self.assertEqual(owner.successor.get()["node_id"], joiner.id)
+      self.assertEqual(joiner.storage.get(key), ["x"])
+      self.assertEqual(successor.storage.get(key), [])
+
+  def test_incremental_anti_entropy(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.2, 0.5, 0.8)]
+      nodes = self.create_ring(node_ids, successor_copy=True, sync_max_bytes=2000)
+      owner, successor = nodes[1], nodes[2]
+      keys = [int(0.4 * CHORD_RING_SIZE) + i * 2**200 for i in range(200)]
+      for key in keys:
+          owner.storage.put(key, "x")
+      successor.storage.merge(owner.storage.serialize({key: owner.storage.get_items(key) for key in keys}))
+      self.stabilize(nodes)
+
+      # Each side misses some values of the same partition
+      for key in keys[10:13]:
+          owner.storage.put(key, "y" * 1000)
+      successor.storage.put(keys[20], "z")
+      record_rpc(successor, "rpc_get_merkle_values")
+
+      # Only the differing keys are requested and the values are exchanged within the byte limit
+      self.wait(owner.synchronize_storage())
+      self.assertEqual(successor.calls["rpc_get_merkle_values"][0][0], keys[10:13] + keys[20:21])
+      self.assertEqual(sum(len(successor.storage.get(key)) for key in keys[10:13]), 4)
+      for _ in range(2):
+          self.wait(owner.synchronize_storage())
+      self.assertEqual(owner.storage.get(keys[20]), ["x", "z"])
+      for key in keys[10:13]:
+          self.assertEqual(successor.storage.get(key), ["x", "y" * 1000])
+      self.assertEqual(successor.storage.merkle_hashes(owner.predecessor["node_id"], owner.id, [1]),
+                       owner.storage.merkle_hashes(owner.predecessor["node_id"], owner.id, [1]))
+
+  def test_handover_without_successor_copy(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.2, 0.8)]
+      nodes = self.create_ring(node_ids)
+      owner = nodes[1]
+      key = int(0.4 * CHORD_RING_SIZE)
+      owner.storage.put(key, "x")
+
+      # The keys of a joining node are moved, not copied
+      joiner = self.spawn()
+      self.wait(joiner.join(node_id=int(0.5 * CHORD_RING_SIZE), bootstrap_address=nodes[0].node_address))
+      nodes.append(joiner)
+      self.stabilize(nodes)
+      self.wait(joiner.synchronize_storage())
+      self.assertEqual(joiner.storage.get(key), ["x"])
+      self.assertEqual(owner.storage.get(key), [])
+
+  def test_drop_own_connection_only(self):
+      client, peer, third = self.create_ring([1, 2**255, 2**254])
+      client.close_connections()
+      client.connections = ConnectionPool(maxEntries=1)
+      # Another agent of the client's container talks to the peer as well
+      shared = self.wait(self.containers[0].connect(peer.node_address))
+      for node in (peer, third, peer):
+          _, err = self.wait(client.run_rpc_safe(node.node_address, "rpc_get_node_info"))
+          self.assertEqual(err, 0)
+      self.assertEqual(list(client.channels), [peer.node_address])
+
+      client.drop_connection(peer.node_address)
+      self.assertEqual(client.channels, {})
+      self.assertEqual(self.wait(shared.rpc_get_node_info())["node_id"], peer.id)
+
+  def test_fix_fingers_logs_failures(self):
+      node_ids = [1, 2**255, 2**254]
+      node = self.create_ring(node_ids)[0]
+      groups = node.get_finger_groups()
+      fix_finger = node.fix_finger
+
+      @asyncio.coroutine
+      def failing_fix_finger(finger_id=-1):
+          if finger_id == groups[0]:
+              raise ConnectionResetError("peer went away")
+          return (yield from fix_finger(finger_id))
+
+      node.fix_finger = failing_fix_finger
+      node.fix_batch = len(groups)
+      with self.assertLogs("Node", "ERROR") as logs:
+          self.wait(node.fix_fingers())
+      self.assertEqual(logs.output, ["ERROR:Node:Could not fix finger %d: peer went away" % groups[0]])
+      self.assertEqual(node.stats["finger_fixes"], len(groups))
+
+  def test_bloom_statistics(self):
+      key = 12345
+      nodes = self.create_replica_ring(key, codec="msgpack")
+      client = nodes[2]
+      self.assertEqual(self.wait(client.put_data(key, b"hello", 60))["status"], 0)
+      self.stabilize(nodes)
+
+      # The filters of the remote holders exclude a missing key
+      self.assertEqual(self.wait(client.get_data(54321))["status"], 1)
+      self.assertEqual(client.stats["bloom_negatives"], 2)
+      self.assertEqual(self.wait(client.get_data(key))["data"], [b"hello"])
+      self.assertEqual(client.get_statistics()["lookup"]["bloom_false_positive_rate"], 0.0)
+
+      # Saved bytes are measured with the codec in use
+      saved = client.stats["bloom_bytes_saved"]
+      client._count_skipped_gets([(key, nodes[0].as_dict())])
+      codec = RPC_CODECS["msgpack"]()
+      self.assertEqual(client.stats["bloom_bytes_saved"] - saved,
+                       len(codec.encode(["rpc_dht_get_data", [key], {}])) +
+                       len(codec.encode({"status": 1, "data": []})))
+
+  def test_iterative_lookup_slow_hop(self):
+      node_ids = [int(f * CHORD_RING_SIZE) for f in (0.001, 0.3, 0.55, 0.6, 0.7)]
+      client, slow, _, _, responsible_node = self.create_ring(node_ids)
+      slow_rpc(slow, "rpc_get_closest_preceding_fingers", 0.3)
+
+      # The slow node is queried in parallel, but the lookup finishes via faster hops
+      key = int(0.65 * CHORD_RING_SIZE)
+      result = self.wait(client.find_successor(key, iterative=True))
+      self.assertEqual(result["node_id"], responsible_node.id)
+
+      self.wait(asyncio.sleep(0.5))
+      _, err = self.wait(client.run_rpc_safe(slow.node_address, "rpc_get_node_info"))
+      self.assertEqual(err, 0)
+
 if __name__ == '__main__':
     unittest.main()
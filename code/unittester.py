@@ -1,14 +1,24 @@
 #!/usr/bin/python3
+from helpers.test_bloomFilter import *
+from helpers.test_connectionPool import *
+from helpers.test_fingerIndex import *
 from helpers.test_iniParser import *
+from helpers.test_lookupCache import *
+from helpers.test_merkleTree import *
 from helpers.test_messageParser import *
+from helpers.test_peerSuspicion import *
+from helpers.test_rateLimiter import *
 from helpers.test_replica import *
+from helpers.test_routingCache import *
+from helpers.test_rpcCodec import *
 from helpers.test_storage import *
+from helpers.test_storageJournal import *
 from helpers.test_validator import *
 
 
 import logging
 if __name__ == '__main__':
-    test_classes_to_run = [TestIniParser, TestValidator, TestStorage, TestReplica, TestMessageParser]
+    test_classes_to_run = [TestBloomFilter, TestConnectionPool, TestFingerIndex, TestIniParser, TestLookupCache, TestValidator, TestStorage, TestStorageJournal, TestReplica, TestRoutingCache, TestRpcCodec, TestMerkleTree, TestMessageParser, TestPeerSuspicion, TestRateLimiter]
 
     loader = unittest.TestLoader()
 